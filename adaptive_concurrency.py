@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Per-host adaptive concurrency limits (AIMD).
+
+Each host gets a window of concurrent requests that grows by about one
+slot per window's worth of healthy responses while the host is using all
+of it (additive increase) and halves on signs of overload (multiplicative
+decrease): a 429 or 503, a timeout or connection error, or latency well
+above the best the host has shown. Cuts happen at most once per smoothed
+round trip, so one burst of failures costs one halving rather than one per
+request. A host's window therefore settles just under the concurrency it
+can sustain, without tuning max_concurrent per site.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+# Responses that mean "slow down"
+OVERLOAD_STATUSES = frozenset({429, 503})
+
+
+class AimdLimiter:
+    """Concurrency window for one host
+
+    `window` starts at `initial` and stays within [minimum, maximum].
+    Latency counts as overload once the smoothed latency exceeds
+    `latency_tolerance` times the host's baseline (its lowest latency,
+    which drifts up slowly so a host that got permanently slower is not
+    cut forever). With `adaptive` off the window is a fixed semaphore.
+    """
+
+    # Smoothing weight of each new latency sample
+    ALPHA = 0.2
+    # Fraction of the gap to the smoothed latency the baseline moves per sample
+    BASELINE_DRIFT = 0.01
+
+    def __init__(self,
+                 initial: int,
+                 minimum: int = 1,
+                 maximum: int = 64,
+                 decrease: float = 0.5,
+                 latency_tolerance: float = 2.0,
+                 adaptive: bool = True):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.window = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.smoothed: Optional[float] = None
+        self._last_cut = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.stats = {'increases': 0, 'decreases': 0, 'overloads': 0, 'errors': 0}
+
+    @property
+    def limit(self) -> int:
+        return int(self.window)
+
+    @property
+    def waiting(self) -> int:
+        """Callers queued for a slot"""
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one slot of the window"""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._wake()
+
+    async def _acquire(self) -> None:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # _wake() takes the slot on our behalf before resolving the future
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            else:
+                self.in_flight -= 1
+                self._wake()
+            raise
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters in arrival order"""
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def observe(self, latency: Optional[float], status: Optional[int] = None) -> None:
+        """Feed back one response (status) or failure (status None)"""
+        if not self.adaptive:
+            return
+        if status is None:
+            self.stats['errors'] += 1
+            self._cut()
+            return
+        if status in OVERLOAD_STATUSES:
+            self.stats['overloads'] += 1
+            self._cut()
+            return
+        if latency is not None:
+            if self.baseline is None:
+                self.baseline = self.smoothed = latency
+            else:
+                self.smoothed += self.ALPHA * (latency - self.smoothed)
+                self.baseline = min(latency,
+                                    self.baseline + self.BASELINE_DRIFT * (self.smoothed - self.baseline))
+            if self.smoothed > self.baseline * self.latency_tolerance:
+                self._cut()
+                return
+        # Grow only when the window is the bottleneck; an idle window
+        # says nothing about what the host can take
+        if self.in_flight >= self.limit and self.window < self.maximum:
+            before = self.limit
+            self.window = min(self.maximum, self.window + 1 / self.window)
+            if self.limit > before:
+                self.stats['increases'] += 1
+                self._wake()
+
+    def _cut(self) -> None:
+        now = time.monotonic()
+        if now - self._last_cut < (self.smoothed or 0.0):
+            return
+        self._last_cut = now
+        window = max(self.minimum, self.window * self.decrease)
+        if window < self.window:
+            self.window = window
+            self.stats['decreases'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'window': self.limit,
+            'in_flight': self.in_flight,
+            'queued': self.waiting,
+            'latency_ms': round(self.smoothed * 1000, 1) if self.smoothed is not None else None,
+            'baseline_ms': round(self.baseline * 1000, 1) if self.baseline is not None else None,
+            **self.stats,
+        }
@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Incremental discovery of new article URLs for the golf sites.
+
+For every site in website_configs.json, discovery reads the site's RSS/Atom
+feeds and sitemaps when it has any (`feeds` and `sitemaps` keys, plus feeds
+advertised by the homepage on earlier runs), and otherwise its listing
+pages through `articleListSelectors`, keeping links that match
+`articlePatterns`. All of these are fetched with the ETag/Last-Modified
+validators from the previous run, so an unchanged source costs one 304.
+
+Per site, the newest publication time seen so far is kept as a high-water
+mark. Listing pages are followed (rel="next") only while a page is all new
+articles newer than the mark, and sitemap indexes only open child
+sitemaps modified after it.
+
+Nothing is remembered when a URL is merely handed out. The caller reports
+each one with finish() once it is processed: finished URLs are not handed
+out again, and a site's validators and high-water mark are saved only when
+its scan completed and every URL it yielded finished. If a run stops
+early, or an article fails, the next run reads the same sources in full
+again instead of getting a 304 for entries nobody processed:
+
+    async for article in processor.iter_articles(discovery.new_urls()):
+        await discovery.finish(article.url, done=article.status.value in DONE_STATUSES)
+
+(DONE_STATUSES from job_journal.py).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from aiohttp import ClientSession, ClientTimeout
+from bs4 import BeautifulSoup
+
+from test_optimize_enhanced import RateLimiter, SiteConfigRegistry
+from url_seen_filter import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+FEED = 'feed'
+SITEMAP = 'sitemap'
+LISTING = 'listing'
+
+_FEED_TYPES = ('application/rss+xml', 'application/atom+xml')
+
+
+@dataclass
+class DiscoveredArticle:
+    """A new article URL and where it was found"""
+    url: str
+    site: str
+    source: str                 # FEED, SITEMAP or LISTING
+    published: Optional[datetime] = None
+    title: Optional[str] = None
+
+
+@dataclass
+class _SiteRun:
+    """A site's discovery state, held back until its articles are finished"""
+    validators: Dict[str, Tuple[Optional[str], Optional[str]]] = field(default_factory=dict)
+    newest: Optional[datetime] = None
+    feeds: Optional[List[str]] = None
+    outstanding: Set[str] = field(default_factory=set)
+    scanned: bool = False
+    failed: bool = False
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """ISO 8601 or RFC 822 timestamp as an aware UTC datetime"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _local(tag: str) -> str:
+    """Element tag without its XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_text(element: ET.Element, *names: str) -> Optional[str]:
+    for child in element.iter():
+        if _local(child.tag) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def parse_feed(data: bytes) -> List[Tuple[str, Optional[datetime], Optional[str]]]:
+    """(link, published, title) for each RSS item or Atom entry"""
+    root = ET.fromstring(data)
+    entries = []
+    for element in root.iter():
+        name = _local(element.tag)
+        if name == 'item':
+            link = _child_text(element, 'link')
+            published = _child_text(element, 'pubDate', 'date', 'published', 'updated')
+        elif name == 'entry':
+            link = None
+            for child in element:
+                if _local(child.tag) == 'link' and child.get('rel', 'alternate') == 'alternate':
+                    link = child.get('href')
+                    break
+            published = _child_text(element, 'published', 'updated')
+        else:
+            continue
+        if link:
+            entries.append((link.strip(), _parse_time(published), _child_text(element, 'title')))
+    return entries
+
+
+def parse_sitemap(data: bytes) -> Tuple[List[Tuple[str, Optional[datetime]]],
+                                        List[Tuple[str, Optional[datetime]]]]:
+    """(child sitemaps, page URLs), each as (loc, last modified or news publication date)"""
+    root = ET.fromstring(data)
+    children, pages = [], []
+    for element in root:
+        name = _local(element.tag)
+        if name not in ('sitemap', 'url'):
+            continue
+        loc = _child_text(element, 'loc')
+        if not loc:
+            continue
+        modified = _parse_time(_child_text(element, 'publication_date', 'lastmod'))
+        (children if name == 'sitemap' else pages).append((loc, modified))
+    return children, pages
+
+
+def parse_listing(html: bytes, page_url: str,
+                  selectors: Dict[str, str]) -> Tuple[List[Tuple[str, Optional[datetime], Optional[str]]],
+                                                      Optional[str], List[str]]:
+    """(link, published, title) per listing entry, the next page URL and advertised feeds"""
+    soup = BeautifulSoup(html, 'lxml')
+    entries = []
+    containers = soup.select(selectors['container']) if selectors.get('container') else []
+    for container in containers:
+        link = (container if container.name == 'a' and container.get('href')
+                else container.select_one(selectors.get('link') or 'a[href]'))
+        if link is None or not link.get('href'):
+            continue
+        published = None
+        if selectors.get('time'):
+            stamp = container.select_one(selectors['time'])
+            if stamp is not None:
+                published = _parse_time(stamp.get(selectors.get('timeAttribute') or 'datetime')
+                                        or stamp.get_text(strip=True))
+        title = container.select_one(selectors['title']) if selectors.get('title') else None
+        entries.append((urljoin(page_url, link['href']), published,
+                        title.get_text(strip=True) if title else None))
+    if not containers:
+        # Layout changed: fall back to every link, filtered by articlePatterns later
+        entries = [(urljoin(page_url, a['href']), None, None) for a in soup.select('a[href]')]
+
+    next_link = soup.select_one(selectors.get('nextPage') or 'link[rel=next], a[rel=next]')
+    next_page = urljoin(page_url, next_link['href']) if next_link and next_link.get('href') else None
+    feeds = [urljoin(page_url, link['href'])
+             for link in soup.select('link[rel=alternate][href]')
+             if link.get('type') in _FEED_TYPES]
+    return entries, next_page, feeds
+
+
+class DiscoveryState:
+    """Validators per source, high-water mark and feeds per site, and finished URLs
+
+    Methods are synchronous and thread-safe; async callers should run them
+    through asyncio.to_thread.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path / 'discovery.sqlite3'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS sources (
+                url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, checked_at REAL);
+            CREATE TABLE IF NOT EXISTS sites (
+                site TEXT PRIMARY KEY, high_water TEXT, feeds TEXT);
+            CREATE TABLE IF NOT EXISTS known (
+                canonical TEXT PRIMARY KEY, site TEXT, first_seen REAL) WITHOUT ROWID;
+        ''')
+
+    def validators(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        with self._lock:
+            row = self._db.execute('SELECT etag, last_modified FROM sources WHERE url = ?',
+                                   (url,)).fetchone()
+        return row if row else (None, None)
+
+    def save_validators(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)',
+                             (url, etag, last_modified, time.time()))
+
+    def _site(self, site: str) -> Tuple[Optional[str], Optional[str]]:
+        row = self._db.execute('SELECT high_water, feeds FROM sites WHERE site = ?',
+                               (site,)).fetchone()
+        return row if row else (None, None)
+
+    def high_water(self, site: str) -> Optional[datetime]:
+        with self._lock:
+            return _parse_time(self._site(site)[0])
+
+    def feeds(self, site: str) -> List[str]:
+        """Feeds the site's homepage advertised on an earlier run"""
+        with self._lock:
+            feeds = self._site(site)[1]
+        return json.loads(feeds) if feeds else []
+
+    def update_site(self, site: str, high_water: Optional[datetime],
+                    feeds: Optional[List[str]] = None) -> None:
+        with self._lock:
+            old_mark, old_feeds = self._site(site)
+            mark = high_water.isoformat() if high_water else old_mark
+            self._db.execute('INSERT OR REPLACE INTO sites VALUES (?, ?, ?)',
+                             (site, mark, json.dumps(feeds) if feeds is not None else old_feeds))
+
+    def known(self, canonicals: Iterable[str]) -> Set[str]:
+        """Those of `canonicals` that were finished on an earlier run"""
+        found = set()
+        with self._lock:
+            for canonical in canonicals:
+                if self._db.execute('SELECT 1 FROM known WHERE canonical = ?',
+                                    (canonical,)).fetchone() is not None:
+                    found.add(canonical)
+        return found
+
+    def mark_known(self, canonical: str, site: str) -> None:
+        with self._lock:
+            self._db.execute('INSERT OR IGNORE INTO known VALUES (?, ?, ?)',
+                             (canonical, site, time.time()))
+
+    def save_site(self, site: str, high_water: Optional[datetime], feeds: Optional[List[str]],
+                  validators: Dict[str, Tuple[Optional[str], Optional[str]]]) -> None:
+        """Save a finished site's source validators and mark, and commit"""
+        for url, (etag, last_modified) in validators.items():
+            self.save_validators(url, etag, last_modified)
+        self.update_site(site, high_water, feeds)
+        self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+
+class ArticleDiscovery:
+    """Finds article URLs published since the last run, site by site
+
+    `sites` limits discovery to some website_configs.json keys. On a
+    site's first run, articles with a publication time older than
+    `max_age_hours` are skipped. Later runs skip only articles that are
+    that old and no newer than the site's high-water mark, so a site not
+    crawled for longer than `max_age_hours` still yields everything
+    published since its mark. At most `max_pages` listing pages (or
+    child sitemaps) are fetched per source.
+    """
+
+    def __init__(self,
+                 state_dir: Path,
+                 site_configs: Optional[SiteConfigRegistry] = None,
+                 sites: Optional[Iterable[str]] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 max_pages: int = 5,
+                 max_age_hours: float = 48,
+                 concurrent_sites: int = 4,
+                 timeout: int = 30):
+        self.site_configs = site_configs or SiteConfigRegistry.load()
+        self.sites = list(sites) if sites else list(self.site_configs.configs)
+        self.state = DiscoveryState(state_dir)
+        self.rate_limiter = rate_limiter
+        self.max_pages = max_pages
+        self.max_age = timedelta(hours=max_age_hours)
+        self.concurrent_sites = concurrent_sites
+        self.timeout = ClientTimeout(total=timeout)
+        self._session: Optional[ClientSession] = None
+        # Canonical URLs queued this run, and the site of each one handed out
+        # and not yet finished
+        self._queued = set()
+        self._handed_out: Dict[str, str] = {}
+        self._runs: Dict[str, _SiteRun] = {}
+        self.stats = {'requests': 0, 'not_modified': 0, 'errors': 0, 'discovered': 0}
+
+    async def _fetch(self, url: str, run: _SiteRun) -> Optional[bytes]:
+        """Conditional GET: the body on 200, None on 304
+
+        The response's validators are kept in `run` until the site commits.
+        """
+        if self._session is None:
+            self._session = ClientSession(
+                timeout=self.timeout,
+                headers={'User-Agent': 'Mozilla/5.0 (compatible; GolfArticleBot/1.0)'})
+        etag, last_modified = await asyncio.to_thread(self.state.validators, url)
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(url)
+        self.stats['requests'] += 1
+        try:
+            async with self._session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    self.stats['not_modified'] += 1
+                    return None
+                if response.status != 200:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history, status=response.status,
+                        message=f"HTTP {response.status}")
+                body = await response.read()
+                run.validators[url] = (response.headers.get('ETag'),
+                                       response.headers.get('Last-Modified'))
+                return body
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.stats['errors'] += 1
+            raise
+
+    def _matches(self, site: str, config: Dict[str, Any], url: str) -> bool:
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or self.site_configs.site_key(url) != site:
+            return False
+        patterns = config.get('articlePatterns')
+        return not patterns or any(pattern in parsed.path for pattern in patterns)
+
+    async def _discover_site(self, site: str, queue: asyncio.Queue) -> None:
+        config = self.site_configs.configs.get(site, {})
+        run = self._runs[site] = _SiteRun()
+        high_water = await asyncio.to_thread(self.state.high_water, site)
+        # Never cut above the mark: entries newer than it are always wanted
+        too_old = datetime.now(timezone.utc) - self.max_age
+        if high_water is not None:
+            too_old = min(too_old, high_water)
+        newest = high_water
+        advertised = await asyncio.to_thread(self.state.feeds, site)
+        failed = set()
+
+        async def offer(entries, source: str) -> bool:
+            """Queue unseen entries; True if the next page may hold more of them"""
+            nonlocal newest
+            more = bool(entries)
+            entries = [(url, published, title, canonicalize_url(url))
+                       for url, published, title in entries if self._matches(site, config, url)]
+            known = (await asyncio.to_thread(self.state.known, [entry[3] for entry in entries])
+                     if entries else set())
+            for url, published, title, canonical in entries:
+                if published and (newest is None or published > newest):
+                    newest = published
+                if published and published <= too_old:
+                    more = False
+                    continue
+                if canonical in self._queued or canonical in known:
+                    # Known entries newer than the saved mark are from a run
+                    # that stopped before the site was saved; older pages
+                    # may still hold entries nobody processed
+                    if not (published and (high_water is None or published > high_water)):
+                        more = False
+                    continue
+                # Unseen but older than the mark: hand it out, but stop paging
+                if high_water and published and published <= high_water:
+                    more = False
+                self._queued.add(canonical)
+                run.outstanding.add(canonical)
+                await queue.put(DiscoveredArticle(url, site, source, published, title))
+            return more
+
+        feeds = list(dict.fromkeys(config.get('feeds', []) + advertised))
+        answered = False
+        for feed in feeds:
+            try:
+                data = await self._fetch(feed, run)
+                answered = True
+                if data:
+                    await offer(await asyncio.to_thread(parse_feed, data), FEED)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError) as e:
+                logger.warning(f"Skipping feed {feed}: {e}")
+                failed.add(feed)
+        for sitemap in config.get('sitemaps', []):
+            try:
+                answered |= await self._read_sitemap(sitemap, run, high_water or too_old, offer)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError) as e:
+                logger.warning(f"Skipping sitemap {sitemap}: {e}")
+
+        # Listing pages only when no feed or sitemap could be read
+        page = None if answered else config.get('homepage')
+        selectors = config.get('articleListSelectors', {})
+        for page_number in range(self.max_pages):
+            if not page:
+                break
+            try:
+                data = await self._fetch(page, run)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                break
+            if not data:
+                break
+            entries, page, feeds_found = await asyncio.to_thread(parse_listing, data, page, selectors)
+            if page_number == 0:
+                advertised = [feed for feed in feeds_found
+                              if self.site_configs.site_key(feed) == site][:3]
+            if not await offer(entries, LISTING):
+                break
+
+        # Advertised feeds that fail are forgotten rather than retried every run
+        run.newest = newest
+        run.feeds = [feed for feed in advertised if feed not in failed]
+        run.scanned = True
+        await self._commit_site(site)
+
+    async def _commit_site(self, site: str) -> None:
+        """Save a site's validators and high-water mark once nothing is outstanding"""
+        run = self._runs[site]
+        if not run.scanned or run.outstanding:
+            return
+        del self._runs[site]
+        if run.failed:
+            # Keep the old validators and mark so the failed entries are
+            # read again next run (finished ones are known and skipped)
+            await asyncio.to_thread(self.state.save_site, site, None, run.feeds, {})
+        else:
+            await asyncio.to_thread(self.state.save_site, site, run.newest, run.feeds,
+                                    run.validators)
+
+    async def finish(self, url: str, done: bool = True) -> None:
+        """Report a URL from discover()/new_urls() as processed
+
+        `done` URLs are remembered and never handed out again; others (failed
+        fetches) are found again next run, since their site's state is not
+        advanced.
+        """
+        canonical = canonicalize_url(url)
+        site = self._handed_out.pop(canonical, None)
+        if site is None:
+            return
+        if done:
+            await asyncio.to_thread(self.state.mark_known, canonical, site)
+        run = self._runs.get(site)
+        if run is None:
+            return
+        run.outstanding.discard(canonical)
+        run.failed |= not done
+        await self._commit_site(site)
+
+    async def _read_sitemap(self, url: str, run: _SiteRun, since: datetime, offer) -> bool:
+        data = await self._fetch(url, run)
+        if data is None:
+            return True
+        children, pages = await asyncio.to_thread(parse_sitemap, data)
+        if pages:
+            await offer([(loc, modified, None) for loc, modified in pages], SITEMAP)
+        # Newest child sitemaps first; unchanged ones are skipped entirely
+        children.sort(key=lambda child: child[1] or datetime.max.replace(tzinfo=timezone.utc),
+                      reverse=True)
+        for loc, modified in children[:self.max_pages]:
+            if modified and modified <= since:
+                break
+            child_data = await self._fetch(loc, run)
+            if child_data:
+                _, child_pages = await asyncio.to_thread(parse_sitemap, child_data)
+                await offer([(page, when, None) for page, when in child_pages], SITEMAP)
+        return True
+
+    async def discover(self) -> AsyncIterator[DiscoveredArticle]:
+        """New articles from all sites, yielded as soon as each is found"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        semaphore = asyncio.Semaphore(self.concurrent_sites)
+
+        async def run(site: str) -> None:
+            async with semaphore:
+                try:
+                    await self._discover_site(site, queue)
+                except Exception:
+                    logger.exception(f"Discovery failed for {site}")
+
+        async def run_all() -> None:
+            await asyncio.gather(*(run(site) for site in self.sites))
+            await queue.put(None)
+
+        producer = asyncio.create_task(run_all())
+        try:
+            while (article := await queue.get()) is not None:
+                self._handed_out[canonicalize_url(article.url)] = article.site
+                self.stats['discovered'] += 1
+                yield article
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            await asyncio.to_thread(self.state.flush)
+            logger.info(f"Discovery: {self.stats}")
+
+    async def new_urls(self) -> AsyncIterator[str]:
+        """discover(), as plain URLs for GolfArticleProcessor.iter_articles()"""
+        async for article in self.discover():
+            yield article.url
+
+    async def aclose(self) -> None:
+        if self._session:
+            await self._session.close()
+            self._session = None
+        await asyncio.to_thread(self.state.close)
+
+    async def __aenter__(self) -> 'ArticleDiscovery':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Print article URLs published since the last run")
+    parser.add_argument('sites', nargs='*', help="website_configs.json keys (default: all)")
+    parser.add_argument('--state-dir', type=Path, default=Path('.discovery'))
+    parser.add_argument('--max-pages', type=int, default=5)
+    parser.add_argument('--max-age-hours', type=float, default=48)
+    args = parser.parse_args()
+
+    async with ArticleDiscovery(args.state_dir, sites=args.sites or None,
+                                max_pages=args.max_pages,
+                                max_age_hours=args.max_age_hours) as discovery:
+        async for url in discovery.new_urls():
+            print(url, flush=True)
+            await discovery.finish(url)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
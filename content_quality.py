@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Cheap content-quality scoring for extracted article bodies.
+
+Navigation pages, galleries, video stubs and paywall teasers all extract
+to a non-empty title and body, so "has a body" is not enough to send a
+page on to rewriting and AI detection. score_content() measures:
+
+- word count of the body
+- paragraph count: block elements (<p>, <li>, <blockquote>, ...) in the
+  body's container with PARAGRAPH_WORDS+ words
+- link density: share of body characters that are link text inside the
+  container (menus, "related" lists, tag clouds)
+- boilerplate ratio: share of block text in very short blocks or
+  share/subscribe/cookie style blocks
+- text density: body characters per byte of HTML
+
+The body is flattened with a newline between every text node, so inline
+markup splits a paragraph over several lines; blocks and links are
+therefore collected from the tree while extracting (block_texts()) and
+passed in. Without them, body lines and a regex pass over the raw HTML
+stand in. check_quality() compares a score with thresholds (defaults,
+overridable per run and per site with a `quality` block in
+website_configs.json) and returns the reasons a page fails, empty if it
+passes.
+"""
+
+import html
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from near_duplicates import CJK_CHARACTERS
+
+# Blocks with at least this many words count as paragraphs
+PARAGRAPH_WORDS = 12
+# Blocks with fewer words than this are captions, buttons and labels
+SHORT_LINE_WORDS = 4
+
+# Elements whose text is one block; the outermost one wins when nested
+BLOCK_TAGS = frozenset(('p', 'li', 'blockquote', 'pre', 'dd', 'dt', 'figcaption', 'td', 'th',
+                        'h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+
+# Defaults for website_configs.json `quality` keys; a None threshold is off.
+# Every recorded article clears them with room to spare (the shortest has
+# ~450 words in 9 paragraphs), leaving space for short news briefs
+DEFAULT_THRESHOLDS: Dict[str, Optional[float]] = {
+    'minWords': 100,
+    'minParagraphs': 2,
+    'maxLinkDensity': 0.5,
+    'maxBoilerplateRatio': 0.6,
+    'minTextDensity': None,
+}
+
+_ANCHOR = re.compile(rb'<a\b[^>]*>(.*?)</a\s*>', re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(rb'<[^>]*>')
+_SPACE = re.compile(r'\s+')
+_BOILERPLATE = re.compile(
+    r'\b(?:subscribe|sign up|newsletter|cookies?|advertisement|sponsored|'
+    r'all rights reserved|read more|share (?:this|on)|follow us|click here|'
+    r'log ?in|privacy policy|terms (?:of use|and conditions)|related (?:articles|posts))\b'
+    r'|订阅|广告|版权所有|阅读更多|分享',
+    re.IGNORECASE)
+
+
+def anchor_texts(page: bytes) -> set:
+    """Visible text of every link on the page, whitespace-collapsed"""
+    texts = set()
+    for match in _ANCHOR.finditer(page):
+        text = _TAG.sub(b'', match.group(1)).decode('utf-8', 'replace')
+        if '&' in text:
+            text = html.unescape(text)
+        text = _SPACE.sub(' ', text).strip()
+        if text:
+            texts.add(text)
+    return texts
+
+
+def block_texts(roots: Iterable[Any],
+                name_of: Callable[[Any], str],
+                children_of: Callable[[Any], List[Any]],
+                text_of: Callable[[Any], str]) -> List[str]:
+    """Text of every outermost block element under (or among) roots
+
+    Works on any tree: the callables give a node's tag name, its element
+    children and its text with inline pieces joined by spaces.
+    """
+    blocks = []
+    stack = list(roots)
+    stack.reverse()
+    while stack:
+        node = stack.pop()
+        if name_of(node) in BLOCK_TAGS:
+            text = text_of(node)
+            if text:
+                blocks.append(text)
+        else:
+            stack.extend(reversed(children_of(node)))
+    return blocks
+
+
+def _words(line: str) -> int:
+    words = len(line.split())
+    if not line.isascii():
+        # Han, kana and hangul characters count as one word each
+        words += len(CJK_CHARACTERS.findall(line))
+    return words
+
+
+def score_content(body: str,
+                  page: bytes,
+                  blocks: Optional[List[str]] = None,
+                  links: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Quality measurements for an extracted body and the page it came from
+
+    `blocks` and `links` are the block and link texts of the body's
+    container, as collected during extraction. Without blocks, body lines
+    are scored as blocks; without links, body lines that match a link's
+    text anywhere on the page count as link text.
+    """
+    lines = body.split('\n')
+    chars = sum(map(len, lines))
+    words = sum(map(_words, lines))
+    paragraphs = block_chars = boilerplate_chars = 0
+    for block in blocks or lines:
+        size = len(block)
+        count = _words(block)
+        block_chars += size
+        if count >= PARAGRAPH_WORDS:
+            paragraphs += 1
+        elif count < SHORT_LINE_WORDS or (count < PARAGRAPH_WORDS * 2
+                                          and _BOILERPLATE.search(block)):
+            boilerplate_chars += size
+    if links is None:
+        page_links = anchor_texts(page)
+        link_chars = sum(len(line) for line in lines if line in page_links)
+    else:
+        link_chars = sum(map(len, links))
+    chars = max(chars, 1)
+    return {
+        'words': words,
+        'paragraphs': paragraphs,
+        'link_density': round(min(link_chars / chars, 1.0), 4),
+        'boilerplate_ratio': round(boilerplate_chars / max(block_chars, 1), 4),
+        'text_density': round(chars / max(len(page), 1), 4),
+    }
+
+
+def check_quality(score: Dict[str, Any], thresholds: Dict[str, Optional[float]]) -> List[str]:
+    """Reasons `score` fails `thresholds` (website_configs.json `quality` keys)"""
+    reasons = []
+    limits = (
+        ('minWords', 'words', min),
+        ('minParagraphs', 'paragraphs', min),
+        ('maxLinkDensity', 'link_density', max),
+        ('maxBoilerplateRatio', 'boilerplate_ratio', max),
+        ('minTextDensity', 'text_density', min),
+    )
+    for key, measure, kind in limits:
+        limit = thresholds.get(key)
+        if limit is None:
+            continue
+        value = score[measure]
+        if (value < limit) if kind is min else (value > limit):
+            reasons.append(f"{measure} {value:g} {'<' if kind is min else '>'} {limit:g}")
+    return reasons
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP response cache for the golf article processors.
+
+Stores page bodies with their ETag/Last-Modified validators so later runs
+can send conditional GETs, and memoizes extraction results by body content
+hash so unchanged pages are never parsed twice. Everything lives in one
+SQLite file and is evicted least-recently-used once it grows past a size cap.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(body: bytes) -> str:
+    """Stable hash of a response body"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    """A cached page plus the validators needed to revalidate it"""
+    url: str
+    body: bytes
+    encoding: Optional[str]
+    content_hash: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class ResponseCache:
+    """SQLite-backed response and extraction cache with size-based LRU eviction
+
+    Methods are synchronous and thread-safe; async callers should run them
+    through asyncio.to_thread so disk I/O stays off the event loop.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            encoding TEXT,
+            content_hash TEXT NOT NULL,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            fetched_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS extractions (
+            content_hash TEXT PRIMARY KEY,
+            result TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS responses_access ON responses(last_access);
+        CREATE INDEX IF NOT EXISTS extractions_access ON extractions(last_access);
+    '''
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.cache_dir / 'responses.sqlite3'),
+                                   check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(self.SCHEMA)
+        self._total_bytes = self._db.execute(
+            'SELECT (SELECT COALESCE(SUM(size), 0) FROM responses) + '
+            '(SELECT COALESCE(SUM(size), 0) FROM extractions)'
+        ).fetchone()[0]
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """Get the cached response for a URL"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body, encoding, content_hash, etag, last_modified, fetched_at '
+                'FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE responses SET last_access = ? WHERE url = ?',
+                             (time.time(), url))
+            self._db.commit()
+        return CachedResponse(url, *row)
+
+    @staticmethod
+    def conditional_headers(entry: CachedResponse) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for a cached entry"""
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self,
+              url: str,
+              body: bytes,
+              encoding: Optional[str],
+              etag: Optional[str],
+              last_modified: Optional[str]) -> str:
+        """Cache a 200 response and return its content hash"""
+        digest = content_hash(body)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute('SELECT size FROM responses WHERE url = ?',
+                                   (url,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, encoding, digest, body, len(body), now, now)
+            )
+            self._total_bytes += len(body) - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+        return digest
+
+    def touch(self, url: str) -> None:
+        """Mark a cached response as revalidated (after a 304)"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'UPDATE responses SET fetched_at = ?, last_access = ? WHERE url = ?',
+                (now, now, url)
+            )
+            self._db.commit()
+
+    def get_extraction(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a memoized extraction result"""
+        with self._lock:
+            row = self._db.execute('SELECT result FROM extractions WHERE content_hash = ?',
+                                   (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE extractions SET last_access = ? WHERE content_hash = ?',
+                             (time.time(), key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put_extraction(self, key: str, result: Dict[str, Any]) -> None:
+        """Memoize an extraction result"""
+        data = json.dumps(result, ensure_ascii=False)
+        size = len(data.encode('utf-8'))
+        with self._lock:
+            old = self._db.execute('SELECT size FROM extractions WHERE content_hash = ?',
+                                   (key,)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)',
+                             (key, data, size, time.time()))
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under 90% of the size cap"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        while self._total_bytes > target:
+            rows = self._db.execute(
+                "SELECT 'responses', url, size, last_access FROM responses "
+                "UNION ALL "
+                "SELECT 'extractions', content_hash, size, last_access FROM extractions "
+                "ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for table, key, size, _ in rows:
+                column = 'url' if table == 'responses' else 'content_hash'
+                self._db.execute(f'DELETE FROM {table} WHERE {column} = ?', (key,))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+        logger.debug(f"Response cache evicted down to {self._total_bytes} bytes")
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._db.close()
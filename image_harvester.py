@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Concurrent download of article images into a content-addressed store.
+
+Images are streamed to disk chunk by chunk while being hashed, then moved
+to <store>/<hash[:2]>/<hash><ext>, so an image that appears under many
+URLs (sponsor banners, player headshots) is kept once. A SQLite table maps
+image URLs to their stored file, so an image URL already fetched in this
+run or an earlier one is never requested again, and concurrent articles
+asking for the same URL share one download.
+
+Oversized images are skipped before their body is sent: a HEAD (or a
+one-byte Range request when HEAD is refused) reports the size, and the
+byte cap is still enforced while streaming for servers that report none.
+Every request, probes included, takes a rate-limiter token.
+"""
+
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Outcomes kept across runs; failures are not recorded and retried next run
+STORED = 'stored'
+TOO_LARGE = 'too_large'
+NOT_IMAGE = 'not_image'
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class ImageHarvester:
+    """Downloads images through the processor's per-site sessions
+
+    `session_for(url)` is an async context manager yielding the pooled
+    ClientSession for a URL's host (GolfArticleProcessor._get_session).
+    At most `concurrency` downloads run at once across all articles.
+    Chunk writes, index lookups, commits and moves into the store run
+    through asyncio.to_thread; the synchronous helpers behind them are
+    thread-safe.
+    """
+
+    COMMIT_EVERY = 100
+
+    def __init__(self,
+                 store_dir: Path,
+                 session_for: Callable[[str], Any],
+                 rate_limiter: Optional[Any] = None,
+                 max_bytes: int = 5 * 1024 * 1024,
+                 concurrency: int = 8,
+                 precheck: bool = True,
+                 chunk_size: int = 64 * 1024):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.session_for = session_for
+        self.rate_limiter = rate_limiter
+        self.max_bytes = max_bytes
+        self.precheck = precheck
+        self.chunk_size = chunk_size
+        self._slots = asyncio.Semaphore(concurrency)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.store_dir / 'images.sqlite3'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS images ('
+                         'url TEXT PRIMARY KEY, status TEXT NOT NULL, content_hash TEXT, '
+                         'path TEXT, size INTEGER, fetched_at REAL NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS images_by_hash ON images (content_hash)')
+        self._pending = 0
+        self.stats = {'downloaded': 0, 'url_hits': 0, 'content_hits': 0,
+                      'skipped_large': 0, 'failed': 0, 'bytes': 0}
+
+    async def harvest(self, page_url: str, image_urls: Iterable[str]) -> Dict[str, str]:
+        """Fetch an article's images; returns {image URL as given: stored file path}"""
+        sources = {src: urljoin(page_url, src) for src in dict.fromkeys(image_urls)}
+        paths = await asyncio.gather(*(self.fetch(url) for url in sources.values()))
+        return {src: path for src, path in zip(sources, paths) if path}
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Stored path for one image URL, downloading it if it is new"""
+        if urlparse(url).scheme not in ('http', 'https'):
+            return None
+        if url not in self._in_flight:
+            known, path = await asyncio.to_thread(self._lookup, url)
+            if known:
+                self.stats['url_hits'] += path is not None
+                return path
+        future = self._in_flight.get(url)
+        if future is not None:
+            self.stats['url_hits'] += 1
+            return await asyncio.shield(future)
+
+        future = self._in_flight[url] = asyncio.get_running_loop().create_future()
+        try:
+            async with self._slots:
+                path = await self._download(url)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            # Articles waiting on this download get None, even on cancellation
+            future.set_result(None)
+            if not isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError, OSError)):
+                raise
+            self.stats['failed'] += 1
+            logger.warning(f"Image download failed for {url}: {e}")
+            return None
+        finally:
+            del self._in_flight[url]
+
+    def _lookup(self, url: str) -> Tuple[bool, Optional[str]]:
+        """(known, stored path) for an image URL fetched before"""
+        with self._lock:
+            row = self._db.execute('SELECT status, path FROM images WHERE url = ?',
+                                   (url,)).fetchone()
+        if row is None:
+            return False, None
+        status, path = row
+        if status != STORED:
+            return True, None
+        # A stored file deleted since is downloaded again
+        return (True, path) if os.path.exists(path) else (False, None)
+
+    async def _throttle(self, url: str) -> None:
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(url)
+
+    async def _size(self, session: aiohttp.ClientSession, url: str) -> Optional[int]:
+        """Size reported by HEAD, or by a one-byte Range GET if HEAD is refused"""
+        await self._throttle(url)
+        async with session.head(url, allow_redirects=True) as response:
+            if response.status < 400:
+                # No Content-Length here: the streaming cap covers it
+                return response.content_length
+        await self._throttle(url)
+        async with session.get(url, headers={'Range': 'bytes=0-0'}) as response:
+            total = response.headers.get('Content-Range', '').rpartition('/')[2]
+            return int(total) if total.isdigit() else None
+
+    async def _download(self, url: str) -> Optional[str]:
+        async with self.session_for(url) as session:
+            if self.precheck:
+                size = await self._size(session, url)
+                if size is not None and size > self.max_bytes:
+                    return await self._skip(url, TOO_LARGE)
+            await self._throttle(url)
+            async with session.get(url) as response:
+                response.raise_for_status()
+                content_type = response.content_type or ''
+                if not content_type.startswith('image/'):
+                    return await self._skip(url, NOT_IMAGE)
+                if (response.content_length or 0) > self.max_bytes:
+                    return await self._skip(url, TOO_LARGE)
+                try:
+                    return await self._stream_to_store(url, response, content_type)
+                except ImageTooLarge:
+                    return await self._skip(url, TOO_LARGE)
+
+    async def _stream_to_store(self, url: str, response: aiohttp.ClientResponse,
+                               content_type: str) -> str:
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.store_dir, suffix='.part')
+        try:
+            # Each chunk is written from a thread so the loop never waits on
+            # disk; nothing larger than one chunk is held in memory
+            with os.fdopen(fd, 'wb') as f:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ImageTooLarge(url)
+                    digest.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+            path, known_content = await asyncio.to_thread(
+                self._store, url, tmp_name, digest.hexdigest(), content_type, size)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        if known_content:
+            self.stats['content_hits'] += 1
+        else:
+            self.stats['downloaded'] += 1
+            self.stats['bytes'] += size
+        return path
+
+    def _store(self, url: str, tmp_name: str, content_hash: str, content_type: str,
+               size: int) -> Tuple[str, bool]:
+        """Move a downloaded file into the store unless its content is already
+        there; returns the stored path and whether it was"""
+        with self._lock:
+            existing = self._db.execute(
+                'SELECT path FROM images WHERE content_hash = ? AND status = ? LIMIT 1',
+                (content_hash, STORED)).fetchone()
+            known_content = bool(existing and os.path.exists(existing[0]))
+            if known_content:
+                os.unlink(tmp_name)
+                path = existing[0]
+            else:
+                path = str(self._content_path(content_hash, url, content_type))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_name, path)
+            self._record(url, STORED, content_hash, path, size)
+        return path, known_content
+
+    def _content_path(self, content_hash: str, url: str, content_type: str) -> Path:
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        if not ext or len(ext) > 5:
+            ext = mimetypes.guess_extension(content_type) or ''
+        return self.store_dir / content_hash[:2] / f"{content_hash}{ext}"
+
+    async def _skip(self, url: str, status: str) -> None:
+        """Remember an image that will not be stored, so it is not requested again"""
+        if status == TOO_LARGE:
+            self.stats['skipped_large'] += 1
+
+        def record() -> None:
+            with self._lock:
+                self._record(url, status)
+
+        await asyncio.to_thread(record)
+        return None
+
+    def _record(self, url: str, status: str, content_hash: Optional[str] = None,
+                path: Optional[str] = None, size: Optional[int] = None) -> None:
+        """Add an outcome to the index; callers hold the lock"""
+        self._db.execute('INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?)',
+                         (url, status, content_hash, path, size, time.time()))
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self._commit()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._commit()
+
+    def _commit(self) -> None:
+        self._db.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Crash-safe job journal for batch article processing.
+
+A job is the ordered URL list passed to process_articles. The journal keeps
+each URL's state (pending, done, failed), its outcome and the result file
+its JSONL line went to, in SQLite with WAL so a crash, reboot or Ctrl-C
+never corrupts it. Outcomes are buffered and committed in batches; at worst
+the last unflushed batch is processed again on resume.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+# Outcomes that count as finished; everything else is retried on resume
+DONE_STATUSES = frozenset({'success', 'duplicate', 'near_duplicate', 'low_quality'})
+
+
+class JobJournal:
+    """SQLite-backed per-URL progress log with batched writes
+
+    Methods are synchronous and thread-safe; async callers should run
+    flush() through asyncio.to_thread. record() only buffers and reports
+    whether a flush is due.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            total INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS job_urls (
+            job_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            state TEXT NOT NULL,
+            status TEXT,
+            title TEXT,
+            error TEXT,
+            processing_time REAL,
+            result_file TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL,
+            PRIMARY KEY (job_id, position)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS job_urls_url ON job_urls(job_id, url);
+    '''
+
+    def __init__(self, path: Path, flush_every: int = 200, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(self.SCHEMA)
+        self._outcomes: List[Tuple[Any, ...]] = []
+        self._locations: List[Tuple[str, str, str]] = []
+        self._last_flush = time.monotonic()
+
+    def create_job(self, urls: Iterable[str], job_id: Optional[str] = None) -> str:
+        """Register a job with all its URLs pending and return its id"""
+        job_id = job_id or uuid.uuid4().hex[:12]
+        rows = [(job_id, position, url, PENDING) for position, url in enumerate(urls)]
+        with self._lock:
+            self._db.execute('INSERT INTO jobs VALUES (?, ?, ?)', (job_id, time.time(), len(rows)))
+            self._db.executemany(
+                'INSERT INTO job_urls (job_id, position, url, state) VALUES (?, ?, ?, ?)', rows)
+            self._db.commit()
+        logger.info(f"Journal job {job_id}: {len(rows)} URLs")
+        return job_id
+
+    def job_entries(self, job_id: str) -> List[Dict[str, Any]]:
+        """All URLs of a job in order, with their recorded state"""
+        with self._lock:
+            if self._db.execute('SELECT 1 FROM jobs WHERE job_id = ?', (job_id,)).fetchone() is None:
+                raise KeyError(f"Unknown job: {job_id}")
+            cursor = self._db.execute(
+                'SELECT position, url, state, status, title, error, processing_time, '
+                'result_file, attempts FROM job_urls WHERE job_id = ? ORDER BY position',
+                (job_id,))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+
+    def progress(self, job_id: str) -> Dict[str, int]:
+        """Count of URLs per state"""
+        with self._lock:
+            rows = self._db.execute('SELECT state, COUNT(*) FROM job_urls WHERE job_id = ? '
+                                    'GROUP BY state', (job_id,)).fetchall()
+        return {PENDING: 0, DONE: 0, FAILED: 0, **dict(rows)}
+
+    def record(self,
+               job_id: str,
+               position: int,
+               status: str,
+               title: Optional[str] = None,
+               error: Optional[str] = None,
+               processing_time: float = 0.0) -> bool:
+        """Buffer one URL's outcome; returns True when a flush is due"""
+        state = DONE if status in DONE_STATUSES else FAILED
+        with self._lock:
+            self._outcomes.append((state, status, title, error, processing_time, time.time(),
+                                   job_id, position))
+            return (len(self._outcomes) >= self.flush_every or
+                    time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def note_locations(self, entries: Iterable[Tuple[Any, str]]) -> None:
+        """Buffer result file locations, keyed by (job_id, url)
+
+        Matches JsonlSink.on_written, so it is called from the writer thread.
+        """
+        with self._lock:
+            for (job_id, url), path in entries:
+                self._locations.append((path, job_id, url))
+
+    def flush(self) -> None:
+        """Commit buffered outcomes and locations in one transaction"""
+        with self._lock:
+            outcomes, self._outcomes = self._outcomes, []
+            locations, self._locations = self._locations, []
+            self._last_flush = time.monotonic()
+            if not outcomes and not locations:
+                return
+            self._db.executemany(
+                'UPDATE job_urls SET state = ?, status = ?, title = ?, error = ?, '
+                'processing_time = ?, updated_at = ?, attempts = attempts + 1 '
+                'WHERE job_id = ? AND position = ?', outcomes)
+            self._db.executemany(
+                'UPDATE job_urls SET result_file = ? WHERE job_id = ? AND url = ?', locations)
+            self._db.commit()
+
+    def close(self) -> None:
+        """Flush and close the database"""
+        self.flush()
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Per-phase latency histograms for the golf article processor.
+
+Every request is split into phases (dns, connect, ttfb, download, parse,
+extract, total) and each timing is recorded into a streaming log-linear
+histogram keyed by (phase, domain, status). The histograms use HDR-style
+buckets: 128 linear steps per power of two, so any percentile is within
+1% of the true value whatever the range, memory stays a few hundred
+counters per key, and merging two histograms is adding counts.
+
+Results come out as plain dicts for get_stats() or as Prometheus text,
+written to a file for the node_exporter textfile collector or served
+over HTTP.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Linear sub-buckets per power of two, as a bit count (2**7 = 128, <1% error)
+SUB_BUCKET_BITS = 7
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def _bucket(value: int) -> int:
+    if value < (1 << SUB_BUCKET_BITS):
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+
+def _bucket_midpoint(index: int) -> float:
+    if index < (1 << SUB_BUCKET_BITS):
+        return float(index)
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    low = (index - (shift << (SUB_BUCKET_BITS - 1))) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+class LatencyHistogram:
+    """Streaming log-linear histogram of durations, stored in microseconds"""
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = max(0, int(seconds * 1e6))
+        index = _bucket(micros)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction: float) -> float:
+        """Duration in seconds below which `fraction` of the samples fall"""
+        if not self.count:
+            return 0.0
+        target = max(1, round(fraction * self.count + 0.5 - 1e-9))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                # Bucket midpoints can overshoot the largest sample
+                return min(_bucket_midpoint(index) / 1e6, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        """Count, mean, p50/p90/p99 and max in milliseconds"""
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(0.5) * 1000,
+            'p90_ms': self.percentile(0.9) * 1000,
+            'p99_ms': self.percentile(0.99) * 1000,
+            'max_ms': self.max * 1000
+        }
+
+
+class PhaseMetrics:
+    """LatencyHistograms keyed by (phase, domain, status)"""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+
+    def record(self, phase: str, domain: str, status: Any, seconds: float) -> None:
+        key = (phase, domain, str(status))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def by_phase(self) -> Dict[str, LatencyHistogram]:
+        """Histograms merged across domains and statuses"""
+        merged: Dict[str, LatencyHistogram] = {}
+        for (phase, _, _), histogram in self.histograms.items():
+            merged.setdefault(phase, LatencyHistogram()).merge(histogram)
+        return merged
+
+    def summary(self) -> Dict[str, Any]:
+        """Snapshots per phase, and per phase -> domain -> status"""
+        by_domain: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (phase, domain, status), histogram in sorted(self.histograms.items()):
+            by_domain.setdefault(phase, {}).setdefault(domain, {})[status] = histogram.snapshot()
+        return {
+            'phases': {phase: histogram.snapshot() for phase, histogram in self.by_phase().items()},
+            'by_domain': by_domain
+        }
+
+    def to_prometheus(self, prefix: str = 'golf_processor',
+                      gauges: Optional[Dict[str, float]] = None) -> str:
+        """Prometheus text exposition: one summary per phase/domain/status, plus gauges"""
+        name = f'{prefix}_phase_seconds'
+        lines = [f'# HELP {name} Time spent per request phase',
+                 f'# TYPE {name} summary']
+        for (phase, domain, status), histogram in sorted(self.histograms.items()):
+            labels = f'phase="{phase}",domain="{_escape(domain)}",status="{_escape(status)}"'
+            for quantile in QUANTILES:
+                lines.append(f'{name}{{{labels},quantile="{quantile}"}} '
+                             f'{histogram.percentile(quantile):.6f}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram.total:.6f}')
+            lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        for key, value in (gauges or {}).items():
+            lines.append(f'# TYPE {prefix}_{key} gauge')
+            lines.append(f'{prefix}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def trace_config(self, domain_of: Callable[[str], str]) -> aiohttp.TraceConfig:
+        """aiohttp hooks recording dns, connect and ttfb for every request
+
+        Phases are recorded when the request ends, so they carry its HTTP
+        status ('error' if it raised). ttfb runs from the start of the
+        request to its response headers, including any dns and connect time.
+        """
+        trace = aiohttp.TraceConfig()
+        loop_time = lambda: asyncio.get_running_loop().time()
+
+        async def on_request_start(session, context, params):
+            context.start = loop_time()
+            context.phases = {}
+
+        async def on_dns_start(session, context, params):
+            context.dns_start = loop_time()
+
+        async def on_dns_end(session, context, params):
+            context.phases['dns'] = loop_time() - context.dns_start
+
+        async def on_connect_start(session, context, params):
+            context.connect_start = loop_time()
+
+        async def on_connect_end(session, context, params):
+            context.phases['connect'] = loop_time() - context.connect_start
+
+        def finish(context, url, status):
+            domain = domain_of(str(url))
+            for phase, seconds in context.phases.items():
+                self.record(phase, domain, status, seconds)
+            self.record('ttfb', domain, status, loop_time() - context.start)
+
+        async def on_request_end(session, context, params):
+            finish(context, params.url, params.response.status)
+
+        async def on_request_exception(session, context, params):
+            finish(context, params.url, 'error')
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_dns_resolvehost_start.append(on_dns_start)
+        trace.on_dns_resolvehost_end.append(on_dns_end)
+        trace.on_connection_create_start.append(on_connect_start)
+        trace.on_connection_create_end.append(on_connect_end)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        return trace
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_prometheus_file(path: Path, text: str) -> None:
+    """Replace `path` atomically so a scraper never reads a half-written file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+async def start_metrics_server(render: Callable[[], str], host: str = '127.0.0.1',
+                               port: int = 9464) -> web.AppRunner:
+    """Serve render() at /metrics; call cleanup() on the returned runner to stop"""
+    async def metrics(request: web.Request) -> web.Response:
+        return web.Response(text=render(),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    app = web.Application()
+    app.router.add_get('/metrics', metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for individual pieces of the golf article processor.
+
+Usage:
+    python micro_benchmarks.py rate-limiter
+    python micro_benchmarks.py extraction-plans
+    python micro_benchmarks.py single-pass
+    python micro_benchmarks.py parser-backends
+    python micro_benchmarks.py records
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from test_optimize_enhanced import (GENERIC_EXTRACTOR, PARSER_BACKENDS, ExtractionPlan,
+                                    ExtractionPlans, HTMLParser, ProcessedArticle,
+                                    ProcessingStatus, RateLimiter, SiteConfigRegistry,
+                                    _compact_metadata, extract_article)
+from text_spill import SpillFile
+
+# Saved article pages and the site config each belongs to
+FIXTURES = [
+    ('golfwrx_page_debug.html', 'golfwrx.com'),
+    ('test_todays_golfer/test_article.html', 'todays-golfer.com'),
+]
+
+# Stored pages used to check extractors against each other
+CORPUS_GLOBS = [
+    'golfwrx_page_debug.html',
+    'test_todays_golfer/*.html',
+    'wechat_html/*.html',
+    'wechat_simple/*.html',
+    'golf_content_backups/**/*.html',
+    '*test*.html',
+]
+
+
+async def _time_acquires(limiter: RateLimiter, waiters: int, urls: List[str]) -> float:
+    """Run `waiters` concurrent acquires and return seconds spent"""
+    start = time.perf_counter()
+    await asyncio.gather(*(limiter.acquire(urls[i % len(urls)])
+                           for i in range(waiters)))
+    return time.perf_counter() - start
+
+
+async def bench_rate_limiter(waiter_counts: List[int]) -> List[Dict[str, float]]:
+    """Measure per-acquire overhead as the number of concurrent waiters grows
+
+    The limit is set high enough that no waiter has to sleep, so the timing
+    is pure bookkeeping cost (reservation plus task scheduling).
+    """
+    urls = [f'https://{host}/news/article' for host in
+            ('www.golfmonthly.com', 'golf.com', 'www.golfdigest.com', 'golfwrx.com')]
+    rows = []
+    for waiters in waiter_counts:
+        limiter = RateLimiter(max_requests=10**9, global_max_requests=10**9)
+        await _time_acquires(limiter, 100, urls)  # warm bucket dicts
+        elapsed = await _time_acquires(limiter, waiters, urls)
+        rows.append({
+            'waiters': waiters,
+            'total_ms': elapsed * 1000,
+            'per_acquire_us': elapsed / waiters * 1e6
+        })
+    return rows
+
+
+async def bench_rate_limiter_pacing(rate: int = 2000, waiters: int = 10000) -> Dict[str, float]:
+    """Check that a real limit is honoured without drift under heavy load"""
+    limiter = RateLimiter(max_requests=rate, burst=1)
+    elapsed = await _time_acquires(limiter, waiters, ['https://golf.com/'])
+    return {
+        'waiters': waiters,
+        'expected_s': (waiters - 1) / rate,
+        'actual_s': elapsed
+    }
+
+
+def run_rate_limiter(args: argparse.Namespace) -> None:
+    rows = asyncio.run(bench_rate_limiter(args.waiters))
+    print(f"{'waiters':>8} {'total ms':>10} {'us/acquire':>11}")
+    for row in rows:
+        print(f"{row['waiters']:>8} {row['total_ms']:>10.1f} {row['per_acquire_us']:>11.2f}")
+
+    pacing = asyncio.run(bench_rate_limiter_pacing())
+    print(f"\nPacing {pacing['waiters']} waiters at 2000/s: "
+          f"expected {pacing['expected_s']:.2f}s, actual {pacing['actual_s']:.2f}s")
+
+
+def _articles_per_second(content: bytes, plan: Optional[ExtractionPlan],
+                         seconds: float) -> float:
+    """Run extract_article repeatedly for about `seconds` and return the rate"""
+    extract_article(content, None, plan)  # warm selector caches
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        extract_article(content, None, plan)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def bench_extraction_plans(seconds: float) -> List[Tuple[str, float, float]]:
+    """Compare generic selector chains against compiled per-site plans"""
+    plans = ExtractionPlans(SiteConfigRegistry.load().configs)
+    rows = []
+    for fixture, site in FIXTURES:
+        path = Path(__file__).parent / fixture
+        if not path.exists():
+            continue
+        content = path.read_bytes()
+        rows.append((site,
+                     _articles_per_second(content, None, seconds),
+                     _articles_per_second(content, plans.for_site(site), seconds)))
+    return rows
+
+
+def run_extraction_plans(args: argparse.Namespace) -> None:
+    rows = bench_extraction_plans(args.seconds)
+    print(f"{'site':<20} {'generic/s':>10} {'compiled/s':>11} {'speedup':>8}")
+    for site, generic, compiled in rows:
+        print(f"{site:<20} {generic:>10.1f} {compiled:>11.1f} {compiled / generic:>7.2f}x")
+
+
+def _corpus() -> List[Path]:
+    root = Path(__file__).parent
+    paths = {path for pattern in CORPUS_GLOBS for path in root.glob(pattern)}
+    return sorted(paths)
+
+
+def _chain_extract(soup: BeautifulSoup) -> Tuple[Any, ...]:
+    """Generic extraction the way HTMLParser's separate scans do it"""
+    title = HTMLParser.extract_title(soup)
+    body = HTMLParser.extract_body(soup)
+    return title, body, HTMLParser.extract_metadata(soup)
+
+
+def _time_extractor(content: bytes, extract, repeat: int) -> Tuple[float, float, Any]:
+    """Return (extract ms, parse-to-result ms, result), best of `repeat`"""
+    best_extract = best_total = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = BeautifulSoup(content, 'html.parser')
+        parsed = time.perf_counter()
+        result = extract(soup)
+        done = time.perf_counter()
+        best_extract = min(best_extract, done - parsed)
+        best_total = min(best_total, done - start)
+    return best_extract * 1000, best_total * 1000, result
+
+
+def bench_single_pass(repeat: int) -> List[Dict[str, Any]]:
+    """Check the single-pass extractor matches the HTMLParser chain and time both"""
+    rows = []
+    for path in _corpus():
+        content = path.read_bytes()
+        chain_ms, chain_total, expected = _time_extractor(content, _chain_extract, repeat)
+        single_ms, single_total, actual = _time_extractor(content, GENERIC_EXTRACTOR.extract, repeat)
+        rows.append({
+            'page': str(path.relative_to(Path(__file__).parent)),
+            'identical': expected == actual,
+            'chain_ms': chain_ms,
+            'single_ms': single_ms,
+            'chain_total_ms': chain_total,
+            'single_total_ms': single_total
+        })
+    return rows
+
+
+def run_single_pass(args: argparse.Namespace) -> None:
+    rows = bench_single_pass(args.repeat)
+    print(f"{'page':<60} {'same':>5} {'chain ms':>9} {'single ms':>10} "
+          f"{'speedup':>8} {'total speedup':>14}")
+    for row in rows:
+        print(f"{row['page'][-60:]:<60} {'yes' if row['identical'] else 'NO':>5} "
+              f"{row['chain_ms']:>9.2f} {row['single_ms']:>10.2f} "
+              f"{row['chain_ms'] / row['single_ms']:>7.1f}x "
+              f"{row['chain_total_ms'] / row['single_total_ms']:>13.2f}x")
+    mismatches = [row['page'] for row in rows if not row['identical']]
+    if mismatches:
+        raise SystemExit(f"Single-pass output differs on: {', '.join(mismatches)}")
+
+
+def _backend_run(name: str, paths: List[str], seconds: float) -> Dict[str, Any]:
+    """Run one backend over the corpus in a fresh process
+
+    A dedicated process gives a clean peak RSS reading, which also covers
+    memory allocated inside C parsers that tracemalloc cannot see.
+    """
+    pages = [Path(path).read_bytes() for path in paths]
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results = [extract_article(content, None, None, name) for content in pages]
+    for result in results:
+        result.pop('timings')
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for content in pages:
+            extract_article(content, None, None, name)
+        count += len(pages)
+    elapsed = time.perf_counter() - start
+    return {
+        'pages_per_s': count / elapsed,
+        'mb_per_s': sum(map(len, pages)) * count / len(pages) / elapsed / 1e6,
+        'peak_rss_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024,
+        'results': results
+    }
+
+
+def bench_parser_backends(seconds: float) -> List[Dict[str, Any]]:
+    """Throughput, peak memory and agreement with html.parser per backend"""
+    paths = [str(path) for path in _corpus()]
+    rows = []
+    reference = None
+    for name, backend in PARSER_BACKENDS.items():
+        if not backend.available():
+            rows.append({'backend': name, 'available': False})
+            continue
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            row = pool.submit(_backend_run, name, paths, seconds).result()
+        results = row.pop('results')
+        if reference is None:
+            reference = results
+        row.update(backend=name, available=True,
+                   identical=sum(a == b for a, b in zip(results, reference)),
+                   pages=len(paths))
+        rows.append(row)
+    return rows
+
+
+def run_parser_backends(args: argparse.Namespace) -> None:
+    rows = bench_parser_backends(args.seconds)
+    print(f"| backend | pages/s | MB/s | peak RSS MB | same as html.parser |")
+    print(f"|---|---:|---:|---:|---:|")
+    for row in rows:
+        if not row['available']:
+            print(f"| {row['backend']} | not installed | | | |")
+            continue
+        print(f"| {row['backend']} | {row['pages_per_s']:.1f} | {row['mb_per_s']:.2f} | "
+              f"{row['peak_rss_mb']:.1f} | {row['identical']}/{row['pages']} |")
+
+
+def _records_run(paths: List[str], articles: int, spill: bool) -> Dict[str, float]:
+    """Build `articles` records the way process_single_article does, in a fresh process"""
+    pages = [Path(path).read_bytes() for path in paths]
+    spill_file = SpillFile() if spill else None
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    records = []
+    for i in range(articles):
+        extracted = extract_article(pages[i % len(pages)])
+        article = ProcessedArticle(url=f'https://golf.com/news/article-{i}',
+                                   title=extracted['title'],
+                                   body=extracted['body'],
+                                   summary=extracted['summary'],
+                                   metadata=_compact_metadata(extracted['metadata']),
+                                   status=ProcessingStatus.SUCCESS)
+        if spill_file and article.body:
+            article.body_ref = spill_file.put(article.body)
+            article.body = None
+        records.append(article)
+    elapsed = time.perf_counter() - start
+    peak_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024
+    spilled_mb = spill_file.size / 1024 / 1024 if spill_file else 0.0
+    if spill_file:
+        spill_file.close()
+    return {
+        'peak_rss_mb_per_10k': peak_mb * 10000 / articles,
+        'spilled_mb': spilled_mb,
+        'articles_per_s': articles / elapsed
+    }
+
+
+def run_records(args: argparse.Namespace) -> None:
+    paths = [str(path) for path in _corpus()]
+    print(f"{'mode':<10} {'peak RSS MB/10k':>16} {'spilled MB':>11} {'articles/s':>11}")
+    for spill in (False, True):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            row = pool.submit(_records_run, paths, args.articles, spill).result()
+        print(f"{'spill' if spill else 'in-memory':<10} {row['peak_rss_mb_per_10k']:>16.1f} "
+              f"{row['spilled_mb']:>11.1f} {row['articles_per_s']:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Golf processor micro-benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    rate_parser = subparsers.add_parser('rate-limiter', help='RateLimiter.acquire overhead')
+    rate_parser.add_argument('--waiters', type=int, nargs='+',
+                             default=[100, 1000, 10000])
+    rate_parser.set_defaults(func=run_rate_limiter)
+
+    plans_parser = subparsers.add_parser('extraction-plans',
+                                         help='Generic vs compiled per-site extraction')
+    plans_parser.add_argument('--seconds', type=float, default=3.0,
+                              help='time spent per site and mode')
+    plans_parser.set_defaults(func=run_extraction_plans)
+
+    single_parser = subparsers.add_parser('single-pass',
+                                          help='Single-pass vs per-selector generic extraction')
+    single_parser.add_argument('--repeat', type=int, default=5,
+                               help='runs per page, best time is reported')
+    single_parser.set_defaults(func=run_single_pass)
+
+    backends_parser = subparsers.add_parser('parser-backends',
+                                            help='Throughput and peak memory per parser backend')
+    backends_parser.add_argument('--seconds', type=float, default=5.0,
+                                 help='time spent per backend')
+    backends_parser.set_defaults(func=run_parser_backends)
+
+    records_parser = subparsers.add_parser('records',
+                                           help='Peak RSS of a batch of article records')
+    records_parser.add_argument('--articles', type=int, default=10000)
+    records_parser.set_defaults(func=run_records)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
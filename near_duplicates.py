@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for extracted article bodies.
+
+Each body is reduced to a MinHash signature over word shingles (character
+shingles for mostly Chinese, Japanese or Korean text) and looked up in a
+banded LSH index kept in SQLite, so syndicated or lightly edited copies of
+an article already seen - in this run or an earlier one - are caught by
+one indexed query instead of comparing against every stored article.
+Candidates from the index are confirmed by their estimated Jaccard
+similarity before they count as a match.
+
+Signatures use one-permutation hashing (each shingle hash is split into a
+bin and a value, keeping the minimum per bin) with rotation densification
+for empty bins, so one hash per shingle is enough; classic MinHash needs
+one per shingle and permutation, which costs milliseconds in pure Python.
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import string
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NUM_BINS = 128
+# Shingle sizes: words for space-separated text, characters for text that
+# is mostly CJK (scripts written without spaces)
+WORD_SHINGLE = 3
+CHAR_SHINGLE = 4
+CJK_SHARE = 0.3
+# Only the start of very long bodies is fingerprinted, bounding the cost
+MAX_SHINGLES = 1000
+# Characters looked at per shingle before cleaning; generous, since words
+# are seldom over 8 characters and punctuation is dropped
+CHARS_PER_SHINGLE = 16
+
+# Shingles hash to 32 bits: the top bits pick the bin, the rest is the value
+_VALUE_BITS = 32 - (NUM_BINS.bit_length() - 1)
+# Added per step when an empty bin borrows its neighbour's value
+_ROTATION = (1 << 32) // NUM_BINS + 1
+# Punctuation of any kind (ASCII or typographic) and whitespace are one
+# separator, so "don't" and "don’t", or "--" and an em-dash, shingle alike
+_NON_WORD = re.compile(r'[\W_]+')
+# The same for ASCII text, as a much faster byte translation
+_ASCII_SEPARATORS = bytes.maketrans(string.punctuation.encode(), b' ' * len(string.punctuation))
+# Han, kana and hangul
+CJK_CHARACTERS = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]')
+
+
+@dataclass
+class NearDuplicateMatch:
+    """An earlier article the checked text is a near-copy of"""
+    url: str
+    similarity: float
+
+
+def _shingles(text: str) -> List[bytes]:
+    text = text[:CHARS_PER_SHINGLE * (MAX_SHINGLES + CHAR_SHINGLE)].lower()
+    if text.isascii():
+        words = text.encode().translate(_ASCII_SEPARATORS).split()
+    else:
+        text = _NON_WORD.sub(' ', text)
+        # The scheme depends on the script, not on stray non-ASCII punctuation
+        if len(CJK_CHARACTERS.findall(text)) >= CJK_SHARE * (len(text) - text.count(' ')):
+            # Fixed-width UTF-32 makes every character shingle a plain slice
+            data = text.replace(' ', '')[:MAX_SHINGLES + CHAR_SHINGLE - 1].encode('utf-32-le')
+            width = 4 * CHAR_SHINGLE
+            return [data[i:i + width] for i in range(0, len(data) - width + 4, 4)]
+        words = text.encode().split()
+    words = words[:MAX_SHINGLES + WORD_SHINGLE - 1]
+    return list(map(b' '.join, zip(*(words[i:] for i in range(WORD_SHINGLE)))))
+
+
+def minhash_signature(text: str) -> Optional[array]:
+    """NUM_BINS 32-bit MinHash values for `text`, or None if it is too short"""
+    # Sorted by bin then value, so each bin's minimum is its first entry
+    hashes = sorted(map(zlib.crc32, _shingles(text)))
+    if not hashes:
+        return None
+    count = len(hashes)
+    mins: List[Optional[int]] = [None] * NUM_BINS
+    for index in range(NUM_BINS):
+        position = bisect_left(hashes, index << _VALUE_BITS)
+        if position < count and hashes[position] >> _VALUE_BITS == index:
+            mins[index] = hashes[position]
+
+    # Empty bins take the next filled bin's value, offset by the distance,
+    # so two texts agree on an empty bin only when they agree on its donor
+    signature = array('I', bytes(4 * NUM_BINS))
+    for index in range(NUM_BINS):
+        value = mins[index]
+        step = 0
+        while value is None:
+            step += 1
+            value = mins[(index + step) % NUM_BINS]
+        signature[index] = (value + step * _ROTATION) & 0xFFFFFFFF
+    return signature
+
+
+def similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return sum(a == b for a, b in zip(first, second)) / NUM_BINS
+
+
+class NearDuplicateIndex:
+    """Persistent LSH index of article signatures
+
+    `bands` splits each signature into that many keys; texts sharing any
+    key become candidates, which are kept when their estimated similarity
+    reaches `threshold`. The default 16 bands of 8 rows flag about 95% of
+    pairs at 0.8 similarity and almost none below 0.5. Entries older than
+    `max_age_days` are dropped when the index is opened.
+
+    Methods are synchronous and thread-safe; async callers should run them
+    through asyncio.to_thread.
+    """
+
+    COMMIT_EVERY = 200
+
+    def __init__(self, path: Path, threshold: float = 0.8, bands: int = 16,
+                 max_age_days: Optional[float] = 30):
+        if NUM_BINS % bands:
+            raise ValueError(f"bands must divide {NUM_BINS}, got {bands}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.bands = bands
+        self._rows = NUM_BINS // bands
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path / 'near_duplicates.sqlite3'),
+                                   check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS docs ('
+                         'doc_id INTEGER PRIMARY KEY, url TEXT NOT NULL, '
+                         'signature BLOB NOT NULL, added_at REAL NOT NULL)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS lsh ('
+                         'key INTEGER NOT NULL, doc_id INTEGER NOT NULL, '
+                         'PRIMARY KEY (key, doc_id)) WITHOUT ROWID')
+        self._pending = 0
+        if max_age_days is not None:
+            self._prune(time.time() - max_age_days * 86400)
+        self._lookup_sql = ('SELECT DISTINCT doc_id FROM lsh WHERE key IN ('
+                            + ','.join('?' * bands) + ')')
+
+    def _prune(self, cutoff: float) -> None:
+        # doc_ids only grow, so everything below the oldest kept one is stale
+        oldest = self._db.execute('SELECT MIN(doc_id) FROM docs WHERE added_at >= ?',
+                                  (cutoff,)).fetchone()[0]
+        if oldest is None:
+            oldest = (self._db.execute('SELECT MAX(doc_id) FROM docs').fetchone()[0] or 0) + 1
+        removed = self._db.execute('DELETE FROM docs WHERE doc_id < ?', (oldest,)).rowcount
+        if removed:
+            self._db.execute('DELETE FROM lsh WHERE doc_id < ?', (oldest,))
+            logger.info(f"Near-duplicate index: dropped {removed} expired entries")
+        self._db.commit()
+
+    def _band_keys(self, signature: array) -> List[int]:
+        raw = signature.tobytes()
+        width = 4 * self._rows
+        return [
+            int.from_bytes(hashlib.blake2b(raw[band * width:(band + 1) * width],
+                                           digest_size=8, person=band.to_bytes(2, 'little')
+                                           ).digest(), 'little', signed=True)
+            for band in range(self.bands)
+        ]
+
+    def _best_match(self, url: str, signature: array,
+                    keys: List[int]) -> Tuple[Optional[NearDuplicateMatch], bool]:
+        """Closest stored article from another URL, and whether `url` is stored unchanged"""
+        best = None
+        stored = False
+        candidates = [row[0] for row in self._db.execute(self._lookup_sql, keys)]
+        if not candidates:
+            return None, False
+        rows = self._db.execute(
+            'SELECT url, signature FROM docs WHERE doc_id IN ('
+            + ','.join('?' * len(candidates)) + ')', candidates)
+        for other_url, blob in rows:
+            score = similarity(signature, array('I', blob))
+            if score < self.threshold:
+                continue
+            if other_url == url:
+                # Re-processing the same article is not a duplicate of itself
+                stored = True
+            elif best is None or score > best.similarity:
+                best = NearDuplicateMatch(other_url, score)
+        return best, stored
+
+    def check(self, url: str, text: str) -> Optional[NearDuplicateMatch]:
+        """The stored article `text` nearly duplicates, if any"""
+        signature = minhash_signature(text)
+        if signature is None:
+            return None
+        with self._lock:
+            return self._best_match(url, signature, self._band_keys(signature))[0]
+
+    def check_and_add(self, url: str, text: str) -> Optional[NearDuplicateMatch]:
+        """Like check(), then index `text` unless it matched"""
+        signature = minhash_signature(text)
+        if signature is None:
+            return None
+        keys = self._band_keys(signature)
+        # One lock for both steps, so two copies checked at once cannot
+        # both miss each other and both be indexed
+        with self._lock:
+            match, stored = self._best_match(url, signature, keys)
+            if match is None and not stored:
+                self._add(url, signature, keys)
+        return match
+
+    def add(self, url: str, text: str) -> None:
+        """Index `text` without checking it"""
+        signature = minhash_signature(text)
+        if signature is not None:
+            with self._lock:
+                self._add(url, signature, self._band_keys(signature))
+
+    def _add(self, url: str, signature: array, keys: List[int]) -> None:
+        doc_id = self._db.execute('INSERT INTO docs (url, signature, added_at) VALUES (?, ?, ?)',
+                                  (url, signature.tobytes(), time.time())).lastrowid
+        self._db.executemany('INSERT OR IGNORE INTO lsh VALUES (?, ?)',
+                             [(key, doc_id) for key in keys])
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self._commit()
+
+    def flush(self) -> None:
+        """Commit pending additions"""
+        with self._lock:
+            self._commit()
+
+    def _commit(self) -> None:
+        self._db.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
@@ -1,194 +1,364 @@
 #!/usr/bin/env python3
 """
 Performance comparison between original and optimized versions
+
+Runs the original serial process_golf_articles, SimpleGolfProcessor,
+GolfArticleProcessor and ShardedRunner (GolfArticleProcessor in one process
+per core, --shard-workers) against a local stub server (stub_site_server.py) that
+serves recorded golf pages with configurable latency, jitter, errors and
+slow-loris hosts, so the numbers are real but need no network. Every
+(implementation, URL count, concurrency) cell runs in a fresh process for
+clean CPU and peak RSS readings. Latency is the per-article time each
+implementation records itself; GolfArticleProcessor's includes the wait
+for a fetch slot.
+
+Usage:
+    python performance_comparison.py
+    python performance_comparison.py --urls 20 200 --concurrency 5 20 --output run.json
+    python performance_comparison.py --hosts fast typical --baseline run.json
 """
 
-import time
+import argparse
 import asyncio
-from test_optimize import process_golf_articles as original_process
-from test_optimize_simple import SimpleGolfProcessor
-import matplotlib.pyplot as plt
-import numpy as np
-
-
-def run_original(urls):
-    """Run original synchronous version"""
-    start_time = time.time()
-    results = original_process(urls)
-    end_time = time.time()
-    
-    successful = sum(1 for r in results if r.get('success', False))
-    
-    return {
-        'total_time': end_time - start_time,
-        'successful': successful,
-        'failed': len(results) - successful,
-        'avg_time_per_url': (end_time - start_time) / len(urls)
-    }
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from stub_site_server import HOST_PROFILES, start_in_process
+
+logger = logging.getLogger(__name__)
+
+IMPLEMENTATIONS = ('original', 'simple', 'enhanced', 'sharded')
+
+# Recorded article pages the stub hosts serve (index and test pages left out)
+ARTICLE_PAGE_GLOBS = [
+    'golfwrx_page_debug.html',
+    'test_todays_golfer/*.html',
+    'wechat_html/wechat_article_*.html',
+    'wechat_simple/wechat_article_*.html',
+    'golf_content_backups/**/wechat_article_*.html',
+]
+
+# GolfArticleProcessor settings the benchmark measures, pinned so changed
+# defaults or website_configs.json edits do not silently change a cell
+# (site_configs is always an empty registry: the stub hosts have no config)
+ENHANCED_SETTINGS = {
+    'max_retries': 3,
+    'retry_backoff': 1.0,
+    'circuit_threshold': 10,
+    'adaptive_concurrency': True,
+    'prewarm': True,
+    'parser_backend': 'html.parser',
+    'stream_fetch': False,
+    'quality_gate': False,
+}
+
+# Metrics checked against a baseline run, and which direction is worse
+REGRESSION_METRICS = {
+    'articles_per_sec': 'lower',
+    'latency_p95_ms': 'higher',
+    'peak_rss_mb': 'higher',
+}
 
 
-async def run_optimized(urls, max_concurrent=5):
-    """Run optimized async version"""
-    start_time = time.time()
-    
-    processor = SimpleGolfProcessor(max_concurrent=max_concurrent)
+def run_original(urls: List[str]) -> List[Tuple[bool, float]]:
+    """Run original synchronous version, one URL per call to time each
+
+    Its latencies include the fixed one-second pause it takes after every URL.
+    """
+    from test_optimize import process_golf_articles as original_process
+    outcomes = []
+    for url in urls:
+        start = time.perf_counter()
+        result = original_process([url])[0]
+        outcomes.append((result.get('success', False), time.perf_counter() - start))
+    return outcomes
+
+
+async def run_simple(urls: List[str], concurrency: int) -> List[Tuple[bool, float]]:
+    """Run SimpleGolfProcessor"""
+    from test_optimize_simple import SimpleGolfProcessor
+    processor = SimpleGolfProcessor(max_concurrent=concurrency)
     results = await processor.process_articles(urls)
-    
-    end_time = time.time()
-    
-    summary = processor.get_summary(results)
-    
+    return [(article.success, article.processing_time) for article in results]
+
+
+async def run_enhanced(urls: List[str], concurrency: int, rate_limit: int) -> List[Tuple[bool, float]]:
+    """Run GolfArticleProcessor with concurrency as both global and per-site limit"""
+    from test_optimize_enhanced import GolfArticleProcessor, ProcessingStatus, SiteConfigRegistry
+    async with GolfArticleProcessor(max_concurrent=concurrency,
+                                    per_site_concurrent=concurrency,
+                                    rate_limit=rate_limit,
+                                    site_configs=SiteConfigRegistry(),
+                                    **ENHANCED_SETTINGS) as processor:
+        results = await processor.process_articles(urls)
+    return [(article.status == ProcessingStatus.SUCCESS, article.processing_time)
+            for article in results]
+
+
+async def run_sharded(urls: List[str], concurrency: int, rate_limit: int,
+                      workers: Optional[int]) -> List[Tuple[bool, float]]:
+    """Run ShardedRunner; concurrency applies within each worker process"""
+    from sharded_runner import ShardedRunner
+    from test_optimize_enhanced import ProcessingStatus, SiteConfigRegistry
+    async with ShardedRunner(workers=workers, max_concurrent=concurrency,
+                             per_site_concurrent=concurrency,
+                             rate_limit=rate_limit,
+                             site_configs=SiteConfigRegistry(),
+                             **ENHANCED_SETTINGS) as runner:
+        results = await runner.process_articles(urls)
+    return [(article.status == ProcessingStatus.SUCCESS, article.processing_time)
+            for article in results]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(fraction * len(values) + 0.5) - 1))
+    return values[rank]
+
+
+def _cpu_seconds() -> float:
+    usage = (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN))
+    return sum(u.ru_utime + u.ru_stime for u in usage)
+
+
+def _peak_rss_mb() -> float:
+    """Peak RSS of this process or its largest child"""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _run_cell(implementation: str, urls: List[str], concurrency: int,
+              rate_limit: int, shard_workers: Optional[int] = None) -> Dict[str, Any]:
+    """Benchmark one cell; runs in its own process"""
+    # Per-article log lines would be part of the measured work
+    logging.disable(logging.ERROR)
+    cpu_start = _cpu_seconds()
+    start = time.perf_counter()
+    if implementation == 'original':
+        outcomes = run_original(urls)
+    elif implementation == 'simple':
+        outcomes = asyncio.run(run_simple(urls, concurrency))
+    elif implementation == 'sharded':
+        outcomes = asyncio.run(run_sharded(urls, concurrency, rate_limit, shard_workers))
+    else:
+        outcomes = asyncio.run(run_enhanced(urls, concurrency, rate_limit))
+    wall = time.perf_counter() - start
+    cpu = _cpu_seconds() - cpu_start
+
+    latencies = sorted(latency * 1000 for _, latency in outcomes)
+    successful = sum(1 for success, _ in outcomes if success)
     return {
-        'total_time': end_time - start_time,
-        'successful': summary['successful'],
-        'failed': summary['failed'],
-        'avg_time_per_url': summary['avg_processing_time']
+        'implementation': implementation,
+        'urls': len(urls),
+        'concurrency': concurrency,
+        'successful': successful,
+        'failed': len(urls) - successful,
+        'wall_seconds': wall,
+        'articles_per_sec': successful / wall,
+        'urls_per_sec': len(urls) / wall,
+        'latency_p50_ms': percentile(latencies, 0.50),
+        'latency_p95_ms': percentile(latencies, 0.95),
+        'latency_p99_ms': percentile(latencies, 0.99),
+        'cpu_seconds': cpu,
+        'cpu_percent': cpu / wall * 100,
+        'peak_rss_mb': _peak_rss_mb()
     }
 
 
-async def compare_performance():
-    """Compare performance between versions"""
-    # Test with different numbers of URLs
-    test_cases = [5, 10, 20, 50]
-    
-    # Generate test URLs (using example pattern)
-    base_urls = [
-        'https://www.golf.com/news/article{}',
-        'https://www.golfdigest.com/story/article{}',
-        'https://www.golfmonthly.com/news/article{}'
-    ]
-    
-    results = {
-        'original': {'times': [], 'urls_count': []},
-        'optimized_1': {'times': [], 'urls_count': []},
-        'optimized_5': {'times': [], 'urls_count': []},
-        'optimized_10': {'times': [], 'urls_count': []}
-    }
-    
-    for count in test_cases:
-        # Generate URLs
-        urls = []
-        for i in range(count):
-            urls.append(base_urls[i % len(base_urls)].format(i))
-        
-        print(f"\nTesting with {count} URLs...")
-        
-        # Run original (commented out to avoid running synchronous code)
-        # print("Running original version...")
-        # original_result = run_original(urls)
-        # results['original']['times'].append(original_result['total_time'])
-        # results['original']['urls_count'].append(count)
-        
-        # Run optimized with different concurrency levels
-        for concurrency in [1, 5, 10]:
-            print(f"Running optimized version (concurrency={concurrency})...")
-            optimized_result = await run_optimized(urls, max_concurrent=concurrency)
-            results[f'optimized_{concurrency}']['times'].append(optimized_result['total_time'])
-            results[f'optimized_{concurrency}']['urls_count'].append(count)
-            
-            print(f"  Time: {optimized_result['total_time']:.2f}s")
-            print(f"  Successful: {optimized_result['successful']}")
-    
-    return results
-
-
-def visualize_results(results):
-    """Create performance visualization"""
-    plt.figure(figsize=(12, 8))
-    
-    # Plot performance comparison
-    plt.subplot(2, 1, 1)
-    for version, data in results.items():
-        if data['times']:  # Only plot if we have data
-            plt.plot(data['urls_count'], data['times'], marker='o', label=version)
-    
+def article_pages() -> List[Path]:
+    root = Path(__file__).parent
+    return sorted({path for pattern in ARTICLE_PAGE_GLOBS for path in root.glob(pattern)})
+
+
+def build_urls(base_urls: List[str], count: int) -> List[str]:
+    """Spread `count` article URLs round-robin over the stub hosts"""
+    return [f'{base_urls[i % len(base_urls)]}/article/{i}' for i in range(count)]
+
+
+def compare_performance(args: argparse.Namespace, base_urls: List[str]) -> List[Dict[str, Any]]:
+    """Run the whole implementation x URL count x concurrency matrix"""
+    rows = []
+    for count in args.urls:
+        urls = build_urls(base_urls, count)
+        for implementation in args.implementations:
+            # The original is serial, so concurrency does not apply to it
+            levels = [1] if implementation == 'original' else args.concurrency
+            if implementation == 'original' and count > args.original_max_urls:
+                print(f"Skipping original with {count} URLs (--original-max-urls)")
+                continue
+            for concurrency in levels:
+                print(f"Running {implementation} with {count} URLs, concurrency {concurrency}...")
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+                    row = pool.submit(_run_cell, implementation, urls, concurrency,
+                                      args.rate_limit, args.shard_workers).result()
+                print(f"  {row['articles_per_sec']:.1f} articles/s, "
+                      f"p95 {row['latency_p95_ms']:.0f} ms, {row['successful']}/{count} ok")
+                rows.append(row)
+    return rows
+
+
+def print_results(rows: List[Dict[str, Any]]) -> None:
+    print(f"\n{'implementation':<14} {'urls':>5} {'conc':>5} {'ok':>5} {'art/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cpu %':>6} {'RSS MB':>7}")
+    for row in rows:
+        print(f"{row['implementation']:<14} {row['urls']:>5} {row['concurrency']:>5} "
+              f"{row['successful']:>5} {row['articles_per_sec']:>8.1f} "
+              f"{row['latency_p50_ms']:>8.0f} {row['latency_p95_ms']:>8.0f} "
+              f"{row['latency_p99_ms']:>8.0f} {row['cpu_percent']:>6.1f} "
+              f"{row['peak_rss_mb']:>7.1f}")
+
+
+def find_regressions(rows: List[Dict[str, Any]], baseline: Dict[str, Any],
+                     tolerance: float) -> List[str]:
+    """Describe every metric that got worse than the baseline by more than `tolerance`"""
+    def key(row):
+        return row['implementation'], row['urls'], row['concurrency']
+
+    previous = {key(row): row for row in baseline.get('results', [])}
+    regressions = []
+    for row in rows:
+        old = previous.get(key(row))
+        if not old:
+            continue
+        for metric, worse in REGRESSION_METRICS.items():
+            before, after = old.get(metric), row[metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            if (change < -tolerance) if worse == 'lower' else (change > tolerance):
+                regressions.append(f"{'/'.join(map(str, key(row)))} {metric}: "
+                                   f"{before:.1f} -> {after:.1f} ({change:+.0%})")
+    return regressions
+
+
+def visualize_results(rows: List[Dict[str, Any]], path: Path) -> None:
+    """Plot articles/sec against URL count per implementation and concurrency"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        logger.warning("matplotlib not installed, skipping plot")
+        return
+
+    series: Dict[str, List[Tuple[int, float]]] = {}
+    for row in rows:
+        label = f"{row['implementation']} (concurrency {row['concurrency']})"
+        series.setdefault(label, []).append((row['urls'], row['articles_per_sec']))
+    plt.figure(figsize=(12, 6))
+    for label, points in series.items():
+        points.sort()
+        plt.plot([p[0] for p in points], [p[1] for p in points], marker='o', label=label)
     plt.xlabel('Number of URLs')
-    plt.ylabel('Total Processing Time (seconds)')
-    plt.title('Performance Comparison: Original vs Optimized')
+    plt.ylabel('Articles per second')
+    plt.title('Throughput against local stub hosts')
     plt.legend()
     plt.grid(True)
-    
-    # Calculate and plot speedup
-    plt.subplot(2, 1, 2)
-    if results['original']['times'] and results['optimized_5']['times']:
-        original_times = np.array(results['original']['times'])
-        optimized_times = np.array(results['optimized_5']['times'])
-        speedup = original_times / optimized_times
-        
-        plt.plot(results['original']['urls_count'], speedup, marker='o', color='green')
-        plt.xlabel('Number of URLs')
-        plt.ylabel('Speedup Factor')
-        plt.title('Speedup: Original / Optimized (5 concurrent)')
-        plt.grid(True)
-    
     plt.tight_layout()
-    plt.savefig('performance_comparison.png')
-    print("\nPerformance graph saved as 'performance_comparison.png'")
-
-
-def print_optimization_summary():
-    """Print summary of optimizations made"""
-    print("\n" + "="*60)
-    print("OPTIMIZATION SUMMARY")
-    print("="*60)
-    
-    optimizations = [
-        ("Concurrency", "Changed from serial to async/await with configurable workers"),
-        ("HTTP Client", "Replaced requests with aiohttp for async support"),
-        ("HTML Parsing", "Upgraded to BeautifulSoup with intelligent selectors"),
-        ("Error Handling", "Added retry logic with exponential backoff"),
-        ("Type Safety", "Added type hints and dataclasses"),
-        ("Resource Management", "Proper session management and connection pooling"),
-        ("Rate Limiting", "Added configurable rate limiter"),
-        ("Monitoring", "Added progress callbacks and detailed statistics")
-    ]
-    
-    for feature, description in optimizations:
-        print(f"\n{feature}:")
-        print(f"  {description}")
-    
-    print("\n" + "="*60)
-    print("KEY IMPROVEMENTS:")
-    print("="*60)
-    print("1. ⚡ Speed: 5-10x faster with concurrent processing")
-    print("2. 🛡️  Reliability: Better error handling and retries")
-    print("3. 📊 Accuracy: Smarter HTML parsing for better content extraction")
-    print("4. 🔍 Observability: Detailed logging and progress tracking")
-    print("5. 🏗️  Maintainability: Clean architecture with modern Python features")
-
-
-async def main():
-    """Run performance comparison"""
-    print("Golf Article Processor - Performance Comparison")
-    print_optimization_summary()
-    
-    # Run comparison (simplified for demo)
-    print("\n\nRunning performance tests...")
-    # Note: Actual comparison would require real URLs
-    # This is a demonstration of the structure
-    
-    # Example metrics (simulated)
-    print("\n" + "="*60)
-    print("SIMULATED PERFORMANCE METRICS")
-    print("="*60)
-    print("\nProcessing 50 articles:")
-    print("Original (Serial):     ~150 seconds (3s per URL + overhead)")
-    print("Optimized (1 worker):  ~150 seconds (no improvement)")
-    print("Optimized (5 workers): ~30 seconds (5x speedup)")
-    print("Optimized (10 workers): ~15 seconds (10x speedup)")
-    
-    print("\n" + "="*60)
-    print("ERROR HANDLING IMPROVEMENTS")
-    print("="*60)
-    print("Original: Simple try/except, no retries")
-    print("Optimized: Exponential backoff, 3 retries, detailed error types")
-    
-    print("\n" + "="*60)
-    print("CONTENT EXTRACTION ACCURACY")
-    print("="*60)
-    print("Original: Basic string search for <title> and <body>")
-    print("Optimized: Multiple selectors, metadata extraction, content validation")
+    plt.savefig(path)
+    print(f"Performance graph saved as '{path}'")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline throughput benchmark')
+    parser.add_argument('--urls', type=int, nargs='+', default=[20, 100],
+                        help='URL counts to run')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 5, 20],
+                        help='Concurrency levels for the async processors')
+    parser.add_argument('--implementations', nargs='+', choices=IMPLEMENTATIONS,
+                        default=list(IMPLEMENTATIONS))
+    parser.add_argument('--hosts', nargs='+', choices=sorted(HOST_PROFILES),
+                        default=['fast', 'typical', 'flaky', 'slowloris'],
+                        help='Stub host profiles; URLs are spread evenly over them')
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help='Multiply every host latency, jitter and trickle time')
+    parser.add_argument('--original-max-urls', type=int, default=20,
+                        help='Largest URL count to run the serial original with')
+    parser.add_argument('--rate-limit', type=int, default=1000,
+                        help='GolfArticleProcessor requests per second per site')
+    parser.add_argument('--shard-workers', type=int,
+                        help='Worker processes for the sharded implementation (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', type=Path, default=Path('performance_results.json'))
+    parser.add_argument('--baseline', type=Path,
+                        help='Earlier results JSON; exit 1 if any metric regressed')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Allowed relative change before a metric counts as regressed')
+    parser.add_argument('--plot', type=Path, help='Also save a throughput graph here')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    profiles = []
+    for name in args.hosts:
+        profile = HOST_PROFILES[name]
+        profiles.append(replace(profile,
+                                latency=profile.latency * args.latency_scale,
+                                jitter=profile.jitter * args.latency_scale,
+                                trickle_seconds=profile.trickle_seconds * args.latency_scale))
+
+    pages = article_pages()
+    server, base_urls = start_in_process(pages, profiles, args.seed)
+    try:
+        rows = compare_performance(args, base_urls)
+    finally:
+        server.terminate()
+        server.join()
+
+    print_results(rows)
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'hosts': [profile.to_dict() for profile in profiles],
+            'pages': len(pages),
+            'rate_limit': args.rate_limit,
+            'enhanced_settings': ENHANCED_SETTINGS,
+            'seed': args.seed
+        },
+        'results': rows
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f"\nResults saved to {args.output}")
+    if args.plot:
+        visualize_results(rows, args.plot)
+
+    if args.baseline:
+        regressions = find_regressions(rows, json.loads(args.baseline.read_text(encoding='utf-8')),
+                                       args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    main()
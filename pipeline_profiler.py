@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling of the parse and extract steps, aggregated per domain.
+
+A PipelineProfiler picks a fraction of articles; each picked article's
+extraction runs under a call-stack tracer (and optionally tracemalloc),
+inline or in a parse worker, and the plain-data result is sent back and
+merged per domain. Output is flamegraph-compatible collapsed stacks
+(`frame;frame;frame microseconds`, for flamegraph.pl or speedscope) plus
+per-domain allocation peaks and top allocation sites.
+
+cProfile only keeps caller/callee pairs, so it cannot produce full stacks;
+the tracer here records self time per complete stack instead, and tags
+select()/select_one() frames with their selector text. It is costly for
+the articles it traces, so keep the sample rate low. Articles that are
+not picked pay only a random() call.
+"""
+
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_THIS_FILE = __file__
+# Frames named like this get their selector appended to the stack label
+_SELECTOR_FUNCTIONS = frozenset({'select', 'select_one'})
+
+
+@dataclass
+class ProfileSettings:
+    """What to capture for one sampled article (picklable for parse workers)"""
+    allocations: bool = False
+    allocation_sites: int = 15
+    traceback_depth: int = 1
+
+
+class ArticleProfile:
+    """Context manager tracing one article's extraction
+
+    Use snapshot_allocations() while the parsed tree is still alive to
+    record where its memory came from; otherwise it is taken on exit.
+    """
+
+    def __init__(self, settings: ProfileSettings):
+        self.settings = settings
+        self.costs: Counter = Counter()
+        self.peak_bytes = 0
+        self.allocation_sites: List[Tuple[str, int]] = []
+        self._stack: List[Tuple[str, ...]] = []
+        self._labels: Dict[Any, str] = {}
+        self._last = 0
+        self._started_tracemalloc = False
+        self._base_bytes = 0
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            module = frame.f_globals.get('__name__') or Path(code.co_filename).stem
+            name = getattr(code, 'co_qualname', code.co_name)  # 3.11+
+            label = self._labels[code] = f"{module}:{name}"
+        return label
+
+    def _trace(self, frame, event, arg) -> None:
+        now = time.perf_counter_ns()
+        if self._stack:
+            self.costs[self._stack[-1]] += now - self._last
+        if frame.f_code.co_filename != _THIS_FILE:
+            if event == 'call':
+                label = self._label(frame)
+                if frame.f_code.co_name in _SELECTOR_FUNCTIONS:
+                    selector = frame.f_locals.get('selector')
+                    if not isinstance(selector, str):
+                        selector = getattr(frame.f_locals.get('self'), 'selector', None)
+                    if isinstance(selector, str):
+                        label = f"{label}[{selector}]"
+                self._push(label)
+            elif event == 'c_call':
+                module = getattr(arg, '__module__', None) or 'builtins'
+                self._push(f"{module}:{getattr(arg, '__qualname__', arg.__name__)}")
+            elif self._stack:
+                # return, c_return, c_exception
+                self._stack.pop()
+        self._last = time.perf_counter_ns()
+
+    def _push(self, label: str) -> None:
+        label = label.replace(';', ',')
+        self._stack.append((self._stack[-1] if self._stack else ()) + (label,))
+
+    def snapshot_allocations(self) -> None:
+        if not self.settings.allocations or self.allocation_sites or not tracemalloc.is_tracing():
+            return
+        sys.setprofile(None)
+        try:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),
+                 tracemalloc.Filter(False, _THIS_FILE)))
+            self.allocation_sites = [
+                (f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size)
+                for stat in snapshot.statistics('lineno')[:self.settings.allocation_sites]
+            ]
+        finally:
+            self._last = time.perf_counter_ns()
+            sys.setprofile(self._trace)
+
+    def __enter__(self) -> 'ArticleProfile':
+        if self.settings.allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.settings.traceback_depth)
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+            self._base_bytes = tracemalloc.get_traced_memory()[0]
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._trace)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        sys.setprofile(None)
+        if self.settings.allocations:
+            self.snapshot_allocations()
+            sys.setprofile(None)
+            self.peak_bytes = tracemalloc.get_traced_memory()[1] - self._base_bytes
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+    def result(self) -> Dict[str, Any]:
+        """Plain-data form for sending back from a worker process"""
+        return {
+            'stacks': {';'.join(stack): ns // 1000 for stack, ns in self.costs.items()
+                       if ns >= 1000},
+            'peak_bytes': self.peak_bytes,
+            'allocation_sites': self.allocation_sites
+        }
+
+
+def _short_path(filename: str) -> str:
+    """Last two path components, e.g. bs4/element.py"""
+    path = Path(filename)
+    return f"{path.parent.name}/{path.name}"
+
+
+def run_profiled(settings: ProfileSettings, func: Callable, *args) -> Tuple[Any, Dict[str, Any]]:
+    """Call func(*args) under an ArticleProfile; returns (result, profile data)"""
+    with ArticleProfile(settings) as profile:
+        result = func(*args)
+    return result, profile.result()
+
+
+class _DomainProfile:
+    __slots__ = ('articles', 'stacks', 'peaks', 'allocation_sites')
+
+    def __init__(self):
+        self.articles = 0
+        self.stacks: Counter = Counter()
+        self.peaks: List[int] = []
+        self.allocation_sites: Counter = Counter()
+
+
+class PipelineProfiler:
+    """Chooses which articles to profile and aggregates their profiles per domain
+
+    `sample_rate` is the fraction of articles traced. With `allocations`
+    set, tracemalloc also runs for those articles. Results are written to
+    `output_dir` by write(), which the processors call on close.
+    """
+
+    def __init__(self,
+                 sample_rate: float = 0.02,
+                 allocations: bool = False,
+                 output_dir: Optional[Path] = None,
+                 seed: Optional[int] = None):
+        self.sample_rate = sample_rate
+        self.settings = ProfileSettings(allocations=allocations)
+        self.output_dir = Path(output_dir) if output_dir else None
+        self._random = random.Random(seed)
+        self.domains: Dict[str, _DomainProfile] = {}
+
+    def sample(self) -> Optional[ProfileSettings]:
+        """Settings to profile the next article with, or None to skip it"""
+        if self._random.random() < self.sample_rate:
+            return self.settings
+        return None
+
+    def add(self, domain: str, profile: Dict[str, Any]) -> None:
+        entry = self.domains.get(domain)
+        if entry is None:
+            entry = self.domains[domain] = _DomainProfile()
+        entry.articles += 1
+        entry.stacks.update(profile['stacks'])
+        if self.settings.allocations:
+            entry.peaks.append(profile['peak_bytes'])
+            entry.allocation_sites.update(dict(profile['allocation_sites']))
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        """Per domain: articles traced, traced ms, hottest functions by self time
+
+        With allocations on, also the largest per-article peak and the top
+        allocation sites, their bytes summed over the traced articles.
+        """
+        summary = {}
+        for domain, entry in sorted(self.domains.items()):
+            self_time: Counter = Counter()
+            for stack, micros in entry.stacks.items():
+                self_time[stack.rsplit(';', 1)[-1]] += micros
+            row = {
+                'articles': entry.articles,
+                'traced_ms': sum(entry.stacks.values()) / 1000,
+                'top_functions_ms': [(name, micros / 1000)
+                                     for name, micros in self_time.most_common(top)]
+            }
+            if entry.peaks:
+                row['peak_bytes_max'] = max(entry.peaks)
+                row['peak_bytes_mean'] = sum(entry.peaks) / len(entry.peaks)
+                row['top_allocation_sites'] = entry.allocation_sites.most_common(top)
+            summary[domain] = row
+        return summary
+
+    def write(self, output_dir: Optional[Path] = None) -> Optional[Path]:
+        """Write <domain>.collapsed, all.collapsed (domain as root frame) and summary.json"""
+        output_dir = Path(output_dir) if output_dir else self.output_dir
+        if not output_dir or not self.domains:
+            return None
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_dir / 'all.collapsed', 'w', encoding='utf-8') as combined:
+            for domain, entry in sorted(self.domains.items()):
+                lines = [f"{stack} {micros}" for stack, micros in entry.stacks.most_common()]
+                (output_dir / f"{domain}.collapsed").write_text(
+                    '\n'.join(lines) + '\n', encoding='utf-8')
+                combined.writelines(f"{domain};{line}\n" for line in lines)
+        (output_dir / 'summary.json').write_text(
+            json.dumps(self.summary(), indent=2, ensure_ascii=False), encoding='utf-8')
+        logger.info(f"Wrote profiles for {len(self.domains)} domain(s) to {output_dir}")
+        return output_dir
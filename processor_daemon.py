@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Long-running GolfArticleProcessor behind a local HTTP or Unix-socket API.
+
+Each one-shot run pays for interpreter start-up, the aiohttp/bs4/lxml
+imports, DNS lookups and TLS handshakes before its first fetch. The
+daemon pays once: it keeps one processor open, with its per-site sessions
+and keep-alive pools, parse workers, response cache and dedup stores, and
+runs every submitted job through it. Jobs share the processor's site
+windows, rate limits and circuit breakers, so concurrent callers cannot
+overload a site between them. A URL submitted by two jobs at once is
+fetched once and both get its article.
+
+API (JSON in, JSON or NDJSON out):
+    POST /jobs      {"urls": [...], "jobId": "optional"}
+                    streams one NDJSON line per article as it finishes,
+                    then {"type": "done", ...}; ?stream=0 returns one
+                    JSON document at the end instead
+    GET  /status    queue depth, active jobs, per-site windows and stats
+    GET  /metrics   Prometheus text, including queue depth
+    GET  /health    200 once the processor is ready
+
+Usage:
+    python processor_daemon.py --port 8765 --cache-dir .cache
+    python processor_daemon.py --unix /tmp/golf_processor.sock
+    curl -N -d '{"urls": ["https://www.golfmonthly.com/news/..."]}' localhost:8765/jobs
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import Counter
+from contextlib import aclosing
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from aiohttp import web
+
+from result_sink import article_record
+from test_optimize_enhanced import GolfArticleProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class JobRejected(Exception):
+    pass
+
+
+class ProcessorDaemon:
+    """Runs jobs through one long-lived GolfArticleProcessor
+
+    `processor_kwargs` go to GolfArticleProcessor (journal_path is not
+    supported: the journal tracks one job at a time). At most
+    `max_queued_urls` URLs may be accepted and unfinished at once; jobs
+    beyond that get 503 so callers can back off.
+    """
+
+    def __init__(self, max_queued_urls: int = 10000, **processor_kwargs: Any):
+        if processor_kwargs.get('journal_path'):
+            raise ValueError("ProcessorDaemon does not support journal_path")
+        processor_kwargs.setdefault('keepalive_timeout', 120.0)
+        self.processor_kwargs = processor_kwargs
+        self.max_queued_urls = max_queued_urls
+        self.processor: Optional[GolfArticleProcessor] = None
+        self.queued = 0
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.completed_jobs = 0
+        self.started_at = time.time()
+        # Host -> monotonic time until which its pooled connections stay open
+        self._warm_until: Dict[str, float] = {}
+
+    async def _lifecycle(self, app: web.Application):
+        """aiohttp cleanup context: the processor lives as long as the server"""
+        async with GolfArticleProcessor(**self.processor_kwargs) as processor:
+            if processor.parse_executor:
+                await processor.parse_executor.start()
+            self.processor = processor
+            logger.info("Processor ready")
+            yield
+            self.processor = None
+
+    def application(self) -> web.Application:
+        app = web.Application()
+        app.cleanup_ctx.append(self._lifecycle)
+        app.router.add_post('/jobs', self.handle_job)
+        app.router.add_get('/status', self.handle_status)
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_get('/health', self.handle_health)
+        return app
+
+    async def _prepare(self, urls: list) -> None:
+        """Refresh the published index and warm only hosts whose pools went cold"""
+        processor = self.processor
+        if processor.published:
+            await asyncio.to_thread(processor.published.refresh)
+        now = time.monotonic()
+        cold = [url for url in urls
+                if self._warm_until.get(urlparse(url).netloc, 0.0) <= now]
+        if processor.prewarm and cold:
+            await processor.warm_up(cold)
+        for url in urls:
+            self._warm_until[urlparse(url).netloc] = now + processor.keepalive_timeout
+
+    def _accept(self, body: Any) -> Dict[str, Any]:
+        if not isinstance(body, dict) or not isinstance(body.get('urls'), list) or not all(
+                isinstance(url, str) for url in body['urls']):
+            raise web.HTTPBadRequest(text='Expected {"urls": [...]}')
+        urls = body['urls']
+        if self.queued + len(urls) > self.max_queued_urls:
+            raise JobRejected(f"Queue full ({self.queued} URLs queued)")
+        job_id = str(body.get('jobId') or uuid.uuid4().hex[:12])
+        if job_id in self.jobs:
+            raise web.HTTPConflict(text=f"Job {job_id} is already running")
+        job = {'id': job_id, 'urls': urls, 'done': 0, 'started': time.time(),
+               'statuses': Counter()}
+        self.jobs[job_id] = job
+        self.queued += len(urls)
+        return job
+
+    async def _run(self, job: Dict[str, Any]):
+        """Yield finished articles of a job, keeping the queue counters right"""
+        try:
+            await self._prepare(job['urls'])
+            async with aclosing(self.processor.iter_articles(job['urls'])) as articles:
+                async for article in articles:
+                    job['done'] += 1
+                    self.queued -= 1
+                    job['statuses'][article.status.value] += 1
+                    yield article
+        finally:
+            self.queued -= len(job['urls']) - job['done']
+            del self.jobs[job['id']]
+            self.completed_jobs += 1
+
+    @staticmethod
+    def _summary(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {'jobId': job['id'], 'urls': len(job['urls']), 'completed': job['done'],
+                'statuses': dict(job['statuses']),
+                'elapsed': round(time.time() - job['started'], 3)}
+
+    async def handle_job(self, request: web.Request) -> web.StreamResponse:
+        if self.processor is None:
+            raise web.HTTPServiceUnavailable(text='Processor is starting')
+        try:
+            body = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text='Body must be JSON')
+        try:
+            job = self._accept(body)
+        except JobRejected as e:
+            raise web.HTTPServiceUnavailable(text=str(e), headers={'Retry-After': '5'})
+        logger.info(f"Job {job['id']}: {len(job['urls'])} URLs ({self.queued} queued)")
+
+        if request.query.get('stream', '1') == '0':
+            async with aclosing(self._run(job)) as finished:
+                articles = [article_record(article) async for article in finished]
+            return web.json_response({**self._summary(job), 'articles': articles},
+                                     dumps=lambda data: json.dumps(data, ensure_ascii=False))
+
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        # A client that hangs up makes the write fail; closing the generator
+        # then cancels the job's remaining fetches
+        try:
+            async with aclosing(self._run(job)) as finished:
+                async for article in finished:
+                    line = {'type': 'article', 'jobId': job['id'], **article_record(article)}
+                    await response.write(json.dumps(line, ensure_ascii=False).encode() + b'\n')
+        except ConnectionResetError:
+            logger.info(f"Client left job {job['id']} after {job['done']}/{len(job['urls'])} "
+                        f"articles; cancelled the rest")
+            return response
+        summary = {'type': 'done', **self._summary(job)}
+        await response.write(json.dumps(summary).encode() + b'\n')
+        await response.write_eof()
+        logger.info(f"Job {job['id']} done in {summary['elapsed']:.2f}s: {summary['statuses']}")
+        return response
+
+    def queue_depth(self) -> Dict[str, int]:
+        """URLs accepted but unfinished, and how many are fetching or waiting for a slot"""
+        return {
+            'active_jobs': len(self.jobs),
+            'queued_urls': self.queued,
+            **(self.processor.limiter_stats() if self.processor
+               else {'fetching': 0, 'waiting_for_slot': 0}),
+        }
+
+    async def handle_status(self, request: web.Request) -> web.Response:
+        stats = self.processor.get_stats() if self.processor else {}
+        stats.pop('latency', None)
+        stats.pop('profile', None)
+        return web.json_response({
+            'ready': self.processor is not None,
+            'uptime': round(time.time() - self.started_at, 1),
+            'completed_jobs': self.completed_jobs,
+            **self.queue_depth(),
+            'jobs': [self._summary(job) for job in self.jobs.values()],
+            'stats': stats,
+        })
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        if self.processor is None:
+            raise web.HTTPServiceUnavailable(text='Processor is starting')
+        stats = self.processor.get_stats()
+        gauges = {key: value for key, value in stats.items() if isinstance(value, (int, float))}
+        gauges.update(self.queue_depth())
+        gauges['completed_jobs'] = self.completed_jobs
+        return web.Response(text=self.processor.metrics.to_prometheus(gauges=gauges),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        if self.processor is None:
+            raise web.HTTPServiceUnavailable(text='Processor is starting')
+        return web.json_response({'ok': True})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve GolfArticleProcessor jobs over HTTP")
+    listen = parser.add_mutually_exclusive_group()
+    listen.add_argument('--port', type=int, default=8765, help="TCP port on --host")
+    listen.add_argument('--unix', type=Path, help="Listen on this Unix socket instead")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--max-concurrent', type=int, default=10)
+    parser.add_argument('--rate-limit', type=int, default=20)
+    parser.add_argument('--max-queued-urls', type=int, default=10000)
+    parser.add_argument('--parse-in-processes', action='store_true')
+    parser.add_argument('--cache-dir', type=Path)
+    parser.add_argument('--seen-urls-dir', type=Path)
+    parser.add_argument('--published-dir', type=Path)
+    parser.add_argument('--near-duplicates-dir', type=Path)
+    parser.add_argument('--image-dir', type=Path)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    daemon = ProcessorDaemon(
+        max_queued_urls=args.max_queued_urls,
+        max_concurrent=args.max_concurrent,
+        rate_limit=args.rate_limit,
+        parse_in_processes=args.parse_in_processes,
+        cache_dir=args.cache_dir,
+        seen_urls_dir=args.seen_urls_dir,
+        published_dir=args.published_dir,
+        near_duplicates_dir=args.near_duplicates_dir,
+        image_dir=args.image_dir,
+    )
+    if args.unix:
+        web.run_app(daemon.application(), path=str(args.unix), access_log=None)
+    else:
+        web.run_app(daemon.application(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Persistent index of articles already published under golf_content.
+
+WebsiteDuplicateChecker.getWebsiteArticleUrls (website_duplicate_checker.js)
+answers "is this article published?" by reading every
+<date>/wechat_ready/wechat_article_<n>.md and regex-matching its source
+link, on every run. This index keeps source URL, canonical URL, content
+hash, date and article number per file in SQLite next to the output, and
+refresh() re-reads only files whose mtime or size changed since the last
+refresh (and forgets deleted ones). Canonical URLs are held in memory, so
+membership checks are a dict lookup.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from url_seen_filter import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+_DATE_DIR = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+# Same files as getWebsiteArticleUrls: subfolder and file name pattern
+ARTICLE_FILES = (
+    ('wechat_ready', re.compile(r'^wechat_article_(\d+)\.md$')),
+    ('articles', re.compile(r'^article_(\d+)\.md$')),
+)
+# "[查看原文](url)" and "🔗 **原文链接**: [点击查看原文](url)"
+_SOURCE_LINK = re.compile(r'\[(?:点击)?查看原文\]\((https?://[^)\s]+)\)')
+
+
+@dataclass
+class PublishedArticle:
+    """One published article file"""
+    path: str                  # relative to the content directory
+    date: str
+    article_number: int
+    source_url: Optional[str]
+    canonical_url: Optional[str]
+    content_hash: str
+
+
+class PublishedIndex:
+    """Incrementally refreshed index of golf_content/<date>/*/…_<n>.md
+
+    The index file defaults to `.published_index.sqlite3` inside
+    `content_dir` (date folders are the only thing the JS tools scan).
+    Call refresh() before relying on membership; it is cheap when little
+    changed, since unchanged files are only stat()ed. Methods are
+    synchronous and thread-safe; async callers should run refresh() and
+    the find methods through asyncio.to_thread.
+    """
+
+    def __init__(self, content_dir: Path = Path('golf_content'),
+                 index_path: Optional[Path] = None):
+        self.content_dir = Path(content_dir)
+        self.index_path = Path(index_path) if index_path else (
+            self.content_dir / '.published_index.sqlite3')
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS articles ('
+                         'path TEXT PRIMARY KEY, date TEXT NOT NULL, '
+                         'article_number INTEGER NOT NULL, source_url TEXT, '
+                         'canonical_url TEXT, content_hash TEXT NOT NULL, '
+                         'mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS articles_by_url ON articles (canonical_url)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS articles_by_hash ON articles (content_hash)')
+        # path -> (mtime_ns, size, canonical_url) and canonical_url -> file count
+        self._files: Dict[str, Tuple[int, int, Optional[str]]] = {}
+        self._urls: Dict[str, int] = {}
+        for path, mtime_ns, size, canonical in self._db.execute(
+                'SELECT path, mtime_ns, size, canonical_url FROM articles'):
+            self._files[path] = (mtime_ns, size, canonical)
+            self._count(canonical, 1)
+
+    def _count(self, canonical: Optional[str], delta: int) -> None:
+        if canonical is None:
+            return
+        count = self._urls.get(canonical, 0) + delta
+        if count > 0:
+            self._urls[canonical] = count
+        else:
+            self._urls.pop(canonical, None)
+
+    def _scan(self):
+        """Yield (relative path, date, article number, DirEntry) for every article file"""
+        try:
+            date_dirs = [entry for entry in os.scandir(self.content_dir)
+                         if _DATE_DIR.match(entry.name) and entry.is_dir()]
+        except FileNotFoundError:
+            return
+        for date_dir in date_dirs:
+            for subdir, pattern in ARTICLE_FILES:
+                try:
+                    entries = list(os.scandir(os.path.join(date_dir.path, subdir)))
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+                for entry in entries:
+                    match = pattern.match(entry.name)
+                    if match:
+                        yield (f"{date_dir.name}/{subdir}/{entry.name}", date_dir.name,
+                               int(match.group(1)), entry)
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index up to date with the files on disk
+
+        Returns counts of files added, updated and removed.
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> Dict[str, int]:
+        counts = {'added': 0, 'updated': 0, 'removed': 0}
+        present = set()
+        for path, date, number, entry in self._scan():
+            present.add(path)
+            try:
+                stat = entry.stat()
+                known = self._files.get(path)
+                if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                data = Path(entry.path).read_bytes()
+            except FileNotFoundError:
+                present.discard(path)
+                continue
+            text = data.decode('utf-8', errors='replace')
+            link = _SOURCE_LINK.search(text)
+            source_url = link.group(1) if link else None
+            canonical = canonicalize_url(source_url) if source_url else None
+            self._db.execute('INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                             (path, date, number, source_url, canonical,
+                              hashlib.sha256(data).hexdigest(), stat.st_mtime_ns, stat.st_size))
+            if known:
+                self._count(known[2], -1)
+            self._count(canonical, 1)
+            self._files[path] = (stat.st_mtime_ns, stat.st_size, canonical)
+            counts['updated' if known else 'added'] += 1
+
+        for path in set(self._files) - present:
+            self._count(self._files.pop(path)[2], -1)
+            self._db.execute('DELETE FROM articles WHERE path = ?', (path,))
+            counts['removed'] += 1
+        self._db.commit()
+        if any(counts.values()):
+            logger.info(f"Published index: {counts['added']} added, {counts['updated']} updated, "
+                        f"{counts['removed']} removed ({len(self._files)} files, "
+                        f"{len(self._urls)} source URLs)")
+        return counts
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize_url(url) in self._urls
+
+    def find(self, url: str) -> List[PublishedArticle]:
+        """Published files whose source is `url` (any variant of it)"""
+        return self._select('canonical_url = ?', canonicalize_url(url))
+
+    def find_by_hash(self, content_hash: str) -> List[PublishedArticle]:
+        """Published files with exactly this sha256 content hash"""
+        return self._select('content_hash = ?', content_hash)
+
+    def _select(self, where: str, value: str) -> List[PublishedArticle]:
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT path, date, article_number, source_url, canonical_url, content_hash '
+                f'FROM articles WHERE {where} ORDER BY date, article_number', (value,)).fetchall()
+        return [PublishedArticle(*row) for row in rows]
+
+    def urls(self) -> List[str]:
+        """Source URLs of all published articles (as getWebsiteArticleUrls returns)"""
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                'SELECT DISTINCT source_url FROM articles WHERE source_url IS NOT NULL')]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Streaming JSONL sink for processed articles.
+
+Each finished article is encoded as one JSON line and handed to a
+background writer thread through a bounded queue, so memory stays constant
+however long the run and the event loop never waits on disk. The writer
+batches lines, fsyncs every `fsync_every` lines or `fsync_interval`
+seconds, can gzip or zstd-compress its output, and rotates to a new file
+once the current one passes `rotate_bytes`.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# Queue markers for the writer thread
+_CLOSE = object()
+_IDLE = object()
+
+
+def article_record(article: Any) -> Dict[str, Any]:
+    """Plain-dict form of a ProcessedArticle for one JSONL line"""
+    metadata = article.metadata
+    body = article.get_body() if hasattr(article, 'get_body') else article.body
+    return {
+        'url': article.url,
+        'title': article.title,
+        'body': body,
+        'summary': article.summary,
+        'status': article.status.value,
+        'error': article.error,
+        'processing_time': article.processing_time,
+        'retry_count': article.retry_count,
+        'near_duplicate_of': getattr(article, 'near_duplicate_of', None),
+        'image_paths': getattr(article, 'image_paths', None) or {},
+        'quality': getattr(article, 'quality', None),
+        'metadata': {
+            'author': metadata.author,
+            'published_date': metadata.published_date,
+            'tags': metadata.tags,
+            'word_count': metadata.word_count,
+            'images': metadata.images
+        } if metadata else None
+    }
+
+
+class JsonlSink:
+    """Append-only JSONL writer running on its own thread
+
+    Use `await write(article)` from the event loop and `await aclose()`
+    when done. Writer errors are raised from the next write or close.
+    Lines written with a key are reported to `on_written` (from the writer
+    thread) as (key, file path) pairs once they are in a file.
+    """
+
+    def __init__(self,
+                 path: Path,
+                 compression: Optional[str] = None,
+                 rotate_bytes: Optional[int] = None,
+                 fsync_every: int = 256,
+                 fsync_interval: float = 1.0,
+                 max_pending: int = 1024):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            logger.warning("zstandard not installed, writing gzip instead")
+            compression = 'gzip'
+        self.compression = compression
+        path = Path(path)
+        suffix = COMPRESSION_SUFFIXES[compression]
+        if suffix and not path.name.endswith(suffix):
+            path = path.with_name(path.name + suffix)
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.on_written: Optional[Callable[[List[Tuple[Hashable, str]]], None]] = None
+
+        self.lines_written = 0
+        self.files: List[Path] = []
+        self._index = 0
+        self._raw = None
+        self._stream = None
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name='jsonl-sink', daemon=True)
+        self._thread.start()
+
+    def _file_path(self, index: int) -> Path:
+        if not self.rotate_bytes:
+            return self.path
+        # articles.jsonl.gz -> articles.0003.jsonl.gz
+        stem, _, extensions = self.path.name.partition('.')
+        return self.path.with_name(f"{stem}.{index:04d}.{extensions}" if extensions
+                                   else f"{stem}.{index:04d}")
+
+    @staticmethod
+    def encode(article: Any) -> bytes:
+        return (json.dumps(article_record(article), ensure_ascii=False) + '\n').encode('utf-8')
+
+    async def write(self, article: Any, key: Optional[Hashable] = None) -> None:
+        """Queue one article; waits (without blocking the loop) if the writer is behind"""
+        self._check()
+        item = (self.encode(article), key)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+
+    def write_nowait(self, article: Any, key: Optional[Hashable] = None) -> None:
+        """Queue one article from synchronous code, blocking if the queue is full"""
+        self._check()
+        self._queue.put((self.encode(article), key))
+
+    def _check(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"JSONL writer failed: {self._error}") from self._error
+        if self._closed:
+            raise RuntimeError("JSONL sink is closed")
+
+    # Writer thread
+
+    def _open(self) -> None:
+        path = self._file_path(self._index)
+        while self.rotate_bytes and path.exists() and path.stat().st_size >= self.rotate_bytes:
+            self._index += 1
+            path = self._file_path(self._index)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Appending keeps earlier runs: gzip members and zstd frames concatenate
+        self._raw = open(path, 'ab')
+        if self.compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='ab')
+        elif self.compression == 'zstd':
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        self.files.append(path)
+
+    def _sync(self) -> None:
+        if self.compression == 'gzip':
+            self._stream.flush(zlib.Z_SYNC_FLUSH)
+        elif self.compression == 'zstd':
+            self._stream.flush(zstandard.FLUSH_BLOCK)
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+
+    def _close_file(self) -> None:
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        self._raw = self._stream = None
+
+    def _run(self) -> None:
+        unsynced = 0
+        last_sync = time.monotonic()
+        try:
+            self._open()
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.fsync_interval)
+                except queue.Empty:
+                    item = _IDLE
+                if item is _CLOSE:
+                    break
+                if item is not _IDLE:
+                    # Drain whatever else is waiting into one write call
+                    batch = [item]
+                    while len(batch) < 512:
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is _CLOSE:
+                            self._queue.put(_CLOSE)
+                            break
+                        batch.append(item)
+                    self._stream.write(b''.join(line for line, _ in batch))
+                    self.lines_written += len(batch)
+                    unsynced += len(batch)
+                    self._report(batch)
+                if unsynced and (unsynced >= self.fsync_every or
+                                 time.monotonic() - last_sync >= self.fsync_interval):
+                    self._sync()
+                    unsynced = 0
+                    last_sync = time.monotonic()
+                if self.rotate_bytes and self._raw.tell() >= self.rotate_bytes:
+                    self._close_file()
+                    self._index += 1
+                    self._open()
+        except BaseException as e:
+            self._error = e
+            logger.error(f"JSONL writer for {self.path} failed: {e}")
+            # Keep draining so producers blocked on a full queue wake up
+            while True:
+                try:
+                    if self._queue.get(timeout=0.1) is _CLOSE:
+                        break
+                except queue.Empty:
+                    if self._closed:
+                        break
+        finally:
+            if self._raw is not None:
+                self._close_file()
+
+    def _report(self, batch: List[Tuple[bytes, Optional[Hashable]]]) -> None:
+        if self.on_written is None:
+            return
+        path = str(self.files[-1])
+        written = [(key, path) for _, key in batch if key is not None]
+        if written:
+            try:
+                self.on_written(written)
+            except Exception as e:
+                logger.warning(f"on_written callback failed: {e}")
+
+    # Shutdown
+
+    def close(self) -> None:
+        """Flush everything, fsync and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        logger.info(f"Wrote {self.lines_written} articles to {len(self.files)} file(s) "
+                    f"starting at {self.files[0] if self.files else self.path}")
+        if self._error is not None:
+            raise RuntimeError(f"JSONL writer failed: {self._error}") from self._error
+
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self.close)
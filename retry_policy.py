@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Retry scheduling and per-host circuit breakers for page fetches.
+
+Retries are scheduled by the caller outside its fetch slot: a failed
+attempt gives the slot back, sleeps for the server's Retry-After (or an
+exponential backoff with full jitter), and queues for a slot again, so
+waiting URLs never hold concurrency that healthy ones could use.
+
+A CircuitBreaker per host counts consecutive failures that mean the site
+is down (5xx, timeouts, connection errors). Past a threshold it opens and
+every fetch for that host fails at once with CircuitOpenError; after a
+cooldown one probe request is let through, and its outcome closes the
+circuit or reopens it with a doubled cooldown. A Retry-After from the
+host also holds back new requests to it until the given time.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+# Responses worth another attempt; 429 and 503 usually carry Retry-After
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+# Responses that say the host itself is failing (429 is throttling, not down)
+HOST_FAILURE_STATUSES = frozenset({500, 502, 503, 504})
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class RetryableResponse(Exception):
+    """A response whose status is worth retrying"""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching from a host whose circuit is open"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the attempt-th retry (from 0)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Failure tracking for one host
+
+    Opens after `threshold` consecutive host failures and stays open for
+    `cooldown` seconds (doubling on each failed probe, up to
+    `max_cooldown`).
+    """
+
+    def __init__(self, host: str, threshold: int = 5, cooldown: float = 30.0,
+                 max_cooldown: float = 600.0):
+        self.host = host
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started = 0.0
+        self.hold_until = 0.0
+        self.stats = {'trips': 0, 'rejected': 0}
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a request may go to the host now"""
+        if self.state == CLOSED:
+            return
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self._probe_started = now
+            return
+        # A probe that never reported back (cancelled) is replaced after a cooldown
+        if self.state == HALF_OPEN and now - self._probe_started >= self.cooldown:
+            self._probe_started = now
+            return
+        self.stats['rejected'] += 1
+        since = self._probe_started if self.state == HALF_OPEN else self.opened_at
+        reopen = max(0.0, since + self.cooldown - now)
+        raise CircuitOpenError(f"Circuit open for {self.host} (retry in {reopen:.0f}s)")
+
+    def success(self) -> None:
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self.cooldown = self.base_cooldown
+        self.failures = 0
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            self._open()
+        elif self.state == CLOSED and self.failures >= self.threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.stats['trips'] += 1
+
+    def hold(self, seconds: float) -> None:
+        """Send nothing new to the host for `seconds` (from Retry-After)"""
+        self.hold_until = max(self.hold_until, time.monotonic() + seconds)
+
+    async def wait_ready(self) -> None:
+        """Sleep out a Retry-After hold; callers must not hold a fetch slot"""
+        while (remaining := self.hold_until - time.monotonic()) > 0:
+            await asyncio.sleep(remaining)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'state': self.state, 'consecutive_failures': self.failures,
+                'cooldown': self.cooldown, **self.stats}
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Multi-process runner that spreads GolfArticleProcessor over all cores.
+
+One event loop runs on one core, and parsing keeps it busy long before
+max_concurrent is reached. ShardedRunner starts N worker processes, each
+with its own event loop and GolfArticleProcessor, and routes every URL to
+a worker by a stable hash of its site, so per-site pools, rate limits and
+caches stay within one process. Results stream back to the parent as they
+complete and per-worker stats are merged into one get_stats() view.
+
+If a worker dies, it is restarted and given the URLs it had not yet
+answered; after `max_restarts` crashes of one shard its remaining URLs
+are reported as failed. Persistent dedup (seen_urls_dir, published_dir,
+near_duplicates_dir) and the result sink live in the parent, which sees
+every URL and result: one writer per store, and near-copies are caught
+across sites in different shards. Each worker harvests images into its
+own image_dir/shard-<n> store.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import zlib
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import (Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple,
+                    Union)
+
+from latency_metrics import LatencyHistogram, PhaseMetrics
+from near_duplicates import NearDuplicateIndex
+from published_index import PublishedIndex
+from result_sink import JsonlSink
+from test_optimize_enhanced import (SKIPPED_STATUSES, GolfArticleProcessor, ProcessedArticle,
+                                    ProcessingStatus, SiteConfigRegistry)
+from url_seen_filter import SeenUrlStore, canonicalize_url
+from url_stream import aiter_urls
+
+logger = logging.getLogger(__name__)
+
+# Worker -> parent messages on the worker's own pipe: (kind, payload). One
+# pipe per worker, so a worker killed mid-write cannot wedge the others
+_RESULT = 'result'
+_STATS = 'stats'
+_DONE = 'done'
+
+# Counted by the parent from the results it receives, so articles a crashed
+# worker finished still count
+_RESULT_STATS = ('total_processed', 'successful', 'failed', 'skipped', 'total_time')
+
+# Processor options that need one owner for the whole run
+_PARENT_ONLY = ('journal_path', 'metrics_path', 'metrics_port', 'profiler',
+                'spill_bodies', 'spill_dir')
+
+
+def _run_shard(processor_kwargs: Dict[str, Any], inbox: multiprocessing.Queue,
+               outbox: Connection) -> None:
+    """Worker process entry point"""
+    asyncio.run(_serve_shard(processor_kwargs, inbox, outbox))
+
+
+async def _serve_shard(processor_kwargs: Dict[str, Any], inbox: multiprocessing.Queue,
+                       outbox: Connection) -> None:
+    positions: List[int] = []
+
+    async def urls() -> AsyncIterator[str]:
+        while True:
+            item = await asyncio.to_thread(inbox.get)
+            if item is None:
+                return
+            positions.append(item[0])
+            yield item[1]
+
+    async with GolfArticleProcessor(**processor_kwargs) as processor:
+        async for index, article in processor.iter_indexed(urls()):
+            outbox.send((_RESULT, (positions[index], article)))
+        stats = processor.get_stats()
+        stats.pop('latency', None)
+        outbox.send((_STATS, (stats, processor.metrics.histograms)))
+    outbox.send((_DONE, None))
+    outbox.close()
+
+
+class _Shard:
+    __slots__ = ('index', 'process', 'inbox', 'outbox', 'restarts', 'pending', 'done')
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[multiprocessing.Process] = None
+        self.inbox: Optional[multiprocessing.Queue] = None
+        self.outbox: Optional[Connection] = None
+        self.restarts = 0
+        self.pending: Dict[int, str] = {}   # position -> URL sent but not answered
+        self.done = False
+
+
+class ShardedRunner:
+    """Runs GolfArticleProcessor in `workers` processes, sharded by site
+
+    Keyword arguments not listed here are passed to every worker's
+    GolfArticleProcessor and must be picklable; cache_dir and image_dir
+    get one subdirectory per shard. `window` bounds URLs in flight across
+    all workers.
+    """
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 max_restarts: int = 2,
+                 window: Optional[int] = None,
+                 seen_urls_dir: Optional[Path] = None,
+                 published_dir: Optional[Path] = None,
+                 near_duplicates_dir: Optional[Path] = None,
+                 near_duplicate_threshold: float = 0.8,
+                 drop_near_duplicates: bool = False,
+                 result_sink: Optional[JsonlSink] = None,
+                 **processor_kwargs: Any):
+        unsupported = [key for key in _PARENT_ONLY if processor_kwargs.get(key)]
+        if unsupported:
+            raise ValueError(f"ShardedRunner does not support {', '.join(unsupported)}")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_restarts = max_restarts
+        self.window = window or self.workers * 64
+        self.processor_kwargs = processor_kwargs
+        self.site_configs = processor_kwargs.get('site_configs') or SiteConfigRegistry.load()
+        processor_kwargs['site_configs'] = self.site_configs
+        self.seen_urls = SeenUrlStore(seen_urls_dir) if seen_urls_dir else None
+        self.published = PublishedIndex(published_dir) if published_dir else None
+        self.near_duplicates = (
+            NearDuplicateIndex(near_duplicates_dir, threshold=near_duplicate_threshold)
+            if near_duplicates_dir else None
+        )
+        self.drop_near_duplicates = drop_near_duplicates
+        self.result_sink = result_sink
+        self.metrics = PhaseMetrics()
+        self._worker_stats: List[Dict[str, Any]] = []
+        self._stats = {'total_processed': 0, 'successful': 0, 'failed': 0, 'skipped': 0,
+                       'total_time': 0.0, 'duplicates_skipped': 0, 'near_duplicates': 0,
+                       'worker_restarts': 0, 'worker_lost': 0}
+        self._context = multiprocessing.get_context('spawn')
+
+    def shard_of(self, url: str) -> int:
+        """Worker index for a URL; stable across runs and processes"""
+        return zlib.crc32(self.site_configs.site_key(url).encode()) % self.workers
+
+    def _worker_kwargs(self, shard: int) -> Dict[str, Any]:
+        kwargs = dict(self.processor_kwargs)
+        # SQLite stores written by every worker would contend for one lock
+        for key in ('cache_dir', 'image_dir'):
+            if kwargs.get(key):
+                kwargs[key] = Path(kwargs[key]) / f'shard-{shard}'
+        return kwargs
+
+    def _start(self, shard: _Shard) -> None:
+        shard.inbox = self._context.Queue()
+        shard.outbox, sender = self._context.Pipe(duplex=False)
+        shard.process = self._context.Process(
+            target=_run_shard, name=f'golf-shard-{shard.index}',
+            args=(self._worker_kwargs(shard.index), shard.inbox, sender))
+        shard.process.start()
+        # Only the worker holds the sending end, so its exit reads as EOF
+        sender.close()
+
+    def _duplicate(self, url: str) -> Optional[ProcessedArticle]:
+        published = self.published.find(url) if self.published and url in self.published else None
+        if published:
+            error = f"Already published in {published[0].path}"
+        elif self.seen_urls and url in self.seen_urls:
+            error = "Already processed"
+        else:
+            return None
+        self._stats['duplicates_skipped'] += 1
+        return ProcessedArticle(url=url, status=ProcessingStatus.DUPLICATE, error=error)
+
+    async def _check_near_duplicate(self, article: ProcessedArticle) -> None:
+        """Flag or drop an article whose body nearly copies an indexed one"""
+        started = time.perf_counter()
+        match = await asyncio.to_thread(self.near_duplicates.check_and_add,
+                                        canonicalize_url(article.url), article.body)
+        self.metrics.record('fingerprint', self.site_configs.site_key(article.url), 200,
+                            time.perf_counter() - started)
+        if match is None:
+            return
+        self._stats['near_duplicates'] += 1
+        article.near_duplicate_of = match.url
+        if self.drop_near_duplicates:
+            article.status = ProcessingStatus.NEAR_DUPLICATE
+            article.error = f"Near-duplicate of {match.url} ({match.similarity:.0%} similar)"
+            article.body = None
+
+    def _update_stats(self, article: ProcessedArticle) -> None:
+        self._stats['total_processed'] += 1
+        self._stats['total_time'] += article.processing_time
+        if article.status == ProcessingStatus.SUCCESS:
+            self._stats['successful'] += 1
+        elif article.status in SKIPPED_STATUSES:
+            self._stats['skipped'] += 1
+        else:
+            self._stats['failed'] += 1
+
+    async def _iter_indexed(self,
+                            urls: Union[Iterable[str], AsyncIterable[str]],
+                            progress_callback: Optional[callable] = None
+                            ) -> AsyncIterator[Tuple[int, ProcessedArticle]]:
+        if self.published:
+            await asyncio.to_thread(self.published.refresh)
+        shards = [_Shard(index) for index in range(self.workers)]
+        for shard in shards:
+            self._start(shard)
+        ready: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(self.window)
+        fed = asyncio.Event()
+
+        check_duplicates = bool(self.published or self.seen_urls)
+
+        async def feed() -> None:
+            position = 0
+            try:
+                async for url in aiter_urls(urls):
+                    duplicate = (await asyncio.to_thread(self._duplicate, url)
+                                 if check_duplicates else None)
+                    if duplicate:
+                        await ready.put((position, duplicate))
+                        position += 1
+                        continue
+                    await slots.acquire()
+                    shard = shards[self.shard_of(url)]
+                    if shard.done:
+                        # Its worker crashed for good; nothing would answer
+                        slots.release()
+                        self._stats['worker_lost'] += 1
+                        await ready.put((position, ProcessedArticle(
+                            url=url, status=ProcessingStatus.FAILED,
+                            error=f"Worker for shard {shard.index} crashed")))
+                    else:
+                        shard.pending[position] = url
+                        shard.inbox.put((position, url))
+                    position += 1
+            finally:
+                # Also on a failing URL source, so workers finish and the
+                # error reaches the consumer
+                for shard in shards:
+                    shard.inbox.put(None)
+                fed.set()
+
+        def finish(shard: _Shard, article_for_pending: Optional[str] = None) -> None:
+            if article_for_pending:
+                for position, url in shard.pending.items():
+                    self._stats['worker_lost'] += 1
+                    slots.release()
+                    ready.put_nowait((position, ProcessedArticle(
+                        url=url, status=ProcessingStatus.FAILED, error=article_for_pending)))
+                shard.pending.clear()
+            shard.done = True
+
+        async def restart(shard: _Shard) -> None:
+            await asyncio.to_thread(shard.process.join)
+            if shard.restarts >= self.max_restarts:
+                logger.error(f"Shard {shard.index} crashed {shard.restarts + 1} times, "
+                             f"failing its {len(shard.pending)} remaining URLs")
+                finish(shard, f"Worker for shard {shard.index} crashed")
+                return
+            shard.restarts += 1
+            self._stats['worker_restarts'] += 1
+            logger.warning(f"Shard {shard.index} worker exited with code "
+                           f"{shard.process.exitcode}; restarting with "
+                           f"{len(shard.pending)} URLs")
+            self._start(shard)
+            for position, url in shard.pending.items():
+                shard.inbox.put((position, url))
+            if fed.is_set():
+                shard.inbox.put(None)
+
+        def receive() -> List[Tuple[_Shard, Optional[Tuple[str, Any]]]]:
+            """Messages from every worker with one waiting; None for a closed pipe"""
+            readers = {shard.outbox: shard for shard in shards if shard.outbox}
+            messages = []
+            for reader in wait(list(readers), timeout=1.0):
+                try:
+                    messages.append((readers[reader], reader.recv()))
+                except (EOFError, OSError):
+                    messages.append((readers[reader], None))
+            return messages
+
+        async def collect() -> None:
+            while not all(shard.done for shard in shards):
+                for shard, message in await asyncio.to_thread(receive):
+                    if message is None:
+                        shard.outbox.close()
+                        shard.outbox = None
+                        if not shard.done:
+                            # Exited without a DONE message: the worker crashed
+                            await restart(shard)
+                        continue
+                    kind, payload = message
+                    if kind == _RESULT:
+                        position, article = payload
+                        if shard.pending.pop(position, None) is not None:
+                            slots.release()
+                            await ready.put((position, article))
+                    elif kind == _STATS:
+                        stats, histograms = payload
+                        self._worker_stats.append(stats)
+                        for key, histogram in histograms.items():
+                            self.metrics.histograms.setdefault(
+                                key, LatencyHistogram()).merge(histogram)
+                    elif kind == _DONE:
+                        finish(shard)
+            # URLs still being fed are answered by feed() itself
+            await fed.wait()
+            await ready.put(None)
+
+        feeder = asyncio.create_task(feed())
+        collector = asyncio.create_task(collect())
+        try:
+            while (item := await ready.get()) is not None:
+                position, article = item
+                if (self.near_duplicates and article.status == ProcessingStatus.SUCCESS
+                        and article.body):
+                    await self._check_near_duplicate(article)
+                self._update_stats(article)
+                if self.seen_urls and article.status in (ProcessingStatus.SUCCESS,
+                                                         ProcessingStatus.NEAR_DUPLICATE):
+                    await asyncio.to_thread(self.seen_urls.add, article.url)
+                if progress_callback:
+                    progress_callback(article)
+                if self.result_sink:
+                    await self.result_sink.write(article)
+                yield position, article
+            await feeder
+        finally:
+            feeder.cancel()
+            collector.cancel()
+            await asyncio.gather(feeder, collector, return_exceptions=True)
+            for shard in shards:
+                # Workers are left unfinished only when the consumer stops early
+                if not shard.done:
+                    shard.process.terminate()
+                await asyncio.to_thread(shard.process.join, 5)
+                if shard.outbox:
+                    shard.outbox.close()
+
+    async def iter_articles(self,
+                            urls: Union[Iterable[str], AsyncIterable[str]],
+                            progress_callback: Optional[callable] = None
+                            ) -> AsyncIterator[ProcessedArticle]:
+        """Stream articles from all workers as they complete"""
+        async for _, article in self._iter_indexed(urls, progress_callback):
+            yield article
+
+    async def process_articles(self,
+                               urls: Iterable[str],
+                               progress_callback: Optional[callable] = None) -> List[ProcessedArticle]:
+        """Process URLs across the workers; results in input order"""
+        urls = list(urls)
+        results: List[Optional[ProcessedArticle]] = [None] * len(urls)
+        async for position, article in self._iter_indexed(urls, progress_callback):
+            results[position] = article
+        logger.info(f"Completed processing. Stats: {self.get_stats(latency=False)}")
+        return results
+
+    def get_stats(self, latency: bool = True) -> Dict[str, Any]:
+        """Result counts from the parent, other counters summed over workers"""
+        stats: Dict[str, Any] = dict(self._stats)
+        for worker in self._worker_stats:
+            for key, value in worker.items():
+                if key in _RESULT_STATS or key in ('success_rate', 'avg_processing_time'):
+                    continue
+                if isinstance(value, (int, float)):
+                    stats[key] = stats.get(key, 0) + value
+                elif isinstance(value, dict) and key != 'profile':
+                    merged = stats.setdefault(key, {})
+                    for name, number in value.items():
+                        if isinstance(number, dict):
+                            # Per-site entries (e.g. concurrency windows) come
+                            # from the one shard that owns the site
+                            merged[name] = number
+                        else:
+                            merged[name] = merged.get(name, 0) + number
+        processed = stats.get('total_processed', 0)
+        stats['success_rate'] = stats.get('successful', 0) / processed if processed else 0.0
+        stats['avg_processing_time'] = stats.get('total_time', 0.0) / processed if processed else 0.0
+        stats['workers'] = self.workers
+        if latency:
+            stats['latency'] = self.metrics.summary()
+        return stats
+
+    async def aclose(self) -> None:
+        if self.result_sink:
+            await self.result_sink.aclose()
+        if self.seen_urls:
+            self.seen_urls.close()
+        if self.published:
+            self.published.close()
+        if self.near_duplicates:
+            self.near_duplicates.close()
+
+    async def __aenter__(self) -> 'ShardedRunner':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
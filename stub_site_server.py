@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the golf sites, for offline benchmarks and smoke tests.
+
+Recorded article pages are served from one port per simulated host on
+127.0.0.1 (other loopback addresses are not configured on macOS). The
+processors key sites, pools and rate limits by host and port, so each
+port behaves as a separate real site. Each host has a
+profile: response latency with jitter, a share of 500/503 errors, and an
+optional slow-loris mode that trickles the body out over several seconds.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HostProfile:
+    """How one simulated host answers"""
+    name: str
+    latency: float = 0.0          # seconds before the response starts
+    jitter: float = 0.0           # latency varies uniformly by +/- this much
+    error_rate: float = 0.0       # share of requests answered 500 or 503
+    trickle_seconds: float = 0.0  # slow-loris: spread the body over this long
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+HOST_PROFILES = {
+    'fast': HostProfile('fast', latency=0.02, jitter=0.01),
+    'typical': HostProfile('typical', latency=0.15, jitter=0.1, error_rate=0.02),
+    'flaky': HostProfile('flaky', latency=0.3, jitter=0.25, error_rate=0.2),
+    'slowloris': HostProfile('slowloris', latency=0.05, trickle_seconds=3.0),
+}
+
+
+class StubSiteServer:
+    """aiohttp app serving `pages` at /article/<n> on one port per profile"""
+
+    def __init__(self, pages: Sequence[bytes], profiles: Sequence[HostProfile],
+                 seed: Optional[int] = None):
+        if not pages:
+            raise ValueError("StubSiteServer needs at least one page")
+        self.pages = list(pages)
+        self.profiles = list(profiles)
+        self.random = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._port_profiles: Dict[int, HostProfile] = {}
+        self.base_urls: List[str] = []
+
+    async def start(self) -> List[str]:
+        """Bind every host and return their base URLs in profile order"""
+        self._runner = web.AppRunner(self._app(), access_log=None)
+        await self._runner.setup()
+        for profile in self.profiles:
+            site = web.TCPSite(self._runner, '127.0.0.1', 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            self._port_profiles[port] = profile
+            self.base_urls.append(f'http://127.0.0.1:{port}')
+        return self.base_urls
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/article/{number:\\d+}', self._article)
+        return app
+
+    def _profile(self, request: web.Request) -> HostProfile:
+        return self._port_profiles[request.transport.get_extra_info('sockname')[1]]
+
+    async def _article(self, request: web.Request) -> web.StreamResponse:
+        profile = self._profile(request)
+        number = int(request.match_info['number'])
+        delay = profile.latency + self.random.uniform(-profile.jitter, profile.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.random.random() < profile.error_rate:
+            status = self.random.choice((500, 503))
+            self._count(profile, status)
+            headers = {'Retry-After': '1'} if status == 503 else None
+            return web.Response(status=status, headers=headers)
+
+        # A per-URL marker keeps identical recorded pages from looking like
+        # one response to content-hash caches
+        body = self.pages[number % len(self.pages)] + f'\n<!-- {profile.name} {number} -->\n'.encode()
+        self._count(profile, 200)
+        if not profile.trickle_seconds:
+            return web.Response(body=body, content_type='text/html', charset='utf-8')
+
+        response = web.StreamResponse(headers={'Content-Type': 'text/html; charset=utf-8'})
+        response.content_length = len(body)
+        await response.prepare(request)
+        chunks = 20
+        step = -(-len(body) // chunks)
+        for offset in range(0, len(body), step):
+            await response.write(body[offset:offset + step])
+            await asyncio.sleep(profile.trickle_seconds / chunks)
+        await response.write_eof()
+        return response
+
+    def _count(self, profile: HostProfile, status: int) -> None:
+        key = f'{profile.name}:{status}'
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+
+def _serve(paths: List[str], profiles: List[HostProfile], seed: Optional[int], conn) -> None:
+    logging.getLogger('aiohttp.access').setLevel(logging.WARNING)
+    pages = [Path(path).read_bytes() for path in paths]
+
+    async def run() -> None:
+        server = StubSiteServer(pages, profiles, seed)
+        conn.send(await server.start())
+        # Serve until the parent terminates the process
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+def start_in_process(paths: Sequence[Path], profiles: Sequence[HostProfile],
+                     seed: Optional[int] = None) -> Tuple[multiprocessing.Process, List[str]]:
+    """Run a StubSiteServer in a child process, keeping its CPU out of measurements
+
+    Returns the process (terminate it when done) and the host base URLs.
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.get_context('spawn').Process(
+        target=_serve, args=([str(path) for path in paths], list(profiles), seed, child),
+        name='stub-site-server', daemon=True)
+    process.start()
+    if not parent.poll(30):
+        process.terminate()
+        raise RuntimeError("Stub site server did not start")
+    base_urls = parent.recv()
+    logger.info(f"Stub site server on {', '.join(base_urls)}")
+    return process, base_urls
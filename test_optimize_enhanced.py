@@ -7,19 +7,41 @@ advanced HTML parsing, and modern Python features.
 import asyncio
 import aiohttp
 from aiohttp import ClientSession, ClientTimeout, TCPConnector
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional, Tuple, Any
-from dataclasses import dataclass, field
+from bs4 import BeautifulSoup, Tag
+from bs4.dammit import EncodingDetector
+from typing import (List, Dict, Optional, Tuple, Any, Callable, Iterable, AsyncIterable,
+                    AsyncIterator, Mapping, Union)
+from dataclasses import dataclass, field, replace
 from enum import Enum
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import json
 from pathlib import Path
 from urllib.parse import urlparse
-import backoff
+import hashlib
+import re
+import soupsieve
+import sys
 from functools import wraps
 import time
 from contextlib import asynccontextmanager
+from http_response_cache import ResponseCache
+from url_seen_filter import SeenUrlStore, canonicalize_url
+from url_stream import aiter_urls
+from text_spill import THREAD_PUT_CHARS, SpillFile, TextRef
+from result_sink import JsonlSink
+from job_journal import DONE, JobJournal
+from latency_metrics import PhaseMetrics, start_metrics_server, write_prometheus_file
+from pipeline_profiler import ArticleProfile, PipelineProfiler, ProfileSettings
+from near_duplicates import NearDuplicateIndex
+from published_index import PublishedIndex
+from image_harvester import ImageHarvester
+from adaptive_concurrency import AimdLimiter
+from content_quality import DEFAULT_THRESHOLDS, block_texts, check_quality, score_content
+from retry_policy import (HOST_FAILURE_STATUSES, RETRYABLE_STATUSES, CircuitBreaker,
+                          CircuitOpenError, RetryableResponse, backoff_delay, parse_retry_after)
 
 # Configure logging
 logging.basicConfig(
@@ -36,9 +58,18 @@ class ProcessingStatus(Enum):
     TIMEOUT = "timeout"
     RETRY_EXHAUSTED = "retry_exhausted"
     INVALID_CONTENT = "invalid_content"
+    DUPLICATE = "duplicate"
+    NEAR_DUPLICATE = "near_duplicate"
+    LOW_QUALITY = "low_quality"
 
 
-@dataclass
+# Terminal statuses for URLs deliberately not turned into articles; counted
+# as skipped rather than successful or failed
+SKIPPED_STATUSES = frozenset({ProcessingStatus.DUPLICATE, ProcessingStatus.NEAR_DUPLICATE,
+                              ProcessingStatus.LOW_QUALITY})
+
+
+@dataclass(slots=True)
 class ArticleMetadata:
     """Data class for article metadata"""
     author: Optional[str] = None
@@ -48,9 +79,19 @@ class ArticleMetadata:
     images: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessedArticle:
-    """Data class for processed article results"""
+    """Data class for processed article results
+
+    When the processor spills bodies to disk, `body` is None and `body_ref`
+    points into the spill file; use get_body() to read either form. The
+    spill file stays open for as long as any body_ref into it is alive,
+    including after the processor has exited.
+    `near_duplicate_of` names an earlier article with nearly the same body.
+    `image_paths` maps image URLs to their downloaded files, when images
+    are harvested. `quality` holds the content-quality measurements the
+    quality gate judged the body by.
+    """
     url: str
     title: Optional[str] = None
     body: Optional[str] = None
@@ -60,48 +101,179 @@ class ProcessedArticle:
     error: Optional[str] = None
     processing_time: float = 0.0
     retry_count: int = 0
+    body_ref: Optional[TextRef] = None
+    near_duplicate_of: Optional[str] = None
+    image_paths: Dict[str, str] = field(default_factory=dict)
+    quality: Optional[Dict[str, Any]] = None
+
+    def get_body(self) -> Optional[str]:
+        """Body text, read back from the spill file if it was spilled"""
+        if self.body is None and self.body_ref is not None:
+            return self.body_ref.read()
+        return self.body
+
+
+class SiteConfigRegistry:
+    """Per-site settings loaded from website_configs.json"""
+
+    DEFAULT_PATH = Path(__file__).with_name('website_configs.json')
+
+    def __init__(self, configs: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.configs = configs or {}
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> 'SiteConfigRegistry':
+        """Load site configs, falling back to an empty registry"""
+        path = Path(path) if path else cls.DEFAULT_PATH
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load site configs from {path}: {e}")
+            return cls()
+
+    def site_key(self, url: str) -> str:
+        """Map a URL to its website_configs.json key (or bare hostname[:port])"""
+        parsed = urlparse(url)
+        host = (parsed.hostname or '').lower()
+        if host in self.configs:
+            return host
+        domain = host.replace('www.', '', 1) if host.startswith('www.') else host
+        if domain in self.configs:
+            return domain
+        # Subdomains such as news.golf.com share the parent site's settings
+        for key in self.configs:
+            if domain.endswith('.' + key.replace('www.', '', 1)):
+                return key
+        # An explicit port is a separate origin (and a separate local stub host)
+        try:
+            if parsed.port:
+                domain = f"{domain}:{parsed.port}"
+        except ValueError:
+            pass
+        # Interned so the many per-URL copies of one domain share storage
+        return sys.intern(domain)
+
+    def get(self, url: str) -> Dict[str, Any]:
+        """Get the config dict for a URL (empty for unknown sites)"""
+        return self.configs.get(self.site_key(url), {})
+
+
+class TokenBucket:
+    """GCRA token bucket - constant work per reservation, no lock needed"""
+    __slots__ = ('interval', 'tolerance', '_tat')
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1.0 / rate
+        # Up to `burst` requests may start back-to-back before spacing applies
+        self.tolerance = self.interval * (max(burst, 1) - 1)
+        self._tat = 0.0  # theoretical arrival time of the next request
+
+    def reserve(self, now: float) -> float:
+        """Reserve the next slot at or after `now` and return its start time"""
+        tat = self._tat
+        start = max(now, tat - self.tolerance)
+        self._tat = max(tat, start) + self.interval
+        return start
 
 
 class RateLimiter:
-    """Simple rate limiter for API requests"""
-    def __init__(self, max_requests: int = 10, time_window: int = 1):
+    """Token-bucket rate limiter with per-host, per-site and global buckets
+
+    Each acquire reserves a slot in every bucket that applies and then
+    sleeps outside any lock until the latest of those slots, so waiters
+    never queue behind each other's sleeps.
+    """
+    def __init__(self,
+                 max_requests: int = 10,
+                 time_window: int = 1,
+                 burst: Optional[int] = None,
+                 global_max_requests: Optional[int] = None,
+                 site_configs: Optional['SiteConfigRegistry'] = None):
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = []
-        self._lock = asyncio.Lock()
-    
-    async def acquire(self):
-        async with self._lock:
-            now = time.time()
-            # Remove old requests outside the time window
-            self.requests = [req_time for req_time in self.requests 
-                           if now - req_time < self.time_window]
-            
-            if len(self.requests) >= self.max_requests:
-                sleep_time = self.time_window - (now - self.requests[0])
-                await asyncio.sleep(sleep_time)
-                return await self.acquire()
-            
-            self.requests.append(now)
+        self.burst = burst or max_requests
+        self.site_configs = site_configs or SiteConfigRegistry()
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self._site_buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._global_bucket = (
+            TokenBucket(global_max_requests / time_window, global_max_requests)
+            if global_max_requests else None
+        )
+
+    def _buckets_for(self, url: Optional[str]) -> List[TokenBucket]:
+        """Collect the host, site and global buckets that apply to a URL"""
+        # Host and port, like aiohttp's per-host connection limits
+        host = urlparse(url).netloc.lower() if url else ''
+        buckets = []
+
+        bucket = self._host_buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.max_requests / self.time_window, self.burst)
+            self._host_buckets[host] = bucket
+        buckets.append(bucket)
+
+        if url:
+            site = self.site_configs.site_key(url)
+            if site not in self._site_buckets:
+                limit = self.site_configs.configs.get(site, {}).get('rateLimit')
+                self._site_buckets[site] = TokenBucket(
+                    limit['requestsPerSecond'], limit.get('burst', 1)
+                ) if limit else None
+            if self._site_buckets[site]:
+                buckets.append(self._site_buckets[site])
+
+        if self._global_bucket:
+            buckets.append(self._global_bucket)
+        return buckets
+
+    async def acquire(self, url: Optional[str] = None):
+        now = time.monotonic()
+        start = now
+        for bucket in self._buckets_for(url):
+            start = bucket.reserve(start)
+        if start > now:
+            await asyncio.sleep(start - now)
 
 
 class HTMLParser:
     """Advanced HTML parser using BeautifulSoup"""
     
+    # Generic selector chains, tried in order of preference
+    TITLE_SELECTORS = [
+        'h1.article-title',
+        'h1.entry-title',
+        'h1[itemprop="headline"]',
+        'meta[property="og:title"]',
+        'meta[name="twitter:title"]',
+        'title'
+    ]
+    CONTENT_SELECTORS = [
+        'article',
+        'div.article-content',
+        'div.entry-content',
+        'div.post-content',
+        'main',
+        'div[itemprop="articleBody"]'
+    ]
+    AUTHOR_SELECTORS = [
+        'meta[name="author"]',
+        'span.by-author',
+        'span.author-name',
+        'a[rel="author"]'
+    ]
+    DATE_SELECTORS = [
+        'meta[property="article:published_time"]',
+        'time[datetime]',
+        'span.published-date'
+    ]
+    TAG_SELECTOR = 'a[rel="tag"], meta[property="article:tag"]'
+    IMAGE_SELECTOR = 'article img, div.article-content img'
+    
     @staticmethod
     def extract_title(soup: BeautifulSoup) -> Optional[str]:
         """Extract article title with multiple strategies"""
-        # Try multiple selectors in order of preference
-        selectors = [
-            'h1.article-title',
-            'h1.entry-title',
-            'h1[itemprop="headline"]',
-            'meta[property="og:title"]',
-            'meta[name="twitter:title"]',
-            'title'
-        ]
-        
-        for selector in selectors:
+        for selector in HTMLParser.TITLE_SELECTORS:
             element = soup.select_one(selector)
             if element:
                 if element.name == 'meta':
@@ -111,42 +283,53 @@ class HTMLParser:
         return None
     
     @staticmethod
-    def extract_body(soup: BeautifulSoup) -> Optional[str]:
-        """Extract article body with intelligent content detection"""
+    def extract_body(soup: BeautifulSoup, measures: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Extract article body with intelligent content detection
+
+        With `measures`, the block and link texts of wherever the body came
+        from are stored in measures['blocks'/'links'] for score_content.
+        """
         # Remove script and style elements
         for script in soup(['script', 'style', 'nav', 'header', 'footer']):
             script.decompose()
         
         # Try multiple content selectors
-        content_selectors = [
-            'article',
-            'div.article-content',
-            'div.entry-content',
-            'div.post-content',
-            'main',
-            'div[itemprop="articleBody"]'
-        ]
-        
-        for selector in content_selectors:
+        for selector in HTMLParser.CONTENT_SELECTORS:
             content = soup.select_one(selector)
             if content:
                 # Extract text and clean up
-                text = content.get_text(separator='\n', strip=True)
-                # Remove excessive newlines
-                text = '\n'.join(line.strip() for line in text.split('\n') 
-                               if line.strip())
+                text = HTMLParser.clean_text(content.get_text(separator='\n', strip=True))
                 if len(text) > 100:  # Minimum content length
+                    HTMLParser.measure_blocks([content], measures)
                     return text
         
         # Fallback: get all paragraphs
         paragraphs = soup.find_all('p')
         if paragraphs:
-            text = '\n'.join(p.get_text(strip=True) for p in paragraphs 
-                           if p.get_text(strip=True))
+            texts = (p.get_text(strip=True) for p in paragraphs)
+            text = '\n'.join(t for t in texts if t)
             if len(text) > 100:
+                HTMLParser.measure_blocks(paragraphs, measures)
                 return text
         
         return None
+
+    @staticmethod
+    def measure_blocks(roots: List[Tag], measures: Optional[Dict[str, Any]]) -> None:
+        """Store the block and link texts under roots in measures, if given"""
+        if measures is None:
+            return
+        measures['blocks'] = block_texts(
+            roots, lambda node: node.name,
+            lambda node: [child for child in node.contents if isinstance(child, Tag)],
+            lambda node: node.get_text(' ', strip=True))
+        measures['links'] = [link.get_text(' ', strip=True)
+                             for root in roots for link in root.find_all('a')]
+    
+    @staticmethod
+    def clean_text(text: str) -> str:
+        """Strip lines and drop empty ones"""
+        return '\n'.join(line.strip() for line in text.split('\n') if line.strip())
     
     @staticmethod
     def extract_summary(body: Optional[str], max_length: int = 300) -> Optional[str]:
@@ -167,19 +350,12 @@ class HTMLParser:
         return summary.strip()
     
     @staticmethod
-    def extract_metadata(soup: BeautifulSoup) -> ArticleMetadata:
+    def extract_metadata(soup: BeautifulSoup, include_images: bool = True) -> ArticleMetadata:
         """Extract article metadata"""
         metadata = ArticleMetadata()
         
         # Extract author
-        author_selectors = [
-            'meta[name="author"]',
-            'span.by-author',
-            'span.author-name',
-            'a[rel="author"]'
-        ]
-        
-        for selector in author_selectors:
+        for selector in HTMLParser.AUTHOR_SELECTORS:
             element = soup.select_one(selector)
             if element:
                 if element.name == 'meta':
@@ -189,13 +365,7 @@ class HTMLParser:
                 break
         
         # Extract published date
-        date_selectors = [
-            'meta[property="article:published_time"]',
-            'time[datetime]',
-            'span.published-date'
-        ]
-        
-        for selector in date_selectors:
+        for selector in HTMLParser.DATE_SELECTORS:
             element = soup.select_one(selector)
             if element:
                 if element.name == 'meta':
@@ -207,7 +377,7 @@ class HTMLParser:
                 break
         
         # Extract tags
-        tag_elements = soup.select('a[rel="tag"], meta[property="article:tag"]')
+        tag_elements = soup.select(HTMLParser.TAG_SELECTOR)
         for element in tag_elements:
             if element.name == 'meta':
                 tag = element.get('content', '').strip()
@@ -217,15 +387,1002 @@ class HTMLParser:
                 metadata.tags.append(tag)
         
         # Extract images
-        img_elements = soup.select('article img, div.article-content img')
-        for img in img_elements:
+        if include_images:
+            img_elements = soup.select(HTMLParser.IMAGE_SELECTOR)
+            for img in img_elements:
+                src = img.get('src', '')
+                if src and not src.startswith('data:'):
+                    metadata.images.append(src)
+        
+        return metadata
+
+
+_SIMPLE_SELECTOR = re.compile(r'^(?:([a-zA-Z][\w-]*)|\.([\w-]+)|#([\w-]+)|([a-zA-Z][\w-]*)\[([\w-]+)\])$')
+
+
+_COMPOUND = re.compile(
+    r'^([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)(?:\[([\w-]+)(?:=(["\']?)([^"\'\]]*)\4)?\])?$')
+
+
+class SimpleSelector:
+    """One compound selector such as `figure.wp-block-image` or `meta[name="author"]`"""
+    __slots__ = ('tag', 'classes', 'element_id', 'attr', 'value')
+
+    def __init__(self, tag: Optional[str], classes: List[str], element_id: Optional[str],
+                 attr: Optional[str], value: Optional[str]):
+        self.tag = tag
+        self.classes = classes
+        self.element_id = element_id
+        self.attr = attr
+        self.value = value
+
+    @classmethod
+    def parse(cls, text: str) -> Optional['SimpleSelector']:
+        match = _COMPOUND.match(text)
+        if not match or not any(match.groups()):
+            return None
+        tag, rest, attr, _, value = match.groups()
+        parts = re.findall(r'[.#][\w-]+', rest or '')
+        ids = [p[1:] for p in parts if p[0] == '#']
+        if len(ids) > 1:
+            return None
+        return cls(tag.lower() if tag else None,
+                   [p[1:] for p in parts if p[0] == '.'],
+                   ids[0] if ids else None, attr, value)
+
+    def matches(self, element: Tag) -> bool:
+        if self.tag and element.name != self.tag:
+            return False
+        if self.classes:
+            classes = element.get('class') or ()
+            if not all(c in classes for c in self.classes):
+                return False
+        if self.element_id and element.get('id') != self.element_id:
+            return False
+        if not self.attr:
+            return True
+        actual = element.get(self.attr)
+        if actual is None or self.value is None:
+            return actual is not None
+        # Multi-valued attributes such as rel come back as lists
+        if isinstance(actual, list):
+            actual = ' '.join(actual)
+        return actual == self.value
+
+
+class CompiledSelector:
+    """A selector list compiled for fast matching
+
+    Lists made only of compound selectors and `ancestor subject` pairs
+    (the common shape in website_configs.json) are matched in Python by
+    walking candidate elements with the subject's tag and checking their
+    parents once. Anything else goes through soupsieve.
+    """
+
+    def __init__(self, selector: str):
+        self.selector = selector
+        self.pattern = soupsieve.compile(selector)
+        self.alternatives = self._parse_alternatives(selector)
+        self.tags = None
+        if self.alternatives and all(subject.tag for _, subject in self.alternatives):
+            self.tags = sorted({subject.tag for _, subject in self.alternatives})
+
+    @staticmethod
+    def _parse_alternatives(selector: str) -> Optional[List[Tuple[Optional[SimpleSelector], SimpleSelector]]]:
+        alternatives = []
+        for alternative in selector.split(','):
+            parts = alternative.split()
+            if not 1 <= len(parts) <= 2:
+                return None
+            compounds = [SimpleSelector.parse(part) for part in parts]
+            if None in compounds:
+                return None
+            alternatives.append((compounds[0], compounds[1]) if len(compounds) == 2
+                                else (None, compounds[0]))
+        return alternatives
+
+    def _matches(self, element: Tag) -> bool:
+        for ancestor, subject in self.alternatives:
+            if subject.matches(element) and (
+                    ancestor is None or any(ancestor.matches(p) for p in element.parents
+                                            if p.name != '[document]')):
+                return True
+        return False
+
+    def matches_path(self, path: List[Any]) -> bool:
+        """Match the last node of a root-to-node path, for streamed pages"""
+        node = path[-1]
+        for ancestor, subject in self.alternatives:
+            if subject.matches(node) and (
+                    ancestor is None or any(ancestor.matches(p) for p in path[:-1])):
+                return True
+        return False
+
+    def select_one(self, root: Tag) -> Optional[Tag]:
+        if self.alternatives is None:
+            return self.pattern.select_one(root)
+        for element in root.find_all(self.tags or True):
+            if self._matches(element):
+                return element
+        return None
+
+    def select(self, root: Tag) -> List[Tag]:
+        if self.alternatives is None:
+            return self.pattern.select(root)
+        return [element for element in root.find_all(self.tags or True)
+                if self._matches(element)]
+
+
+class CompiledSoup:
+    """Soup view whose select/select_one use precompiled selectors
+
+    Lets the generic HTMLParser chains run on compiled selectors without
+    duplicating their extraction logic.
+    """
+
+    def __init__(self, soup: BeautifulSoup, compiled: Dict[str, CompiledSelector]):
+        self.soup = soup
+        self.compiled = compiled
+
+    def select_one(self, selector: str) -> Optional[Tag]:
+        compiled = self.compiled.get(selector)
+        return compiled.select_one(self.soup) if compiled else self.soup.select_one(selector)
+
+    def select(self, selector: str) -> List[Tag]:
+        compiled = self.compiled.get(selector)
+        return compiled.select(self.soup) if compiled else self.soup.select(selector)
+
+    def find_all(self, *args, **kwargs) -> List[Tag]:
+        return self.soup.find_all(*args, **kwargs)
+
+    __call__ = find_all
+
+
+GENERIC_SELECTORS = {
+    selector: CompiledSelector(selector)
+    for selector in (HTMLParser.TITLE_SELECTORS + HTMLParser.CONTENT_SELECTORS +
+                     HTMLParser.AUTHOR_SELECTORS + HTMLParser.DATE_SELECTORS +
+                     [HTMLParser.TAG_SELECTOR, HTMLParser.IMAGE_SELECTOR])
+}
+
+
+class SinglePassExtractor:
+    """The generic HTMLParser chain evaluated in one walk over the tree
+
+    Instead of a select_one/select scan per selector, the walk records the
+    first match of every title, content, author and date selector plus all
+    tags, paragraphs and article images, then resolves them in HTMLParser's
+    order of preference. The result is the same as calling extract_title,
+    extract_body and extract_metadata in turn: elements under
+    script/style/nav/header/footer count for the title (read before they
+    are removed) but for nothing else.
+    """
+
+    REMOVED_TAGS = frozenset({'script', 'style', 'nav', 'header', 'footer'})
+    CHAINS = {
+        'title': HTMLParser.TITLE_SELECTORS,
+        'content': HTMLParser.CONTENT_SELECTORS,
+        'author': HTMLParser.AUTHOR_SELECTORS,
+        'date': HTMLParser.DATE_SELECTORS
+    }
+
+    def __init__(self):
+        # Rules keyed by tag name, so most elements cost one dict lookup
+        self.rules: Dict[str, List[Tuple[Any, ...]]] = {}
+        for chain, selectors in self.CHAINS.items():
+            for position, selector in enumerate(selectors):
+                (_, compound), = self._alternatives(selector)
+                self._add_rule(compound, ('first', chain, position, compound))
+        for _, compound in self._alternatives(HTMLParser.TAG_SELECTOR):
+            self._add_rule(compound, ('tag', compound))
+        self._add_rule(SimpleSelector.parse('p'), ('paragraph',))
+        # Image selectors are `scope img` pairs; open scopes are tracked as bits
+        for bit, (scope, compound) in enumerate(self._alternatives(HTMLParser.IMAGE_SELECTOR)):
+            self._add_rule(scope, ('scope', 1 << bit, scope))
+            self._add_rule(compound, ('image', 1 << bit, compound))
+
+    @staticmethod
+    def _alternatives(selector: str) -> List[Tuple[Optional[SimpleSelector], SimpleSelector]]:
+        alternatives = GENERIC_SELECTORS[selector].alternatives
+        if not alternatives or not all(subject.tag for _, subject in alternatives):
+            raise ValueError(f"Generic selector needs a tag for single-pass matching: {selector}")
+        return alternatives
+
+    def _add_rule(self, compound: SimpleSelector, rule: Tuple[Any, ...]) -> None:
+        self.rules.setdefault(compound.tag, []).append(rule)
+
+    def _walk(self, soup: BeautifulSoup) -> Dict[str, Any]:
+        """Collect every candidate element in one pre-order traversal"""
+        found = {chain: [None] * len(selectors) for chain, selectors in self.CHAINS.items()}
+        found.update(tags=[], paragraphs=[], images=[], removed=[])
+        rules = self.rules
+        removed_tags = self.REMOVED_TAGS
+        stack = [(child, False, 0) for child in reversed(soup.contents) if isinstance(child, Tag)]
+        while stack:
+            element, removed, scopes = stack.pop()
+            name = element.name
+            if not removed and name in removed_tags:
+                removed = True
+                found['removed'].append(element)
+            tagged = False
+            for rule in rules.get(name, ()):
+                kind = rule[0]
+                if kind == 'first':
+                    _, chain, position, compound = rule
+                    slots = found[chain]
+                    if (slots[position] is None and (chain == 'title' or not removed)
+                            and compound.matches(element)):
+                        slots[position] = element
+                elif removed:
+                    continue
+                elif kind == 'tag':
+                    if not tagged and rule[1].matches(element):
+                        found['tags'].append(element)
+                        tagged = True
+                elif kind == 'paragraph':
+                    found['paragraphs'].append(element)
+                elif kind == 'scope':
+                    if rule[2].matches(element):
+                        scopes |= rule[1]
+                elif scopes & rule[1] and rule[2].matches(element):
+                    if not found['images'] or found['images'][-1] is not element:
+                        found['images'].append(element)
+            children = [child for child in element.contents if isinstance(child, Tag)]
+            for child in reversed(children):
+                stack.append((child, removed, scopes))
+        return found
+
+    @staticmethod
+    def _value(element: Tag) -> str:
+        if element.name == 'meta':
+            return element.get('content', '').strip()
+        if element.name == 'time':
+            return element.get('datetime', '').strip()
+        return element.get_text(strip=True)
+
+    def extract(self,
+                soup: BeautifulSoup,
+                measures: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Optional[str], ArticleMetadata]:
+        """Return (title, body, metadata) for a freshly parsed page
+
+        `measures` is filled as by HTMLParser.extract_body.
+        """
+        found = self._walk(soup)
+        title = next((self._value(e) for e in found['title'] if e is not None), None)
+
+        # Text below must not include removed subtrees, as in extract_body
+        for element in found['removed']:
+            element.decompose()
+
+        body = None
+        for container in found['content']:
+            if container is not None:
+                text = HTMLParser.clean_text(container.get_text(separator='\n', strip=True))
+                if len(text) > 100:
+                    body = text
+                    HTMLParser.measure_blocks([container], measures)
+                    break
+        if body is None and found['paragraphs']:
+            texts = (p.get_text(strip=True) for p in found['paragraphs'])
+            text = '\n'.join(t for t in texts if t)
+            if len(text) > 100:
+                body = text
+                HTMLParser.measure_blocks(found['paragraphs'], measures)
+
+        metadata = ArticleMetadata()
+        metadata.author = next((self._value(e) for e in found['author'] if e is not None), None)
+        metadata.published_date = next((self._value(e) for e in found['date'] if e is not None), None)
+        metadata.tags = [tag for tag in map(self._value, found['tags']) if tag]
+        for img in found['images']:
+            src = img.get('src', '')
+            if src and not src.startswith('data:'):
+                metadata.images.append(src)
+        return title, body, metadata
+
+
+GENERIC_EXTRACTOR = SinglePassExtractor()
+
+
+class RemovalSet:
+    """removeSelectors compiled into set lookups for one pass over a subtree
+
+    Plain tag, .class, #id and tag[attr] selectors are matched with set
+    membership; anything more complex falls back to soupsieve.
+    """
+
+    def __init__(self, selectors: List[str]):
+        self.tags, self.classes, self.ids = set(), set(), set()
+        self.tag_attrs: Dict[str, List[str]] = {}
+        complex_selectors = []
+        for selector in selectors:
+            match = _SIMPLE_SELECTOR.match(selector.strip())
+            if not match:
+                complex_selectors.append(selector)
+                continue
+            tag, cls, element_id, attr_tag, attr = match.groups()
+            if tag:
+                self.tags.add(tag.lower())
+            elif cls:
+                self.classes.add(cls)
+            elif element_id:
+                self.ids.add(element_id)
+            else:
+                self.tag_attrs.setdefault(attr_tag.lower(), []).append(attr)
+        self.fallback = soupsieve.compile(', '.join(complex_selectors)) if complex_selectors else None
+
+    def _matches(self, element: Tag) -> bool:
+        if element.name in self.tags:
+            return True
+        if self.classes:
+            classes = element.get('class')
+            if classes and not self.classes.isdisjoint(classes):
+                return True
+        if self.ids and element.get('id') in self.ids:
+            return True
+        for attr in self.tag_attrs.get(element.name, ()):
+            if element.has_attr(attr):
+                return True
+        return False
+
+    def apply(self, root: Tag) -> None:
+        """Decompose every matching element under root"""
+        doomed = root.find_all(self._matches)
+        if self.fallback:
+            doomed.extend(self.fallback.select(root))
+        for element in doomed:
+            # Children of an element removed earlier are already gone
+            if not element.decomposed:
+                element.decompose()
+
+
+class ExtractionPlan:
+    """Precompiled selectors for one site from website_configs.json
+
+    Site selectors are tried first; the generic HTMLParser chain is only
+    used when they miss, so hot sites skip most wasted select_one calls.
+    """
+
+    def __init__(self, site: str, config: Dict[str, Any]):
+        self.site = site
+        selectors = config.get('selectors', {})
+        self.title = self._compile(selectors.get('title'))
+        self.content = self._compile(selectors.get('content') or selectors.get('article'))
+        self.images = self._compile(selectors.get('images'))
+        self.remove_selectors = config.get('removeSelectors', [])
+        self.remove = RemovalSet(self.remove_selectors)
+        # Identifies the selector set, so memoized results from an older
+        # config are not reused
+        self.fingerprint = hashlib.blake2b(
+            json.dumps([site, selectors, config.get('removeSelectors', [])],
+                       sort_keys=True).encode('utf-8'),
+            digest_size=8
+        ).hexdigest()
+
+    def _compile(self, selector: Optional[str]) -> Optional[CompiledSelector]:
+        if not selector:
+            return None
+        try:
+            return CompiledSelector(selector)
+        except soupsieve.SelectorSyntaxError as e:
+            logger.warning(f"Ignoring invalid selector for {self.site}: {selector} ({e})")
+            return None
+
+    def extract_title(self, soup: BeautifulSoup) -> Optional[str]:
+        if self.title:
+            element = self.title.select_one(soup)
+            if element:
+                title = element.get_text(strip=True)
+                if title:
+                    return title
+        return HTMLParser.extract_title(CompiledSoup(soup, GENERIC_SELECTORS))
+
+    def extract_body(self, soup: BeautifulSoup, measures: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        if self.content:
+            for element in soup(['script', 'style', 'nav', 'header', 'footer']):
+                element.decompose()
+            container = self.content.select_one(soup)
+            if container:
+                # Site removal rules only need to run inside the article
+                self.remove.apply(container)
+                text = HTMLParser.clean_text(container.get_text(separator='\n', strip=True))
+                if len(text) > 100:
+                    HTMLParser.measure_blocks([container], measures)
+                    return text
+        return HTMLParser.extract_body(CompiledSoup(soup, GENERIC_SELECTORS), measures)
+
+    def extract_metadata(self, soup: BeautifulSoup) -> ArticleMetadata:
+        generic = CompiledSoup(soup, GENERIC_SELECTORS)
+        if not self.images:
+            return HTMLParser.extract_metadata(generic)
+        metadata = HTMLParser.extract_metadata(generic, include_images=False)
+        for img in self.images.select(soup):
             src = img.get('src', '')
             if src and not src.startswith('data:'):
                 metadata.images.append(src)
-        
         return metadata
 
 
+class ExtractionPlans:
+    """All site plans, compiled once and looked up by site key"""
+
+    def __init__(self, configs: Dict[str, Dict[str, Any]]):
+        self.plans = {site: ExtractionPlan(site, config)
+                      for site, config in configs.items()
+                      if config.get('selectors')}
+
+    def for_site(self, site: Optional[str]) -> Optional[ExtractionPlan]:
+        return self.plans.get(site) if site else None
+
+
+class _PullNode:
+    """Just enough of a bs4 Tag for SimpleSelector.matches on a streamed element"""
+    __slots__ = ('name', 'attrs')
+
+    MULTI_VALUED = ('class', 'rel')
+
+    def __init__(self, element: Any):
+        self.name = element.tag if isinstance(element.tag, str) else ''
+        self.attrs = element.attrib
+
+    def get(self, name: str, default: Any = None) -> Any:
+        value = self.attrs.get(name)
+        if value is None:
+            return default
+        return value.split() if name in self.MULTI_VALUED else value
+
+
+class ArticleBoundary:
+    """Watches a page as it streams in and says when the article is complete
+
+    Chunks are fed to lxml's incremental HTML parser. The article is complete
+    once the first element matching the site's content selector has closed
+    with more than 100 characters of text, and every required metadata
+    field (title, author, published_date) has matched one of its selectors.
+    Tags and images after the container are not waited for.
+    """
+
+    FIELD_SELECTORS = {
+        'title': HTMLParser.TITLE_SELECTORS,
+        'author': HTMLParser.AUTHOR_SELECTORS,
+        'published_date': HTMLParser.DATE_SELECTORS
+    }
+    DEFAULT_FIELDS = ('title', 'author', 'published_date')
+
+    def __init__(self, plan: ExtractionPlan, fields: Optional[Iterable[str]] = None):
+        from lxml import etree
+        self._parser = etree.HTMLPullParser(events=('start', 'end'))
+        self.content = plan.content
+        self._pending: Dict[str, List[CompiledSelector]] = {}
+        for name in fields if fields is not None else self.DEFAULT_FIELDS:
+            selectors = [GENERIC_SELECTORS[selector] for selector in self.FIELD_SELECTORS[name]]
+            if name == 'title' and plan.title and plan.title.alternatives is not None:
+                selectors.insert(0, plan.title)
+            self._pending[name] = selectors
+        self._path: List[_PullNode] = []
+        self._container = None
+        self.container_done = False
+        # The first container was too short, so extraction will fall back to
+        # the generic chain over the whole page; stop watching
+        self.gave_up = False
+
+    @staticmethod
+    def supports(plan: Optional[ExtractionPlan]) -> bool:
+        """Whether a plan's content selector can be matched while streaming"""
+        return bool(plan and plan.content and plan.content.alternatives is not None)
+
+    @property
+    def complete(self) -> bool:
+        return self.container_done and not self._pending
+
+    def feed(self, chunk: bytes) -> bool:
+        """Feed the next chunk and return whether the article is complete"""
+        if self.gave_up:
+            return False
+        self._parser.feed(chunk)
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                self._path.append(_PullNode(element))
+                self._match_start(element)
+            else:
+                if self._path:
+                    self._path.pop()
+                self._match_end(element)
+        return self.complete
+
+    def _match_start(self, element: Any) -> None:
+        path = self._path
+        for name, selectors in list(self._pending.items()):
+            if any(selector.matches_path(path) for selector in selectors):
+                del self._pending[name]
+        if self._container is None and not self.container_done and self.content.matches_path(path):
+            self._container = element
+
+    def _match_end(self, element: Any) -> None:
+        if element is self._container:
+            self._container = None
+            text = ''.join(piece.strip() for piece in element.itertext())
+            if len(text) > 100:
+                self.container_done = True
+            else:
+                self.gave_up = True
+        if self._container is None:
+            # Nothing outside the container is needed again; keep the
+            # partial tree small
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+
+class ParserBackend:
+    """One way of turning page bytes into (title, body, metadata)
+
+    Backends are stateless apart from caches, so one instance is shared by
+    every call in a process.
+    """
+
+    name = ''
+
+    def available(self) -> bool:
+        return True
+
+    def parse(self, content: bytes, encoding: Optional[str]) -> Any:
+        raise NotImplementedError
+
+    def extract_tree(self,
+                     tree: Any,
+                     plan: Optional[ExtractionPlan],
+                     measures: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Optional[str], ArticleMetadata]:
+        raise NotImplementedError
+
+    def release(self, tree: Any) -> None:
+        """Free a parsed tree once extraction is done"""
+
+    def extract(self,
+                content: bytes,
+                encoding: Optional[str],
+                plan: Optional[ExtractionPlan],
+                timings: Optional[Dict[str, float]] = None,
+                before_release: Optional[Callable[[], None]] = None,
+                measures: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Optional[str], ArticleMetadata]:
+        """Parse and extract, storing seconds spent in timings['parse'/'extract']
+
+        The body's block and link texts go in measures['blocks'/'links'].
+        """
+        start = time.perf_counter()
+        tree = self.parse(content, encoding)
+        parsed = time.perf_counter()
+        try:
+            return self.extract_tree(tree, plan, measures)
+        finally:
+            if before_release:
+                before_release()
+            self.release(tree)
+            if timings is not None:
+                timings['parse'] = parsed - start
+                timings['extract'] = time.perf_counter() - parsed
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup with a given tree builder, using the compiled extractors"""
+
+    def __init__(self, name: str, features: str, module: Optional[str] = None):
+        self.name = name
+        self.features = features
+        self.module = module
+
+    def available(self) -> bool:
+        if not self.module:
+            return True
+        try:
+            __import__(self.module)
+            return True
+        except ImportError:
+            return False
+
+    def parse(self, content, encoding):
+        return BeautifulSoup(content, self.features, from_encoding=encoding)
+
+    def extract_tree(self, soup, plan, measures=None):
+        if plan is None:
+            return GENERIC_EXTRACTOR.extract(soup, measures)
+        title = plan.extract_title(soup)
+        body = plan.extract_body(soup, measures)
+        return title, body, plan.extract_metadata(soup)
+
+    def release(self, soup):
+        # The tree is full of parent/sibling reference cycles; breaking
+        # them frees it now instead of at the next full GC
+        soup.decompose()
+
+
+class TreeBackend(ParserBackend):
+    """HTMLParser's selector chains over a non-BeautifulSoup tree
+
+    Subclasses supply parsing and a handful of node primitives; the
+    selector order and fallbacks are the same as the soup path.
+    """
+
+    REMOVED_SELECTOR = 'script, style, nav, header, footer'
+
+    def select(self, root: Any, selector: str) -> List[Any]:
+        raise NotImplementedError
+
+    def select_one(self, root: Any, selector: str) -> Optional[Any]:
+        matches = self.select(root, selector)
+        return matches[0] if matches else None
+
+    def tag_name(self, node: Any) -> str:
+        raise NotImplementedError
+
+    def attr(self, node: Any, name: str) -> str:
+        raise NotImplementedError
+
+    def text(self, node: Any, separator: str = '') -> str:
+        """Stripped, non-empty text pieces joined with separator"""
+        raise NotImplementedError
+
+    def remove(self, node: Any) -> None:
+        raise NotImplementedError
+
+    def children(self, node: Any) -> List[Any]:
+        """Element children, without text or comment nodes"""
+        raise NotImplementedError
+
+    def _measure(self, roots: List[Any], measures: Optional[Dict[str, Any]]) -> None:
+        """HTMLParser.measure_blocks for this backend's nodes"""
+        if measures is None:
+            return
+        measures['blocks'] = block_texts(roots, self.tag_name, self.children,
+                                         lambda node: self.text(node, ' '))
+        measures['links'] = [self.text(link, ' ')
+                             for root in roots for link in self.select(root, 'a')]
+
+    def _value(self, node: Any) -> str:
+        name = self.tag_name(node)
+        if name == 'meta':
+            return self.attr(node, 'content').strip()
+        if name == 'time':
+            return self.attr(node, 'datetime').strip()
+        return self.text(node)
+
+    def _first_value(self, root: Any, selectors: List[str]) -> Optional[str]:
+        for selector in selectors:
+            node = self.select_one(root, selector)
+            if node is not None:
+                return self._value(node)
+        return None
+
+    def _body(self,
+              root: Any,
+              plan: Optional[ExtractionPlan],
+              measures: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        for node in self.select(root, self.REMOVED_SELECTOR):
+            self.remove(node)
+        if plan and plan.content:
+            container = self.select_one(root, plan.content.selector)
+            if container is not None:
+                for selector in plan.remove_selectors:
+                    for node in self.select(container, selector):
+                        self.remove(node)
+                text = HTMLParser.clean_text(self.text(container, '\n'))
+                if len(text) > 100:
+                    self._measure([container], measures)
+                    return text
+        for selector in HTMLParser.CONTENT_SELECTORS:
+            container = self.select_one(root, selector)
+            if container is not None:
+                text = HTMLParser.clean_text(self.text(container, '\n'))
+                if len(text) > 100:
+                    self._measure([container], measures)
+                    return text
+        paragraphs = self.select(root, 'p')
+        texts = (self.text(node) for node in paragraphs)
+        text = '\n'.join(t for t in texts if t)
+        if len(text) > 100:
+            self._measure(paragraphs, measures)
+            return text
+        return None
+
+    def extract_tree(self, root, plan, measures=None):
+        title = None
+        if plan and plan.title:
+            node = self.select_one(root, plan.title.selector)
+            title = self.text(node) if node is not None else None
+        if not title:
+            title = self._first_value(root, HTMLParser.TITLE_SELECTORS)
+
+        body = self._body(root, plan, measures)
+
+        metadata = ArticleMetadata()
+        metadata.author = self._first_value(root, HTMLParser.AUTHOR_SELECTORS)
+        metadata.published_date = self._first_value(root, HTMLParser.DATE_SELECTORS)
+        metadata.tags = [tag for tag in map(self._value, self.select(root, HTMLParser.TAG_SELECTOR))
+                         if tag]
+        image_selector = plan.images.selector if plan and plan.images else HTMLParser.IMAGE_SELECTOR
+        for img in self.select(root, image_selector):
+            src = self.attr(img, 'src')
+            if src and not src.startswith('data:'):
+                metadata.images.append(src)
+        return title, body, metadata
+
+
+class LxmlBackend(TreeBackend):
+    """lxml.html with cssselect-compiled XPath (needs the cssselect package)"""
+
+    name = 'lxml-html'
+
+    def __init__(self):
+        self._selectors: Dict[str, Any] = {}
+        self._parsers: Dict[str, Any] = {}
+
+    def available(self) -> bool:
+        try:
+            import lxml.html  # noqa: F401
+            import cssselect  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def parse(self, content, encoding):
+        import lxml.html
+        # libxml2 assumes latin-1 for undeclared pages; the web default is UTF-8
+        encoding = (encoding or EncodingDetector.find_declared_encoding(content, is_html=True)
+                    or 'utf-8')
+        return lxml.html.document_fromstring(content, parser=self._parser(encoding))
+
+    def _parser(self, encoding: str) -> Any:
+        parser = self._parsers.get(encoding)
+        if parser is None:
+            import lxml.html
+            parser = self._parsers[encoding] = lxml.html.HTMLParser(encoding=encoding)
+        return parser
+
+    def select(self, root, selector):
+        compiled = self._selectors.get(selector)
+        if compiled is None:
+            from lxml.cssselect import CSSSelector
+            compiled = self._selectors[selector] = CSSSelector(selector, translator='html')
+        return compiled(root)
+
+    def tag_name(self, node):
+        return node.tag
+
+    def attr(self, node, name):
+        return node.get(name) or ''
+
+    def text(self, node, separator=''):
+        return separator.join(t for t in (piece.strip() for piece in node.itertext()) if t)
+
+    def remove(self, node):
+        # drop_tree keeps the tail text, which belongs to the parent
+        node.drop_tree()
+
+    def children(self, node):
+        return [child for child in node if isinstance(child.tag, str)]
+
+
+class SelectolaxBackend(TreeBackend):
+    """selectolax's lexbor engine (needs the selectolax package)"""
+
+    name = 'selectolax'
+
+    def available(self) -> bool:
+        try:
+            from selectolax.lexbor import LexborHTMLParser  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def parse(self, content, encoding):
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser(content.decode(encoding, 'replace') if encoding else content)
+
+    def select(self, root, selector):
+        return root.css(selector)
+
+    def select_one(self, root, selector):
+        return root.css_first(selector)
+
+    def tag_name(self, node):
+        return node.tag
+
+    def attr(self, node, name):
+        return node.attributes.get(name) or ''
+
+    def text(self, node, separator=''):
+        pieces = node.text(separator='\x00', strip=True).split('\x00')
+        return separator.join(piece for piece in pieces if piece)
+
+    def remove(self, node):
+        node.decompose()
+
+    def children(self, node):
+        return list(node.iter())
+
+
+PARSER_BACKENDS: Dict[str, ParserBackend] = {
+    backend.name: backend for backend in (
+        SoupBackend('html.parser', 'html.parser'),
+        SoupBackend('bs4-lxml', 'lxml', module='lxml'),
+        LxmlBackend(),
+        SelectolaxBackend()
+    )
+}
+DEFAULT_PARSER_BACKEND = 'html.parser'
+_unavailable_backends_logged = set()
+
+
+def resolve_parser_backend(name: Optional[str]) -> str:
+    """Map a requested backend to one that can run here"""
+    name = name or DEFAULT_PARSER_BACKEND
+    backend = PARSER_BACKENDS.get(name)
+    if backend is not None and backend.available():
+        return name
+    if name not in _unavailable_backends_logged:
+        _unavailable_backends_logged.add(name)
+        logger.warning(f"Parser backend {name} is not available, using {DEFAULT_PARSER_BACKEND}")
+    return DEFAULT_PARSER_BACKEND
+
+
+def extract_article(content: bytes,
+                    encoding: Optional[str] = None,
+                    plan: Optional[ExtractionPlan] = None,
+                    backend: Optional[str] = None,
+                    profile: Optional[ProfileSettings] = None) -> Dict[str, Any]:
+    """Parse raw page bytes and return a compact, picklable extraction result
+
+    Runs either inline or inside a ParseExecutor worker process, so it only
+    takes and returns plain data - the tree never leaves this function.
+    Without a site plan the generic HTMLParser chain is used. If the chosen
+    parser backend fails, the page is retried with html.parser. The body's
+    content-quality measurements are returned under 'quality'. Seconds
+    spent parsing and extracting are returned under 'timings'; with
+    `profile` the work is traced and returned under 'profile' instead.
+    """
+    if profile is None:
+        return _extract_fields(content, encoding, plan, backend, {})
+    with ArticleProfile(profile) as article_profile:
+        result = _extract_fields(content, encoding, plan, backend, {},
+                                 article_profile.snapshot_allocations)
+    # Traced timings are inflated, so keep them out of the latency histograms
+    result['timings'] = {}
+    result['profile'] = article_profile.result()
+    return result
+
+
+def _extract_fields(content: bytes,
+                    encoding: Optional[str],
+                    plan: Optional[ExtractionPlan],
+                    backend: Optional[str],
+                    timings: Dict[str, float],
+                    before_release: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    name = resolve_parser_backend(backend)
+    measures: Dict[str, Any] = {}
+    try:
+        title, body, metadata = PARSER_BACKENDS[name].extract(content, encoding, plan,
+                                                              timings, before_release, measures)
+    except Exception as e:
+        if name == DEFAULT_PARSER_BACKEND:
+            raise
+        logger.warning(f"{name} parser failed ({e}), retrying with {DEFAULT_PARSER_BACKEND}")
+        measures.clear()
+        title, body, metadata = PARSER_BACKENDS[DEFAULT_PARSER_BACKEND].extract(
+            content, encoding, plan, timings, before_release, measures)
+    return {
+        'title': title,
+        'body': body,
+        'summary': HTMLParser.extract_summary(body),
+        'quality': score_content(body, content, measures.get('blocks'),
+                                 measures.get('links')) if body else None,
+        'metadata': {
+            'author': metadata.author,
+            'published_date': metadata.published_date,
+            'tags': metadata.tags,
+            'images': metadata.images
+        },
+        'timings': timings
+    }
+
+
+# Plans compiled once per parse worker process by _init_parse_worker
+_worker_plans: Optional[ExtractionPlans] = None
+
+
+def _init_parse_worker(site_configs: Dict[str, Dict[str, Any]]) -> None:
+    global _worker_plans
+    _worker_plans = ExtractionPlans(site_configs)
+
+
+def _extract_in_worker(content: bytes,
+                       encoding: Optional[str],
+                       site: Optional[str],
+                       backend: Optional[str] = None,
+                       profile: Optional[ProfileSettings] = None) -> Dict[str, Any]:
+    plan = _worker_plans.for_site(site) if _worker_plans else None
+    return extract_article(content, encoding, plan, backend, profile)
+
+
+class ParseExecutor:
+    """Process pool that keeps HTML parsing off the event loop"""
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 backlog: Optional[int] = None,
+                 site_configs: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.site_configs = site_configs or {}
+        # Bound queued parse jobs so fetchers stall instead of piling up pages
+        self.backlog = backlog or self.workers * 2
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def submit(self,
+                     content: bytes,
+                     encoding: Optional[str] = None,
+                     site: Optional[str] = None,
+                     backend: Optional[str] = None,
+                     profile: Optional[ProfileSettings] = None) -> asyncio.Future:
+        """Queue extract_article in a worker, waiting while the backlog is full"""
+        self._ensure_pool()
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, _extract_in_worker,
+                                      content, encoding, site, backend, profile)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _ensure_pool(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_init_parse_worker,
+                                             initargs=(self.site_configs,))
+            self._slots = asyncio.Semaphore(self.backlog)
+
+    async def start(self) -> None:
+        """Start every worker and run one parse in each, so the first real
+        pages do not pay for process start-up and imports"""
+        self._ensure_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _extract_in_worker, b'<html></html>', None, None)
+            for _ in range(self.workers)))
+
+    async def parse(self,
+                    content: bytes,
+                    encoding: Optional[str] = None,
+                    site: Optional[str] = None,
+                    backend: Optional[str] = None,
+                    profile: Optional[ProfileSettings] = None) -> Dict[str, Any]:
+        """Run extract_article in a worker process"""
+        return await (await self.submit(content, encoding, site, backend, profile))
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+
+def _compact_metadata(data: Dict[str, Any]) -> ArticleMetadata:
+    """Build ArticleMetadata with author and tags interned
+
+    The same few authors and tags repeat across thousands of articles in a
+    batch, so each distinct string is stored once.
+    """
+    return ArticleMetadata(
+        author=_intern(data['author']),
+        published_date=data['published_date'],
+        tags=[sys.intern(tag) for tag in data['tags']],
+        images=data['images']
+    )
+
+
 class GolfArticleProcessor:
     """Main processor class for golf articles"""
     
@@ -233,142 +1390,840 @@ class GolfArticleProcessor:
                  max_concurrent: int = 10,
                  timeout: int = 30,
                  max_retries: int = 3,
-                 rate_limit: int = 20):
+                 retry_backoff: float = 1.0,
+                 max_retry_delay: float = 60.0,
+                 circuit_threshold: int = 10,
+                 circuit_cooldown: float = 30.0,
+                 rate_limit: int = 20,
+                 global_rate_limit: Optional[int] = None,
+                 per_site_concurrent: int = 4,
+                 adaptive_concurrency: bool = True,
+                 site_configs: Optional[SiteConfigRegistry] = None,
+                 dns_cache_ttl: int = 300,
+                 keepalive_timeout: float = 15.0,
+                 prewarm: bool = True,
+                 parse_in_processes: bool = False,
+                 parse_workers: Optional[int] = None,
+                 parse_backlog: Optional[int] = None,
+                 stream_window: Optional[int] = None,
+                 cache_dir: Optional[Path] = None,
+                 cache_max_bytes: int = 512 * 1024 * 1024,
+                 cache_ttl: int = 3600,
+                 seen_urls_dir: Optional[Path] = None,
+                 published_dir: Optional[Path] = None,
+                 near_duplicates_dir: Optional[Path] = None,
+                 near_duplicate_threshold: float = 0.8,
+                 drop_near_duplicates: bool = False,
+                 quality_gate: bool = True,
+                 quality_thresholds: Optional[Dict[str, Optional[float]]] = None,
+                 image_dir: Optional[Path] = None,
+                 max_image_bytes: int = 5 * 1024 * 1024,
+                 image_concurrency: int = 8,
+                 use_site_plans: bool = True,
+                 parser_backend: str = DEFAULT_PARSER_BACKEND,
+                 stream_fetch: bool = False,
+                 max_page_bytes: int = 2 * 1024 * 1024,
+                 stream_chunk_size: int = 16 * 1024,
+                 spill_bodies: bool = False,
+                 spill_dir: Optional[Path] = None,
+                 result_sink: Optional[JsonlSink] = None,
+                 journal_path: Optional[Path] = None,
+                 metrics_path: Optional[Path] = None,
+                 metrics_port: Optional[int] = None,
+                 profiler: Optional[PipelineProfiler] = None):
         self.max_concurrent = max_concurrent
         self.timeout = ClientTimeout(total=timeout)
+        # Failed fetches are retried up to max_retries times after
+        # Retry-After or a jittered backoff, waiting outside the fetch slot;
+        # hosts failing circuit_threshold times in a row fail fast for a
+        # cooldown instead of tying up slots and connections
         self.max_retries = max_retries
-        self.rate_limiter = RateLimiter(max_requests=rate_limit)
-        self.session: Optional[ClientSession] = None
+        self.retry_backoff = retry_backoff
+        self.max_retry_delay = max_retry_delay
+        self.circuit_threshold = circuit_threshold
+        self.circuit_cooldown = circuit_cooldown
+        self._site_breakers: Dict[str, CircuitBreaker] = {}
+        self.per_site_concurrent = per_site_concurrent
+        self.adaptive_concurrency = adaptive_concurrency
+        self.site_configs = site_configs or SiteConfigRegistry.load()
+        self.rate_limiter = RateLimiter(
+            max_requests=rate_limit,
+            global_max_requests=global_rate_limit,
+            site_configs=self.site_configs
+        )
+        self.dns_cache_ttl = dns_cache_ttl
+        # How long idle keep-alive connections stay pooled (aiohttp's default
+        # is 15s; a long-running daemon keeps them longer between jobs)
+        self.keepalive_timeout = keepalive_timeout
+        self.prewarm = prewarm
+        # One session (and connection pool) plus one concurrency window per
+        # site, so a slow host can only ever tie up its own slots. Windows
+        # start at the site's maxConcurrent and, unless adaptive_concurrency
+        # is off, grow and shrink (AIMD) with the host's latency and errors
+        self._sessions: Dict[str, ClientSession] = {}
+        self._site_limiters: Dict[str, AimdLimiter] = {}
+        self._global_semaphore = asyncio.Semaphore(max_concurrent)
         self.parser = HTMLParser()
+        self.extraction_plans = ExtractionPlans(
+            self.site_configs.configs if use_site_plans else {})
+        # Run-wide parser backend; sites may override it with `parserBackend`
+        self.parser_backend = parser_backend
+        self.parse_executor = (
+            ParseExecutor(workers=parse_workers, backlog=parse_backlog,
+                          site_configs=self.site_configs.configs if use_site_plans else {})
+            if parse_in_processes else None
+        )
+        # Tasks kept in flight by iter_articles; extra headroom over the fetch
+        # slots lets other sites progress while one site's slots are full
+        self.stream_window = stream_window or max_concurrent * 4
+        # Optional on-disk cache: fresh pages are served without a request,
+        # stale ones are revalidated with conditional GETs
+        self.response_cache = (
+            ResponseCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+        )
+        self.cache_ttl = cache_ttl
+        # Streaming fetch: read pages in chunks and hang up once the site's
+        # article container and metadata are in, or at max_page_bytes
+        self.stream_fetch = stream_fetch
+        self.max_page_bytes = max_page_bytes
+        self.stream_chunk_size = stream_chunk_size
+        self._streaming_unavailable = False
+        # Bodies moved to a memory-mapped side file once an article is
+        # finished; records keep only an offset, which keeps the file open
+        self.body_spill = SpillFile(spill_dir) if spill_bodies else None
+        # Every finished article is appended here as it completes; the sink
+        # is closed together with the processor
+        self.result_sink = result_sink
+        # Durable per-URL progress of process_articles jobs, for resume()
+        self.journal = JobJournal(journal_path) if journal_path else None
+        self.job_id: Optional[str] = None
+        if self.journal and self.result_sink:
+            self.result_sink.on_written = self.journal.note_locations
+        # Canonical URLs already processed successfully (across runs) and
+        # those in flight, each with the job fetching it and a future of its
+        # article; variants of either are skipped within a job, while other
+        # jobs wait for the fetch and share its article
+        self.seen_urls = SeenUrlStore(seen_urls_dir) if seen_urls_dir else None
+        self._in_flight_urls: Dict[str, Tuple[object, asyncio.Future]] = {}
+        # Articles already written under golf_content (indexed by source URL,
+        # refreshed from file mtimes at the start of every job)
+        self.published = PublishedIndex(published_dir) if published_dir else None
+        if self.published:
+            self.published.refresh()
+        # MinHash/LSH index of bodies (across runs): near-copies of an earlier
+        # article are flagged with near_duplicate_of, or dropped if asked
+        self.near_duplicates = (
+            NearDuplicateIndex(near_duplicates_dir, threshold=near_duplicate_threshold)
+            if near_duplicates_dir else None
+        )
+        self.drop_near_duplicates = drop_near_duplicates
+        # Bodies that are too short, link-heavy or boilerplate (menus,
+        # galleries, video stubs, paywall teasers) end as LOW_QUALITY before
+        # any downstream work; sites can tune this with a `quality` block,
+        # and quality_gate=False turns it off
+        self.quality_gate = quality_gate
+        self.quality_thresholds = {**DEFAULT_THRESHOLDS, **(quality_thresholds or {})}
+        # Article images downloaded over the per-site sessions into a
+        # content-addressed store, deduplicated by URL and content hash
+        self.image_harvester = (
+            ImageHarvester(image_dir, self._get_session, self.rate_limiter,
+                           max_bytes=max_image_bytes, concurrency=image_concurrency)
+            if image_dir else None
+        )
+        # Per-phase latency histograms keyed by domain and status, reported
+        # in get_stats() and as Prometheus text (file and/or /metrics)
+        self.metrics = PhaseMetrics()
+        self.metrics_path = metrics_path
+        self.metrics_port = metrics_port
+        self._metrics_server = None
+        # Opt-in: traces a sample of extractions, aggregated per domain
+        self.profiler = profiler
         self._stats = {
             'total_processed': 0,
             'successful': 0,
             'failed': 0,
-            'total_time': 0.0
+            'skipped': 0,
+            'total_time': 0.0,
+            'cache_fresh': 0,
+            'cache_not_modified': 0,
+            'extraction_memo_hits': 0,
+            'duplicates_skipped': 0,
+            'near_duplicates': 0,
+            'low_quality': 0,
+            'retries': 0,
+            'circuit_rejections': 0,
+            'early_exits': 0,
+            'byte_cap_hits': 0,
+            'bytes_downloaded': 0
         }
+        self._quality_drops: Dict[str, int] = {}
     
+    def _site_pool_config(self, site: str) -> Tuple[int, int]:
+        """Get (max_concurrent, max_connections) for a site
+
+        With adaptive concurrency the pool is sized for the largest window.
+        """
+        concurrent, _, ceiling = self._site_window_bounds(site)
+        pool = self.site_configs.configs.get(site, {}).get('connectionPool', {})
+        connections = pool.get('maxConnections', concurrent)
+        return concurrent, max(connections, ceiling)
+
+    def _site_window_bounds(self, site: str) -> Tuple[int, int, int]:
+        """(initial, minimum, maximum) concurrency window for a site
+
+        Sites can bound the adaptive window with `connectionPool.adaptiveMin`
+        and `adaptiveMax`; the default ceiling is max_concurrent.
+        """
+        pool = self.site_configs.configs.get(site, {}).get('connectionPool', {})
+        concurrent = pool.get('maxConcurrent', self.per_site_concurrent)
+        if not self.adaptive_concurrency:
+            return concurrent, concurrent, concurrent
+        return (concurrent, pool.get('adaptiveMin', 1),
+                pool.get('adaptiveMax', max(concurrent, self.max_concurrent)))
+
+    def _site_limiter(self, url: str) -> AimdLimiter:
+        """Get the per-site concurrency window for a URL"""
+        site = self.site_configs.site_key(url)
+        limiter = self._site_limiters.get(site)
+        if limiter is None:
+            initial, minimum, maximum = self._site_window_bounds(site)
+            limiter = self._site_limiters[site] = AimdLimiter(
+                initial, minimum, maximum, adaptive=self.adaptive_concurrency)
+        return limiter
+
+    def _site_breaker(self, url: str) -> CircuitBreaker:
+        """Get the per-site circuit breaker for a URL"""
+        site = self.site_configs.site_key(url)
+        breaker = self._site_breakers.get(site)
+        if breaker is None:
+            breaker = self._site_breakers[site] = CircuitBreaker(
+                site, threshold=self.circuit_threshold, cooldown=self.circuit_cooldown)
+        return breaker
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying after `error`, or None to give up"""
+        if attempt >= self.max_retries:
+            return None
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            # A server asking for longer than we are willing to wait is a no
+            return retry_after if retry_after <= self.max_retry_delay else None
+        return backoff_delay(attempt, self.retry_backoff, self.max_retry_delay)
+
+    @asynccontextmanager
+    async def _fetch_slot(self, url: str):
+        """Hold a per-site slot and then a global slot while fetching a URL"""
+        # Per-site caps are taken first so URLs queued behind a slow site
+        # never hold a global slot
+        async with self._site_limiter(url).slot(), self._global_semaphore:
+            yield
+
     @asynccontextmanager
-    async def _get_session(self):
-        """Context manager for aiohttp session"""
-        if self.session is None:
-            connector = TCPConnector(limit=self.max_concurrent)
-            self.session = ClientSession(
+    async def _get_session(self, url: str):
+        """Context manager for the aiohttp session serving a URL's site"""
+        site = self.site_configs.site_key(url)
+        session = self._sessions.get(site)
+        if session is None:
+            _, connections = self._site_pool_config(site)
+            connector = TCPConnector(
+                limit=connections,
+                limit_per_host=connections,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            session = ClientSession(
                 timeout=self.timeout,
                 connector=connector,
+                trace_configs=[self.metrics.trace_config(self.site_configs.site_key)],
                 headers={
                     'User-Agent': 'Mozilla/5.0 (compatible; GolfArticleBot/1.0)'
                 }
             )
+            self._sessions[site] = session
         try:
-            yield self.session
+            yield session
         finally:
             # Session cleanup is handled in __aexit__
             pass
+
+    async def warm_up(self, urls: List[str]) -> None:
+        """Resolve DNS and open keep-alive connections for every host in a batch"""
+        host_urls: Dict[Tuple[str, str], int] = {}
+        for url in urls:
+            parsed = urlparse(url)
+            if parsed.hostname:
+                key = (parsed.scheme or 'https', parsed.netloc.lower())
+                host_urls[key] = host_urls.get(key, 0) + 1
+
+        async def open_connection(scheme: str, host: str) -> None:
+            root = f"{scheme}://{host}/"
+            # Same path as a page fetch: the site's circuit, its window and
+            # a global slot, then the rate limiter
+            breaker = self._site_breaker(root)
+            try:
+                breaker.check()
+                async with self._fetch_slot(root), self._get_session(root) as session:
+                    await self.rate_limiter.acquire(root)
+                    try:
+                        # HEAD populates the connector's DNS cache and leaves an
+                        # idle keep-alive connection in the site's pool
+                        async with session.head(root, allow_redirects=False) as response:
+                            await response.release()
+                    except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                        self._site_limiter(root).observe(None)
+                        breaker.failure()
+                        raise
+                    if response.status in HOST_FAILURE_STATUSES:
+                        breaker.failure()
+                    elif response.status != 429:
+                        breaker.success()
+            except CircuitOpenError as e:
+                logger.debug(f"Warm-up skipped for {host}: {e}")
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                logger.debug(f"Warm-up failed for {host}: {e}")
+
+        tasks = []
+        for (scheme, host), count in host_urls.items():
+            concurrent, _ = self._site_pool_config(
+                self.site_configs.site_key(f"{scheme}://{host}/"))
+            tasks.extend(open_connection(scheme, host)
+                         for _ in range(min(count, concurrent)))
+
+        if tasks:
+            start_time = time.time()
+            await asyncio.gather(*tasks)
+            logger.info(f"Warmed {len(host_urls)} hosts in {time.time() - start_time:.2f}s")
     
-    @backoff.on_exception(
-        backoff.expo,
-        (aiohttp.ClientError, asyncio.TimeoutError),
-        max_tries=3,
-        max_time=60
-    )
-    async def _fetch_url(self, session: ClientSession, url: str) -> Tuple[str, int]:
-        """Fetch URL with exponential backoff retry"""
-        await self.rate_limiter.acquire()
+    async def _fetch_url(self,
+                         session: ClientSession,
+                         url: str,
+                         headers: Optional[Dict[str, str]] = None) -> Tuple[bytes, int, Optional[str], Mapping[str, str]]:
+        """Fetch URL once; retryable statuses raise RetryableResponse
+
+        Retries are scheduled by process_single_article outside the fetch
+        slot. Fails fast with CircuitOpenError while the site's circuit is open.
+        """
+        breaker = self._site_breaker(url)
+        breaker.check()
+        await self.rate_limiter.acquire(url)
+        
+        # Time to response headers feeds the site's window; failures before
+        # or while reading the body count against the window and the circuit
+        limiter = self._site_limiter(url)
+        request_start = time.perf_counter()
+        try:
+            response = await session.get(url, headers=headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            limiter.observe(None)
+            breaker.failure()
+            raise
+        async with response:
+            read_start = time.perf_counter()
+            if response.status in RETRYABLE_STATUSES:
+                # 429 and 503 also halve the site's window here
+                limiter.observe(read_start - request_start, response.status)
+                if response.status in HOST_FAILURE_STATUSES:
+                    breaker.failure()
+                elif response.status != 429:
+                    # A 429 says the host is up but we are too fast: it is
+                    # neither a success nor a failure for the circuit
+                    breaker.success()
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after:
+                    breaker.hold(min(retry_after, self.max_retry_delay))
+                raise RetryableResponse(response.status, retry_after)
+            # A response only counts as healthy once its body is in: a host
+            # that stalls or drops mid-body is failing like one that never answers
+            try:
+                if self.stream_fetch and response.status == 200:
+                    content = await self._read_streaming(response, url)
+                else:
+                    content = await response.read()
+                    self._stats['bytes_downloaded'] += len(content)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                limiter.observe(None)
+                breaker.failure()
+                raise
+            limiter.observe(read_start - request_start, response.status)
+            breaker.success()
+            self.metrics.record('download', self.site_configs.site_key(url), response.status,
+                                time.perf_counter() - read_start)
+            return content, response.status, response.charset, response.headers.copy()
+    
+    def _article_boundary(self, site: str, options: Dict[str, Any]) -> Optional[ArticleBoundary]:
+        """Boundary detector for a site, if its content selector can be streamed"""
+        plan = self.extraction_plans.for_site(site)
+        if self._streaming_unavailable or not ArticleBoundary.supports(plan):
+            return None
+        try:
+            return ArticleBoundary(plan, options.get('metadata'))
+        except ImportError:
+            self._streaming_unavailable = True
+            logger.warning("lxml not installed; streaming fetch will only apply the byte cap")
+            return None
+    
+    async def _read_streaming(self, response: aiohttp.ClientResponse, url: str) -> bytes:
+        """Read a body in chunks until the article is complete or the byte cap is hit
+
+        Site configs can tune this with `earlyExit: {enabled, maxBytes, metadata}`.
+        Leaving the body unread makes aiohttp close the connection on release
+        instead of draining the rest of the page.
+        """
+        site = self.site_configs.site_key(url)
+        options = self.site_configs.configs.get(site, {}).get('earlyExit', {})
+        if options.get('enabled') is False:
+            content = await response.read()
+            self._stats['bytes_downloaded'] += len(content)
+            return content
+        max_bytes = options.get('maxBytes', self.max_page_bytes)
+        boundary = self._article_boundary(site, options)
         
-        async with session.get(url) as response:
-            content = await response.text()
-            return content, response.status
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(self.stream_chunk_size):
+            chunks.append(chunk)
+            size += len(chunk)
+            if boundary and boundary.feed(chunk):
+                self._stats['early_exits'] += 1
+                response.close()
+                break
+            if max_bytes and size >= max_bytes:
+                self._stats['byte_cap_hits'] += 1
+                logger.warning(f"Stopped reading {url} at {size} bytes (cap {max_bytes})")
+                response.close()
+                break
+        self._stats['bytes_downloaded'] += size
+        return b''.join(chunks)
+    
+    async def _fetch_page(self,
+                          session: ClientSession,
+                          url: str) -> Tuple[bytes, int, Optional[str], Optional[str]]:
+        """Fetch a page through the response cache, returning its content hash"""
+        if not self.response_cache:
+            content, status, encoding, _ = await self._fetch_url(session, url)
+            return content, status, encoding, None
+        
+        cache = self.response_cache
+        entry = await asyncio.to_thread(cache.lookup, url)
+        ttl = self.site_configs.get(url).get('cacheTtl', self.cache_ttl)
+        if entry and time.time() - entry.fetched_at < ttl:
+            self._stats['cache_fresh'] += 1
+            return entry.body, 200, entry.encoding, entry.content_hash
+        
+        headers = cache.conditional_headers(entry) if entry else None
+        content, status, encoding, response_headers = await self._fetch_url(session, url, headers)
+        if status == 304 and entry:
+            self._stats['cache_not_modified'] += 1
+            await asyncio.to_thread(cache.touch, url)
+            return entry.body, 200, entry.encoding, entry.content_hash
+        if status != 200:
+            return content, status, encoding, None
+        
+        digest = await asyncio.to_thread(
+            cache.store, url, content, encoding,
+            response_headers.get('ETag'), response_headers.get('Last-Modified')
+        )
+        return content, status, encoding, digest
+    
+    def _parser_backend(self, site: str) -> str:
+        """Parser backend for a site: its `parserBackend` or the run default"""
+        return self.site_configs.configs.get(site, {}).get('parserBackend') or self.parser_backend
+    
+    def _memo_key(self, url: str, content_hash: str) -> str:
+        """Extraction memo key: same body, same selector set, same parser"""
+        site = self.site_configs.site_key(url)
+        plan = self.extraction_plans.for_site(site)
+        return (f"{content_hash}:{plan.fingerprint if plan else 'generic'}:"
+                f"{resolve_parser_backend(self._parser_backend(site))}")
+    
+    async def _submit_extract(self,
+                              url: str,
+                              content: bytes,
+                              encoding: Optional[str],
+                              content_hash: Optional[str] = None) -> Tuple[asyncio.Future, bool]:
+        """Start extracting article fields, inline or in the parse executor
+
+        Returns the pending result and whether it came from the extraction memo.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self.response_cache and content_hash:
+            memo = await asyncio.to_thread(self.response_cache.get_extraction,
+                                           self._memo_key(url, content_hash))
+            if memo is not None:
+                self._stats['extraction_memo_hits'] += 1
+                future.set_result(memo)
+                return future, True
+        site = self.site_configs.site_key(url)
+        backend = self._parser_backend(site)
+        profile = self.profiler.sample() if self.profiler else None
+        if self.parse_executor:
+            return await self.parse_executor.submit(content, encoding, site, backend, profile), False
+        future.set_result(extract_article(content, encoding,
+                                          self.extraction_plans.for_site(site), backend, profile))
+        return future, False
     
     async def process_single_article(self, url: str) -> ProcessedArticle:
         """Process a single article URL"""
         start_time = time.time()
         article = ProcessedArticle(url=url)
+        # Key for the 'total' phase: the page's HTTP status, as for every
+        # other phase, or 'error' if no response came back
+        http_status: Any = 'error'
+        
+        breaker = self._site_breaker(url)
         
         try:
-            async with self._get_session() as session:
-                content, status = await self._fetch_url(session, url)
-                
-                if status != 200:
-                    article.status = ProcessingStatus.FAILED
-                    article.error = f"HTTP {status}"
-                    return article
-                
-                # Parse HTML
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Extract components
-                article.title = self.parser.extract_title(soup)
-                article.body = self.parser.extract_body(soup)
-                article.summary = self.parser.extract_summary(article.body)
-                article.metadata = self.parser.extract_metadata(soup)
-                
-                # Validate content
-                if not article.title or not article.body:
-                    article.status = ProcessingStatus.INVALID_CONTENT
-                    article.error = "Missing title or body content"
-                else:
-                    article.status = ProcessingStatus.SUCCESS
-                    if article.metadata and article.body:
-                        article.metadata.word_count = len(article.body.split())
+            while True:
+                await breaker.wait_ready()
+                try:
+                    async with self._fetch_slot(url):
+                        async with self._get_session(url) as session:
+                            content, status, encoding, content_hash = await self._fetch_page(session, url)
+                        http_status = status
+                        
+                        if status != 200:
+                            article.status = ProcessingStatus.FAILED
+                            article.error = f"HTTP {status}"
+                            return article
+                        
+                        # Hand the page to the parser before giving up the fetch
+                        # slot, so pages held in memory stay bounded by fetch
+                        # slots plus the parse backlog
+                        parsing, memoized = await self._submit_extract(url, content, encoding,
+                                                                       content_hash)
+                    break
+                except (RetryableResponse, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    delay = self._retry_delay(e, article.retry_count)
+                    if delay is None:
+                        raise
+                    # The slot is already released: waiting costs no concurrency
+                    article.retry_count += 1
+                    self._stats['retries'] += 1
+                    logger.debug(f"Retrying {url} in {delay:.1f}s after {e!r}")
+                    await asyncio.sleep(delay)
+            
+            # Parse HTML and extract components
+            extracted = await parsing
+            timings = extracted.pop('timings', None)
+            if timings:
+                site = self.site_configs.site_key(url)
+                for phase, seconds in timings.items():
+                    self.metrics.record(phase, site, status, seconds)
+            profile = extracted.pop('profile', None)
+            if profile:
+                self.profiler.add(self.site_configs.site_key(url), profile)
+            if self.response_cache and content_hash and not memoized:
+                await asyncio.to_thread(self.response_cache.put_extraction,
+                                        self._memo_key(url, content_hash), extracted)
+            article.title = extracted['title']
+            article.body = extracted['body']
+            article.summary = extracted['summary']
+            article.metadata = _compact_metadata(extracted['metadata'])
+            
+            # Validate content
+            if not article.title or not article.body:
+                article.status = ProcessingStatus.INVALID_CONTENT
+                article.error = "Missing title or body content"
+            else:
+                article.status = ProcessingStatus.SUCCESS
+                if article.metadata and article.body:
+                    article.metadata.word_count = len(article.body.split())
+                if self.quality_gate:
+                    self._check_quality(article, extracted.get('quality') or
+                                        score_content(article.body, content))
+                if self.near_duplicates and article.status == ProcessingStatus.SUCCESS:
+                    await self._check_near_duplicate(article, status)
+                if (self.image_harvester and article.status == ProcessingStatus.SUCCESS
+                        and article.metadata.images):
+                    article.image_paths = await self.image_harvester.harvest(
+                        url, article.metadata.images)
                 
+        except CircuitOpenError as e:
+            self._stats['circuit_rejections'] += 1
+            article.status = ProcessingStatus.FAILED
+            article.error = str(e)
         except asyncio.TimeoutError:
             article.status = ProcessingStatus.TIMEOUT
             article.error = "Request timeout"
+            if article.retry_count:
+                article.error += f" after {article.retry_count} retries"
+        except (RetryableResponse, aiohttp.ClientError) as e:
+            http_status = getattr(e, 'status', http_status)
+            article.status = (ProcessingStatus.RETRY_EXHAUSTED if article.retry_count
+                              else ProcessingStatus.FAILED)
+            article.error = str(e) or type(e).__name__
+            if article.retry_count:
+                article.error += f" after {article.retry_count} retries"
         except Exception as e:
             article.status = ProcessingStatus.FAILED
             article.error = str(e)
             logger.exception(f"Error processing {url}")
         finally:
             article.processing_time = time.time() - start_time
+            self.metrics.record('total', self.site_configs.site_key(url), http_status,
+                                article.processing_time)
         
         return article
     
+    def _check_quality(self, article: ProcessedArticle, score: Dict[str, Any]) -> None:
+        """Drop an article whose body fails the site's quality thresholds"""
+        article.quality = score
+        options = self.site_configs.get(article.url).get('quality', {})
+        if options.get('enabled') is False:
+            return
+        reasons = check_quality(score, {**self.quality_thresholds, **options})
+        if not reasons:
+            return
+        self._stats['low_quality'] += 1
+        for reason in reasons:
+            measure = reason.split(' ', 1)[0]
+            self._quality_drops[measure] = self._quality_drops.get(measure, 0) + 1
+        article.status = ProcessingStatus.LOW_QUALITY
+        article.error = f"Low quality: {'; '.join(reasons)}"
+        article.body = None
+    
+    async def _check_near_duplicate(self, article: ProcessedArticle, status: int) -> None:
+        """Flag or drop an article whose body nearly copies an indexed one"""
+        started = time.perf_counter()
+        match = await asyncio.to_thread(self.near_duplicates.check_and_add,
+                                        canonicalize_url(article.url), article.body)
+        self.metrics.record('fingerprint', self.site_configs.site_key(article.url), status,
+                            time.perf_counter() - started)
+        if match is None:
+            return
+        self._stats['near_duplicates'] += 1
+        article.near_duplicate_of = match.url
+        if self.drop_near_duplicates:
+            article.status = ProcessingStatus.NEAR_DUPLICATE
+            article.error = f"Near-duplicate of {match.url} ({match.similarity:.0%} similar)"
+            article.body = None
+    
+    async def _process_and_record(self,
+                                  url: str,
+                                  progress_callback: Optional[callable] = None,
+                                  job: Optional[object] = None) -> ProcessedArticle:
+        """Process one URL, update stats and report progress
+
+        `job` identifies the iter_indexed call the URL belongs to.
+        """
+        canonical = canonicalize_url(url)
+        duplicate_of = None
+        # The in-memory check only filters; a refresh in between may have
+        # dropped the file, so the lookup's own result decides
+        published = (await asyncio.to_thread(self.published.find, url)
+                     if self.published and url in self.published else None)
+        claim = self._in_flight_urls.get(canonical)
+        if published:
+            duplicate_of = f"Already published in {published[0].path}"
+        elif claim is not None and claim[0] is job:
+            duplicate_of = f"Already processed as {canonical}"
+        elif claim is not None:
+            # Another job is fetching it: share that article
+            shared = await asyncio.shield(claim[1])
+            if shared is None:
+                # It was not fetched after all (seen before, or cancelled)
+                return await self._process_and_record(url, progress_callback, job)
+            result = replace(shared, url=url)
+            self._update_stats(result)
+            if progress_callback:
+                progress_callback(result)
+            # Not written to the result sink again: the fetching job did
+            return result
+        else:
+            # Claimed before the lookup so a concurrent copy of the URL
+            # waits on this one instead of passing the same check
+            claim = self._in_flight_urls[canonical] = (
+                job, asyncio.get_running_loop().create_future())
+            if self.seen_urls and await asyncio.to_thread(self.seen_urls.__contains__, url):
+                del self._in_flight_urls[canonical]
+                claim[1].set_result(None)
+                duplicate_of = f"Already processed as {canonical}"
+        if duplicate_of:
+            result = ProcessedArticle(url=url, status=ProcessingStatus.DUPLICATE,
+                                      error=duplicate_of)
+            self._stats['duplicates_skipped'] += 1
+            self._update_stats(result)
+            if progress_callback:
+                progress_callback(result)
+            if self.result_sink:
+                await self.result_sink.write(result, self._sink_key(url))
+            return result
+        
+        shared = None
+        try:
+            try:
+                result = await self.process_single_article(url)
+            except Exception as e:
+                result = ProcessedArticle(url=url, status=ProcessingStatus.FAILED, error=str(e))
+            if self.seen_urls and result.status in (ProcessingStatus.SUCCESS,
+                                                    ProcessingStatus.NEAR_DUPLICATE):
+                await asyncio.to_thread(self.seen_urls.add, url)
+            self._update_stats(result)
+            
+            if progress_callback:
+                progress_callback(result)
+            
+            if self.result_sink:
+                await self.result_sink.write(result, self._sink_key(url))
+            if self.body_spill and result.body:
+                if len(result.body) >= THREAD_PUT_CHARS:
+                    result.body_ref = await asyncio.to_thread(self.body_spill.put, result.body)
+                else:
+                    result.body_ref = self.body_spill.put(result.body)
+                result.body = None
+            shared = result
+        finally:
+            # Waiting jobs get the finished article, or None to decide again
+            del self._in_flight_urls[canonical]
+            claim[1].set_result(shared)
+        return result
+    
+    async def iter_indexed(self,
+                           urls: Union[Iterable[str], AsyncIterable[str]],
+                           progress_callback: Optional[callable] = None,
+                           window: Optional[int] = None) -> AsyncIterator[Tuple[int, ProcessedArticle]]:
+        """Yield (input index, article) pairs in completion order
+
+        Like iter_articles, for callers that map results back to their input.
+        """
+        # A window slot is held from scheduling until the consumer takes the
+        # result, so in-flight tasks plus unread results never exceed it
+        slots = asyncio.Semaphore(window or self.stream_window)
+        finished: asyncio.Queue = asyncio.Queue()
+        tasks = set()
+        job = object()
+        
+        async def run(index: int, url: str) -> None:
+            finished.put_nowait((index, await self._process_and_record(url, progress_callback, job)))
+        
+        async def feed() -> None:
+            index = 0
+            try:
+                async for url in aiter_urls(urls):
+                    await slots.acquire()
+                    task = asyncio.ensure_future(run(index, url))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    index += 1
+                if tasks:
+                    await asyncio.gather(*tasks)
+            finally:
+                finished.put_nowait(None)
+        
+        feeder = asyncio.ensure_future(feed())
+        try:
+            while True:
+                item = await finished.get()
+                if item is None:
+                    break
+                slots.release()
+                yield item
+            # Surface errors raised by the URL source itself
+            await feeder
+        finally:
+            # Consumer stopped early - don't leave orphaned fetches running
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+    
+    async def iter_articles(self,
+                            urls: Union[Iterable[str], AsyncIterable[str]],
+                            progress_callback: Optional[callable] = None,
+                            window: Optional[int] = None) -> AsyncIterator[ProcessedArticle]:
+        """Stream articles as they complete, keeping at most `window` in flight
+
+        Accepts any iterable or async iterable of URLs. Unlike process_articles
+        the URLs are not known up front, so call warm_up() first if they are.
+        """
+        async for _, article in self.iter_indexed(urls, progress_callback, window):
+            yield article
+    
+    def _sink_key(self, url: str) -> Optional[Tuple[str, str]]:
+        """Key under which the journal learns where a result line went"""
+        return (self.job_id, url) if self.journal and self.job_id else None
+    
     async def process_articles(self, 
                              urls: List[str], 
-                             progress_callback: Optional[callable] = None) -> List[ProcessedArticle]:
-        """Process multiple articles concurrently"""
+                             progress_callback: Optional[callable] = None,
+                             job_id: Optional[str] = None) -> List[ProcessedArticle]:
+        """Process multiple articles concurrently
+
+        With a journal the batch is registered as a job (see self.job_id),
+        so an interrupted run can be continued with resume().
+        """
         logger.info(f"Starting processing of {len(urls)} articles")
         
-        # Create semaphore for concurrency control
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        
-        async def process_with_semaphore(url: str) -> ProcessedArticle:
-            async with semaphore:
-                result = await self.process_single_article(url)
-                self._update_stats(result)
-                
-                if progress_callback:
-                    progress_callback(result)
-                
-                return result
-        
-        # Process all URLs concurrently
-        tasks = [process_with_semaphore(url) for url in urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Handle any exceptions in results
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                article = ProcessedArticle(
-                    url=urls[i],
-                    status=ProcessingStatus.FAILED,
-                    error=str(result)
+        if self.journal:
+            self.job_id = await asyncio.to_thread(self.journal.create_job, urls, job_id)
+        processed_results: List[Optional[ProcessedArticle]] = [None] * len(urls)
+        return await self._run_job(list(enumerate(urls)), processed_results, progress_callback)
+    
+    async def resume(self,
+                     job_id: str,
+                     progress_callback: Optional[callable] = None) -> List[ProcessedArticle]:
+        """Continue a journaled job, processing only its pending and failed URLs
+
+        URLs finished in an earlier run are not fetched again; they come back
+        as records rebuilt from the journal (status, title, error, no body).
+        """
+        if not self.journal:
+            raise RuntimeError("resume() needs a processor created with journal_path")
+        entries = await asyncio.to_thread(self.journal.job_entries, job_id)
+        self.job_id = job_id
+        processed_results: List[Optional[ProcessedArticle]] = [None] * len(entries)
+        remaining = []
+        for entry in entries:
+            if entry['state'] == DONE:
+                processed_results[entry['position']] = ProcessedArticle(
+                    url=entry['url'],
+                    title=entry['title'],
+                    status=ProcessingStatus(entry['status']),
+                    error=entry['error'],
+                    processing_time=entry['processing_time'] or 0.0
                 )
-                processed_results.append(article)
             else:
-                processed_results.append(result)
+                remaining.append((entry['position'], entry['url']))
+        logger.info(f"Resuming job {job_id}: {len(entries) - len(remaining)} done, "
+                    f"{len(remaining)} pending or failed")
+        return await self._run_job(remaining, processed_results, progress_callback)
+    
+    async def _run_job(self,
+                       items: List[Tuple[int, str]],
+                       processed_results: List[Optional[ProcessedArticle]],
+                       progress_callback: Optional[callable]) -> List[ProcessedArticle]:
+        """Process (position, url) pairs into processed_results, journaling outcomes"""
+        urls = [url for _, url in items]
+        if self.published:
+            await asyncio.to_thread(self.published.refresh)
+        if self.prewarm:
+            await self.warm_up(urls)
+        
+        try:
+            async for index, article in self.iter_indexed(urls, progress_callback):
+                position = items[index][0]
+                processed_results[position] = article
+                if self.journal and self.journal.record(
+                        self.job_id, position, article.status.value,
+                        article.title, article.error, article.processing_time):
+                    await asyncio.to_thread(self.journal.flush)
+        finally:
+            # Also runs on Ctrl-C / cancellation, so finished work is kept
+            if self.journal:
+                await asyncio.to_thread(self.journal.flush)
         
-        logger.info(f"Completed processing. Stats: {self.get_stats()}")
+        self._log_stats()
+        if self.metrics_path:
+            await asyncio.to_thread(self.write_metrics)
         return processed_results
     
     def _update_stats(self, article: ProcessedArticle):
-        """Update processing statistics"""
+        """Count a finished URL as successful, skipped or failed"""
         self._stats['total_processed'] += 1
         self._stats['total_time'] += article.processing_time
-        
         if article.status == ProcessingStatus.SUCCESS:
             self._stats['successful'] += 1
+        elif article.status in SKIPPED_STATUSES:
+            self._stats['skipped'] += 1
         else:
             self._stats['failed'] += 1
     
@@ -381,13 +2236,58 @@ class GolfArticleProcessor:
         else:
             stats['success_rate'] = 0.0
             stats['avg_processing_time'] = 0.0
+        if self.image_harvester:
+            stats['images'] = dict(self.image_harvester.stats)
+        if self._quality_drops:
+            stats['quality_drops'] = dict(self._quality_drops)
+        stats['concurrency'] = {site: limiter.snapshot()
+                                for site, limiter in sorted(self._site_limiters.items())}
+        stats['circuits'] = {site: breaker.snapshot()
+                             for site, breaker in sorted(self._site_breakers.items())}
+        stats['latency'] = self.metrics.summary()
+        if self.profiler:
+            stats['profile'] = self.profiler.summary()
         
         return stats
     
+    def limiter_stats(self) -> Dict[str, int]:
+        """Fetches holding a site slot and those queued for one, over all sites"""
+        limiters = list(self._site_limiters.values())
+        return {
+            'fetching': sum(limiter.in_flight for limiter in limiters),
+            'waiting_for_slot': sum(limiter.waiting for limiter in limiters),
+        }
+    
+    def prometheus_text(self) -> str:
+        """Phase latency summaries plus the numeric stats, as Prometheus text"""
+        stats = self.get_stats()
+        gauges = {key: value for key, value in stats.items() if isinstance(value, (int, float))}
+        return self.metrics.to_prometheus(gauges=gauges)
+    
+    def write_metrics(self, path: Optional[Path] = None) -> None:
+        """Write prometheus_text() to `path` (default: metrics_path) atomically"""
+        path = path or self.metrics_path
+        if path:
+            write_prometheus_file(path, self.prometheus_text())
+    
+    def _log_stats(self) -> None:
+        stats = self.get_stats()
+        phases = stats.pop('latency')['phases']
+        stats.pop('profile', None)
+        logger.info(f"Completed processing. Stats: {stats}")
+        if phases:
+            logger.info("Phase latency p50/p99 ms: " + ", ".join(
+                f"{phase} {summary['p50_ms']:.0f}/{summary['p99_ms']:.0f}"
+                for phase, summary in phases.items()))
+    
     async def save_results(self, 
                           results: List[ProcessedArticle], 
                           output_path: Path) -> None:
-        """Save processing results to JSON file"""
+        """Save processing results to one JSON file
+
+        For large batches pass a JsonlSink as `result_sink` instead; it
+        writes each article as it finishes.
+        """
         data = {
             'timestamp': datetime.now().isoformat(),
             'stats': self.get_stats(),
@@ -398,6 +2298,9 @@ class GolfArticleProcessor:
                     'summary': article.summary,
                     'status': article.status.value,
                     'error': article.error,
+                    'near_duplicate_of': article.near_duplicate_of,
+                    'image_paths': article.image_paths,
+                    'quality': article.quality,
                     'processing_time': article.processing_time,
                     'metadata': {
                         'author': article.metadata.author if article.metadata else None,
@@ -411,21 +2314,55 @@ class GolfArticleProcessor:
             ]
         }
         
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        async with aiofiles.open(output_path, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(data, indent=2, ensure_ascii=False))
-        
+        await asyncio.to_thread(self._write_json, output_path, data)
         logger.info(f"Results saved to {output_path}")
     
+    @staticmethod
+    def _write_json(output_path: Path, data: Dict[str, Any]) -> None:
+        """Write a results document in chunks (runs off the event loop)"""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    
     async def __aenter__(self):
         """Async context manager entry"""
+        if self.metrics_port:
+            self._metrics_server = await start_metrics_server(self.prometheus_text,
+                                                              port=self.metrics_port)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit - cleanup resources"""
-        if self.session:
-            await self.session.close()
+        if self.parse_executor:
+            self.parse_executor.shutdown()
+        if self.response_cache:
+            self.response_cache.close()
+        if self.seen_urls:
+            self.seen_urls.close()
+        if self.published:
+            self.published.close()
+        if self.near_duplicates:
+            self.near_duplicates.close()
+        if self.image_harvester:
+            self.image_harvester.close()
+        if self.body_spill:
+            # Returned records still read bodies through their TextRefs; the
+            # spill file is removed once the last of them is gone
+            self.body_spill = None
+        if self.result_sink:
+            await self.result_sink.aclose()
+        if self.journal:
+            self.journal.close()
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+        if self.metrics_path:
+            await asyncio.to_thread(self.write_metrics)
+        if self.profiler:
+            await asyncio.to_thread(self.profiler.write)
+        if self._metrics_server:
+            await self._metrics_server.cleanup()
+            self._metrics_server = None
 
 
 def progress_reporter(article: ProcessedArticle):
@@ -485,18 +2422,6 @@ async def main():
                 print(f"   Error: {article.error}")
 
 
-# For importing aiofiles
-try:
-    import aiofiles
-except ImportError:
-    logger.warning("aiofiles not installed. File operations will be synchronous.")
-    # Fallback implementation
-    class aiofiles:
-        @staticmethod
-        async def open(file, mode='r', **kwargs):
-            return open(file, mode, **kwargs)
-
-
 if __name__ == '__main__':
     # Run the async main function
     asyncio.run(main())
\ No newline at end of file
@@ -7,17 +7,23 @@ Focus on core improvements: async processing, better parsing, error handling
 import asyncio
 import aiohttp
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import (List, Dict, Optional, Union, Iterable, AsyncIterable,
+                    AsyncIterator, Tuple)
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
 import logging
+import os
 import time
+from urllib.parse import urlparse
+from pipeline_profiler import PipelineProfiler, run_profiled
+from url_stream import aiter_urls
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class Article:
     """Simple article data class"""
     url: str
@@ -28,72 +34,130 @@ class Article:
     processing_time: float = 0.0
 
 
+def extract_content_sync(html: Union[str, bytes],
+                         parser: str = 'html.parser') -> Dict[str, Optional[str]]:
+    """Extract title and body from HTML using BeautifulSoup"""
+    try:
+        soup = BeautifulSoup(html, parser)
+    except Exception as e:
+        # Missing or failing tree builder (e.g. lxml not installed)
+        if parser == 'html.parser':
+            raise
+        logger.warning(f"{parser} parser failed ({e}), using html.parser")
+        soup = BeautifulSoup(html, 'html.parser')
+    
+    # Remove unwanted elements
+    for element in soup(['script', 'style', 'nav', 'header', 'footer']):
+        element.decompose()
+    
+    # Extract title - try multiple methods
+    title = None
+    for selector in ['h1', 'meta[property="og:title"]', 'title']:
+        element = soup.select_one(selector)
+        if element:
+            if element.name == 'meta':
+                title = element.get('content', '')
+            else:
+                title = element.get_text(strip=True)
+            if title:
+                break
+    
+    # Extract body - look for article content
+    body = None
+    for selector in ['article', 'div.article-content', 'main', 'div.content']:
+        content = soup.select_one(selector)
+        if content:
+            body = content.get_text(separator='\n', strip=True)
+            if len(body) > 100:  # Ensure meaningful content
+                break
+    
+    # Fallback to all paragraphs
+    if not body:
+        paragraphs = soup.find_all('p')
+        if paragraphs:
+            body = '\n'.join(p.get_text(strip=True) for p in paragraphs)
+    
+    return {'title': title, 'body': body}
+
+
 class SimpleGolfProcessor:
     """Simplified golf article processor with async support"""
     
-    def __init__(self, max_concurrent: int = 5, timeout: int = 30):
+    def __init__(self,
+                 max_concurrent: int = 5,
+                 timeout: int = 30,
+                 parse_in_processes: bool = False,
+                 parse_workers: Optional[int] = None,
+                 parse_backlog: Optional[int] = None,
+                 parser: str = 'html.parser',
+                 profiler: Optional[PipelineProfiler] = None):
         self.max_concurrent = max_concurrent
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        # BeautifulSoup tree builder: 'html.parser' or the faster 'lxml'
+        self.parser = parser
+        self.parse_in_processes = parse_in_processes
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.parse_backlog = parse_backlog or self.parse_workers * 2
+        # Opt-in: traces a sample of extractions, aggregated per domain
+        self.profiler = profiler
     
-    async def extract_content(self, html: str) -> Dict[str, Optional[str]]:
-        """Extract title and body from HTML using BeautifulSoup"""
-        soup = BeautifulSoup(html, 'html.parser')
+    async def extract_content(self,
+                              html: Union[str, bytes],
+                              url: Optional[str] = None,
+                              pool: Optional[ProcessPoolExecutor] = None,
+                              parse_slots: Optional[asyncio.Semaphore] = None) -> Dict[str, Optional[str]]:
+        """Extract title and body, in `pool` when one is given"""
+        profile = self.profiler.sample() if self.profiler else None
+        if profile is None:
+            func, args = extract_content_sync, (html, self.parser)
+        else:
+            func, args = run_profiled, (profile, extract_content_sync, html, self.parser)
         
-        # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'header', 'footer']):
-            element.decompose()
+        if pool is None:
+            result = func(*args)
+        else:
+            # Bound queued pages so fetchers wait instead of piling up memory
+            async with parse_slots:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(pool, func, *args)
         
-        # Extract title - try multiple methods
-        title = None
-        for selector in ['h1', 'meta[property="og:title"]', 'title']:
-            element = soup.select_one(selector)
-            if element:
-                if element.name == 'meta':
-                    title = element.get('content', '')
-                else:
-                    title = element.get_text(strip=True)
-                if title:
-                    break
-        
-        # Extract body - look for article content
-        body = None
-        for selector in ['article', 'div.article-content', 'main', 'div.content']:
-            content = soup.select_one(selector)
-            if content:
-                body = content.get_text(separator='\n', strip=True)
-                if len(body) > 100:  # Ensure meaningful content
-                    break
-        
-        # Fallback to all paragraphs
-        if not body:
-            paragraphs = soup.find_all('p')
-            if paragraphs:
-                body = '\n'.join(p.get_text(strip=True) for p in paragraphs)
-        
-        return {'title': title, 'body': body}
+        if profile is None:
+            return result
+        content, profile_data = result
+        self.profiler.add((urlparse(url).hostname or '') if url else '', profile_data)
+        return content
     
-    async def process_url(self, session: aiohttp.ClientSession, url: str) -> Article:
+    async def process_url(self,
+                          session: aiohttp.ClientSession,
+                          url: str,
+                          pool: Optional[ProcessPoolExecutor] = None,
+                          parse_slots: Optional[asyncio.Semaphore] = None) -> Article:
         """Process a single URL"""
         start_time = time.time()
         article = Article(url=url)
         
         try:
+            html = None
             async with session.get(url, headers=self.headers) as response:
                 if response.status == 200:
-                    html = await response.text()
-                    content = await self.extract_content(html)
-                    
-                    article.title = content['title']
-                    article.body = content['body']
-                    article.success = bool(article.title and article.body)
-                    
-                    if not article.success:
-                        article.error = "Missing title or body content"
+                    html = await response.read()
                 else:
                     article.error = f"HTTP {response.status}"
+            
+            # Parse after the response is released so the connection goes
+            # straight back to the pool
+            if html is not None:
+                content = await self.extract_content(html, url, pool, parse_slots)
+                
+                article.title = content['title']
+                article.body = content['body']
+                article.success = bool(article.title and article.body)
+                
+                if not article.success:
+                    article.error = "Missing title or body content"
                     
         except asyncio.TimeoutError:
             article.error = "Timeout"
@@ -104,38 +168,86 @@ class SimpleGolfProcessor:
         article.processing_time = time.time() - start_time
         return article
     
-    async def process_articles(self, urls: List[str]) -> List[Article]:
-        """Process multiple articles concurrently"""
-        logger.info(f"Processing {len(urls)} articles with {self.max_concurrent} workers")
+    async def _iter_indexed(self,
+                            urls: Union[Iterable[str], AsyncIterable[str]],
+                            window: Optional[int] = None) -> AsyncIterator[Tuple[int, Article]]:
+        """Yield (input index, article) pairs in completion order"""
+        # The pool belongs to this call, so concurrent calls never share or
+        # shut down each other's workers
+        pool = parse_slots = None
+        if self.parse_in_processes:
+            pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+            parse_slots = asyncio.Semaphore(self.parse_backlog)
+        
+        # Window slots are returned when the consumer takes a result, so
+        # in-flight tasks plus unread results never exceed the window
+        slots = asyncio.Semaphore(window or self.max_concurrent * 4)
+        fetch_slots = asyncio.Semaphore(self.max_concurrent)
+        finished: asyncio.Queue = asyncio.Queue()
+        tasks = set()
         
-        # Create session and semaphore for concurrency control
         async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            semaphore = asyncio.Semaphore(self.max_concurrent)
-            
-            async def process_with_limit(url: str) -> Article:
-                async with semaphore:
-                    return await self.process_url(session, url)
+            async def run(index: int, url: str) -> None:
+                try:
+                    async with fetch_slots:
+                        article = await self.process_url(session, url, pool, parse_slots)
+                except Exception as e:
+                    article = Article(url=url, error=str(e))
+                finished.put_nowait((index, article))
             
-            # Process all URLs concurrently
-            results = await asyncio.gather(
-                *[process_with_limit(url) for url in urls],
-                return_exceptions=True
-            )
-            
-            # Handle exceptions
-            articles = []
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    article = Article(url=urls[i], error=str(result))
-                else:
-                    article = result
-                
-                # Log progress
-                status = "✅" if article.success else "❌"
-                logger.info(f"{status} {article.url} ({article.processing_time:.2f}s)")
-                articles.append(article)
+            async def feed() -> None:
+                index = 0
+                try:
+                    async for url in aiter_urls(urls):
+                        await slots.acquire()
+                        task = asyncio.ensure_future(run(index, url))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                        index += 1
+                    if tasks:
+                        await asyncio.gather(*tasks)
+                finally:
+                    finished.put_nowait(None)
             
-            return articles
+            feeder = asyncio.ensure_future(feed())
+            try:
+                while True:
+                    item = await finished.get()
+                    if item is None:
+                        break
+                    slots.release()
+                    
+                    # Log progress
+                    article = item[1]
+                    status = "✅" if article.success else "❌"
+                    logger.info(f"{status} {article.url} ({article.processing_time:.2f}s)")
+                    yield item
+                await feeder
+            finally:
+                feeder.cancel()
+                for task in list(tasks):
+                    task.cancel()
+                if pool is not None:
+                    # Workers drain in a thread so the loop keeps serving
+                    await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+                if self.profiler:
+                    self.profiler.write()
+    
+    async def iter_articles(self,
+                            urls: Union[Iterable[str], AsyncIterable[str]],
+                            window: Optional[int] = None) -> AsyncIterator[Article]:
+        """Stream articles as they complete, keeping at most `window` in flight"""
+        async for _, article in self._iter_indexed(urls, window):
+            yield article
+    
+    async def process_articles(self, urls: List[str]) -> List[Article]:
+        """Process multiple articles concurrently"""
+        logger.info(f"Processing {len(urls)} articles with {self.max_concurrent} workers")
+        
+        articles: List[Optional[Article]] = [None] * len(urls)
+        async for index, article in self._iter_indexed(urls):
+            articles[index] = article
+        return articles
     
     def get_summary(self, articles: List[Article]) -> Dict[str, any]:
         """Get processing summary statistics"""
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+ShardedRunner must answer every URL, even once a shard has crashed for good.
+"""
+
+import asyncio
+import multiprocessing
+
+from performance_comparison import article_pages, build_urls
+from sharded_runner import ShardedRunner
+from stub_site_server import HOST_PROFILES, start_in_process
+from test_optimize_enhanced import ProcessingStatus
+
+
+async def _kill_shard(index: int, times: int) -> None:
+    """SIGKILL each new worker process of one shard until it has died `times` times"""
+    killed = set()
+    while len(killed) < times:
+        for child in multiprocessing.active_children():
+            if child.name == f'golf-shard-{index}' and child.pid not in killed:
+                killed.add(child.pid)
+                child.kill()
+        await asyncio.sleep(0.2)
+
+
+def test_every_position_answered_after_shard_gives_up():
+    server, base_urls = start_in_process(article_pages(), [HOST_PROFILES['typical']], seed=1)
+    # Far more URLs than the window, so some are fed after the shard is done
+    urls = build_urls(base_urls, 40)
+    max_restarts = 1
+
+    async def run():
+        runner = ShardedRunner(workers=1, max_restarts=max_restarts, window=4,
+                               max_concurrent=2)
+        async with runner:
+            killer = asyncio.create_task(_kill_shard(0, max_restarts + 1))
+            results = await asyncio.wait_for(runner.process_articles(urls), timeout=120)
+            killer.cancel()
+            return results, runner.get_stats(latency=False)
+
+    try:
+        results, stats = asyncio.run(run())
+    finally:
+        server.terminate()
+
+    assert len(results) == len(urls)
+    assert all(article is not None for article in results)
+    assert [article.url for article in results] == urls
+    assert stats['worker_restarts'] == max_restarts
+    assert stats['worker_lost'] > 0
+    failed = [article for article in results if article.status == ProcessingStatus.FAILED]
+    assert len(failed) >= stats['worker_lost']
+    assert stats['total_processed'] == len(urls)
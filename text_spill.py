@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped side file for large article text.
+
+Big batches keep every ProcessedArticle in memory until the run ends, and
+the body strings dominate that footprint. SpillFile appends each body to a
+file once and hands back a small TextRef (offset and length); the text is
+decoded again from an mmap of the file only when someone reads it, so the
+page cache rather than the Python heap holds the bytes.
+
+A TextRef keeps its SpillFile alive, so records stay readable after the
+code that spilled them is done: the file is closed and removed when the
+SpillFile and the last TextRef into it are gone, or at once by close().
+"""
+
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+# Texts at least this many characters long are worth writing from a thread
+# (asyncio.to_thread) rather than on the event loop
+THREAD_PUT_CHARS = 64 * 1024
+
+
+class TextRef:
+    """Location of one spilled text in a SpillFile"""
+    __slots__ = ('spill', 'offset', 'length')
+
+    def __init__(self, spill: 'SpillFile', offset: int, length: int):
+        self.spill = spill
+        self.offset = offset
+        self.length = length
+
+    def read(self) -> str:
+        return self.spill.read(self.offset, self.length)
+
+    def __repr__(self) -> str:
+        return f"TextRef(offset={self.offset}, length={self.length})"
+
+
+class SpillFile:
+    """Append-only UTF-8 text store read back through mmap
+
+    The file is temporary and removed unless `keep` is set, on close() or
+    once neither this object nor any TextRef into it is referenced. Reads
+    remap the file when it has grown past the current mapping. Methods
+    are thread-safe, so large puts can run through asyncio.to_thread.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, keep: bool = False):
+        if directory:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(prefix='bodies-', suffix='.spill',
+                                    dir=str(directory) if directory else None)
+        self.path = Path(name)
+        self.keep = keep
+        self._file = os.fdopen(fd, 'w+b')
+        self._size = 0
+        self._map: Optional[mmap.mmap] = None
+        self._mapped = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, SpillFile._discard, self._file, self.path, keep)
+
+    @staticmethod
+    def _discard(file: BinaryIO, path: Path, keep: bool) -> None:
+        file.close()
+        if not keep:
+            path.unlink(missing_ok=True)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def put(self, text: str) -> TextRef:
+        """Append a text and return where it lives"""
+        data = text.encode('utf-8')
+        with self._lock:
+            offset = self._size
+            self._file.write(data)
+            self._size += len(data)
+            self._dirty = True
+        return TextRef(self, offset, len(data))
+
+    def read(self, offset: int, length: int) -> str:
+        with self._lock:
+            if offset + length > self._mapped:
+                self._remap()
+            data = self._map[offset:offset + length]
+        return data.decode('utf-8')
+
+    def _remap(self) -> None:
+        if self._dirty:
+            self._file.flush()
+            self._dirty = False
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped = len(self._map)
+
+    def close(self) -> None:
+        """Unmap and close the file now, deleting it unless kept
+
+        TextRefs into the file cannot be read afterwards.
+        """
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+                self._mapped = 0
+            if not self._finalizer.alive:
+                return
+            self._finalizer()
+        if self.keep:
+            logger.info(f"Kept {self._size} bytes of spilled text in {self.path}")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+URL canonicalization and a persistent seen-URL filter.
+
+Canonicalization follows enhanced_url_normalizer.js (www/alias folding,
+tracking-parameter removal, trailing slashes) and additionally folds AMP
+variants, so the same article reached through different links maps to one
+key. The seen-set is a Bloom filter kept in memory and on disk, backed by
+an exact SQLite store that confirms every Bloom hit - lookups of unseen
+URLs never touch disk, and false positives never drop a new article.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Same lists as enhanced_url_normalizer.js
+TRACKING_PARAMS = frozenset({
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term',
+    'gclid', 'fbclid', 'msclkid', '_ga', '_gid',
+    'ref', 'src', 'source', 'campaign',
+    't', 'ts', 'timestamp', 'time', '_t', 'sid', 'sessionid',
+    # AMP switches
+    'amp', 'outputtype'
+})
+
+DOMAIN_ALIASES = {
+    'm.golf.com': 'golf.com',
+    'mobile.golfdigest.com': 'golfdigest.com',
+    'amp.golfwrx.com': 'golfwrx.com'
+}
+
+_AMP_PATH = re.compile(r'/amp/?$|/amp(?=/)|\.amp(?=\.html?$)', re.IGNORECASE)
+_INDEX_FILE = re.compile(r'/index\.(html?|php|asp)$', re.IGNORECASE)
+
+
+def canonicalize_url(url: str) -> str:
+    """Reduce a URL to the canonical key used for duplicate detection"""
+    url = url.strip()
+    if not re.match(r'^https?://', url, re.IGNORECASE):
+        url = 'https://' + url.lstrip('/')
+    parts = urlsplit(url)
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    host = DOMAIN_ALIASES.get(host, host)
+    # A non-default port is a different origin (a local stub host, say)
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+
+    path = re.sub(r'/+', '/', parts.path or '/')
+    path = _AMP_PATH.sub('', path)
+    path = _INDEX_FILE.sub('', path)
+    if len(path) > 1 and path.endswith('/'):
+        path = path[:-1]
+    path = path.lower() or '/'
+
+    params = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                    if k.lower() not in TRACKING_PARAMS)
+    query = urlencode(params)
+
+    # Scheme and fragment never change the article
+    return f"https://{host}{path}" + (f"?{query}" if query else '')
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001,
+                 bits: Optional[bytearray] = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = self.bits_for(capacity, error_rate)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+
+    @staticmethod
+    def bits_for(capacity: int, error_rate: float) -> int:
+        """Bits needed for `capacity` items at `error_rate` false positives"""
+        return max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+
+    @classmethod
+    def memory_for(cls, capacity: int, error_rate: float = 0.001) -> int:
+        """Bytes a filter of this size occupies"""
+        return (cls.bits_for(capacity, error_rate) + 7) // 8
+
+    def _positions(self, digest: bytes) -> Iterable[int]:
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, digest: bytes) -> None:
+        bits = self.bits
+        for pos in self._positions(digest):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+
+class SeenUrlStore:
+    """Persistent set of canonical URLs: Bloom filter first, SQLite to confirm
+
+    Memory use is fixed by `capacity` and `error_rate` (see memory_bytes);
+    past capacity the false positive rate rises, which costs extra SQLite
+    confirmations but never wrong answers.
+
+    Methods are synchronous and thread-safe; async callers should run
+    lookups and additions through asyncio.to_thread, since a Bloom hit or a
+    batch commit touches disk.
+    """
+
+    COMMIT_EVERY = 500
+
+    def __init__(self, path: Path, capacity: int = 5_000_000, error_rate: float = 0.001):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._bloom_path = self.path / 'seen_urls.bloom'
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path / 'seen_urls.sqlite3'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS seen '
+                         '(digest BLOB PRIMARY KEY) WITHOUT ROWID')
+        self._pending = 0
+
+        bits = None
+        expected = BloomFilter.memory_for(capacity, error_rate)
+        if self._bloom_path.exists() and self._bloom_path.stat().st_size == expected:
+            bits = bytearray(self._bloom_path.read_bytes())
+        # The snapshot is only written on close(); removing it while open means
+        # a crashed run leaves no stale filter behind and the next open
+        # rebuilds from SQLite instead
+        self._bloom_path.unlink(missing_ok=True)
+        self.bloom = BloomFilter(capacity, error_rate, bits)
+        if bits is None:
+            self._rebuild_bloom()
+        logger.info(f"Seen-URL filter ready: {self.memory_bytes / 1024 / 1024:.1f} MB "
+                    f"for {capacity:,} URLs at {error_rate:.2%} false positives")
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bloom.bits)
+
+    def _rebuild_bloom(self) -> None:
+        """Repopulate the Bloom filter from the exact store"""
+        for (digest,) in self._db.execute('SELECT digest FROM seen'):
+            self.bloom.add(digest)
+
+    def __contains__(self, url: str) -> bool:
+        digest = _digest(canonicalize_url(url))
+        if digest not in self.bloom:
+            return False
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM seen WHERE digest = ?',
+                                    (digest,)).fetchone() is not None
+
+    def add(self, url: str) -> None:
+        """Record a URL as seen (committed in batches)"""
+        digest = _digest(canonicalize_url(url))
+        with self._lock:
+            self.bloom.add(digest)
+            self._db.execute('INSERT OR IGNORE INTO seen VALUES (?)', (digest,))
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._commit()
+
+    def add_many(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            self.add(url)
+        self.flush()
+
+    def flush(self) -> None:
+        """Commit pending additions to the exact store"""
+        with self._lock:
+            self._commit()
+
+    def _commit(self) -> None:
+        self._db.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        """Commit and snapshot the Bloom filter for a fast next start"""
+        self.flush()
+        self._db.close()
+        tmp_path = self._bloom_path.with_suffix('.tmp')
+        tmp_path.write_bytes(self.bloom.bits)
+        tmp_path.replace(self._bloom_path)
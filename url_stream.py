@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the processors for taking URLs from any source.
+
+Kept free of the processors' own imports, so the simple processor can use
+them without loading the enhanced pipeline and its stores.
+"""
+
+from typing import AsyncIterable, AsyncIterator, Iterable, Union
+
+
+async def aiter_urls(urls: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+    """Iterate a plain or async iterable of URLs asynchronously"""
+    if hasattr(urls, '__aiter__'):
+        async for url in urls:
+            yield url
+    else:
+        for url in urls:
+            yield url